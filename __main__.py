@@ -0,0 +1,19 @@
+"""
+Permite executar o projeto como módulo ou diretório:
+
+    python -m processador_cenarios run ...   (a partir do diretório pai)
+    python processador_cenarios run ...
+"""
+import multiprocessing
+import os
+import sys
+
+# Os módulos do projeto são importados pelo nome de topo (methods, modules, ...),
+# então o diretório do projeto precisa estar no sys.path.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -4,17 +4,23 @@ from tkinter import ttk, messagebox, filedialog
 from pathlib import Path
 import logging
 import threading
-import pandas as pd
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 from utils.logger_config import setup_logger, GuiLogHandler
 from utils.get_base_path import get_database_path, get_config_path
+from utils.run_control import CancelToken, ETAPA_CONCLUIDO, format_duration
 from config_manager_gui import ConfigManagerFrame
-from modules.scenario_loader import load_scenarios
-from methods._run_forecasting import run_single_scenario
+from modules.scenario_loader import load_scenarios, load_retention_config
+from methods._run_batch import run_scenarios, summarize_results, default_max_workers, log_slowest_scenarios
 from persistence.sqlite_adapter import SqliteAdapter
-from modules.chart_generator import create_forecast_chart # Importa a função de gráfico
-from modules.data_exporter import export_dataframe_to_csv, export_dataframe_to_excel # Importa as funções de exportação
-from modules.data_loader import load_historical_data, consolidate_series # Importa para carregar dados históricos para comparação
+from modules.chart_generator import ForecastChart # Gráfico persistente, atualizado a cada seleção
+from modules.data_exporter import stream_results_to_csv, stream_results_to_excel, stream_results_to_parquet # Exportação em fluxo direto do banco
+from modules.data_loader import consolidate_series
+from modules.results_drilldown import get_drilldown_cache # Dados dos gráficos por (cenário, execução)
+from modules.results_retention import prune_results, retention_policy_from_config
+from modules.results_pager import RESULTS_TABLE_COLUMNS, DEFAULT_PAGE_SIZE, count_results, fetch_results_page
+from modules.results_analytics import AGGREGATE_QUERIES, run_aggregate, close_snapshots
 
 # Configura o logger
 logger = setup_logger()
@@ -100,6 +106,28 @@ class App(customtkinter.CTk):
         
         # Dicionário para armazenar os frames das diferentes telas
         self.frames = {}
+
+        # Estado da tabela de resultados paginada; as páginas são buscadas em uma única thread de fundo
+        self.results_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="resultados")
+        self.results_generation = 0
+        self.results_next_key = None
+        self.results_exhausted = False
+        self.results_loading = False
+        self.results_loaded = 0
+        self.results_total = None
+
+        # Token de cancelamento da execução em andamento
+        self.cancel_token = None
+
+        # Gráfico de previsões, criado na primeira seleção e reaproveitado nas seguintes
+        self.forecast_chart = None
+        # Dados dos gráficos: carregados em uma thread (seleção) e pré-carregados em outra (linhas vizinhas)
+        self.chart_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="grafico")
+        self.prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pre_carregamento")
+        self.chart_selection = None
+
+        # Libera o gráfico e as threads de fundo ao fechar a janela
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
         
         # Cria os frames das diferentes telas
         self.create_frames()
@@ -107,8 +135,9 @@ class App(customtkinter.CTk):
         # Mostra a tela inicial (Gerenciar Cenários)
         self.show_config_frame()
 
-        # Configura o handler de log para a caixa de texto de execução
-        self.log_handler = GuiLogHandler(self.frames["execute"].log_textbox)
+        # Configura o handler de log para a caixa de texto de execução: as mensagens são
+        # enfileiradas por qualquer thread e exibidas em lote pela thread da GUI
+        self.log_handler = GuiLogHandler(self.frames["execute"].log_textbox, level=logging.INFO)
         logger.addHandler(self.log_handler)
 
         # Inicializa o banco de dados de resultados
@@ -129,7 +158,7 @@ class App(customtkinter.CTk):
         try:
             result_path = get_database_path("previsoes.db")
             
-            with SqliteAdapter(str(result_path)) as adapter:
+            with SqliteAdapter(str(result_path), tune_storage=True) as adapter:
                 adapter.create_schema_if_not_exists()
                 
             logger.info("Banco de dados de resultados inicializado com sucesso.")
@@ -181,6 +210,26 @@ class App(customtkinter.CTk):
             command=self.start_execution_thread
         )
         self.execute_btn.grid(row=0, column=0, padx=20, pady=20, sticky="ew")
+
+        # Número de processos usados na execução paralela
+        workers_frame = customtkinter.CTkFrame(content_frame, fg_color="transparent")
+        workers_frame.grid(row=5, column=0, padx=20, pady=(0, 10), sticky="w")
+        workers_label = customtkinter.CTkLabel(workers_frame, text="Processos:")
+        workers_label.pack(side="left", padx=(0, 5))
+        self.workers_entry = customtkinter.CTkEntry(workers_frame, width=60)
+        self.workers_entry.pack(side="left")
+        self.workers_entry.insert(0, str(default_max_workers()))
+
+        # Cancelamento cooperativo da execução em andamento
+        self.cancel_btn = customtkinter.CTkButton(
+            workers_frame,
+            text="Cancelar Execução",
+            state="disabled",
+            fg_color=("#B22222", "#8B1A1A"),
+            hover_color=("#8B1A1A", "#6B1414"),
+            command=self.cancel_execution
+        )
+        self.cancel_btn.pack(side="left", padx=(20, 0))
         
         # Barra de progresso
         self.progress_bar = customtkinter.CTkProgressBar(content_frame)
@@ -192,18 +241,45 @@ class App(customtkinter.CTk):
         self.status_label.grid(row=4, column=0, padx=20, pady=(0, 10), sticky="w")
 
         # Área de logs
+        log_header_frame = customtkinter.CTkFrame(content_frame, fg_color="transparent")
+        log_header_frame.grid(row=1, column=0, padx=20, pady=(10, 5), sticky="ew")
         log_label = customtkinter.CTkLabel(
-            content_frame,
+            log_header_frame,
             text="Logs de Execução:",
             font=customtkinter.CTkFont(size=14, weight="bold")
         )
-        log_label.grid(row=1, column=0, padx=20, pady=(10, 5), sticky="w")
+        log_label.pack(side="left")
+
+        # Nível mínimo das mensagens exibidas na caixa de logs
+        self.log_level_combobox = customtkinter.CTkComboBox(
+            log_header_frame,
+            values=list(self.LOG_LEVELS),
+            width=120,
+            command=self.on_log_level_change
+        )
+        self.log_level_combobox.set("INFO")
+        self.log_level_combobox.pack(side="right")
+        log_level_label = customtkinter.CTkLabel(log_header_frame, text="Nível:")
+        log_level_label.pack(side="right", padx=(0, 5))
         
         frame.log_textbox = customtkinter.CTkTextbox(content_frame, height=400)
         frame.log_textbox.grid(row=2, column=0, sticky="nsew", padx=20, pady=(5, 20))
         
         return frame
     
+    # Níveis disponíveis no filtro da caixa de logs
+    LOG_LEVELS = {
+        "INFO": logging.INFO,
+        "WARNING": logging.WARNING,
+        "ERROR": logging.ERROR,
+    }
+
+    def on_log_level_change(self, level_name):
+        """
+        Altera o nível mínimo das mensagens exibidas na caixa de logs.
+        """
+        self.log_handler.setLevel(self.LOG_LEVELS[level_name])
+
     def create_results_frame(self):
         """
         Cria o frame de visualização de resultados.
@@ -225,6 +301,10 @@ class App(customtkinter.CTk):
             font=customtkinter.CTkFont(size=20, weight="bold")
         )
         title_label.grid(row=0, column=0, sticky="w")
+
+        # Quantidade de linhas exibidas / total de linhas no banco
+        self.results_count_label = customtkinter.CTkLabel(header_frame, text="")
+        self.results_count_label.grid(row=1, column=0, sticky="w")
         
         # Frame para botões de ação
         buttons_frame = customtkinter.CTkFrame(header_frame, fg_color="transparent")
@@ -252,16 +332,47 @@ class App(customtkinter.CTk):
             text="Exportar Excel",
             command= self.export_results_to_excel
         )
-        export_excel_button.pack(side="left")
+        export_excel_button.pack(side="left", padx=(0, 10))
+
+        # Botão de exportação para Parquet
+        export_parquet_button = customtkinter.CTkButton(
+            buttons_frame,
+            text="Exportar Parquet",
+            command=self.export_results_to_parquet
+        )
+        export_parquet_button.pack(side="left", padx=(0, 10))
+
+        # Desabilitados enquanto uma exportação está em andamento
+        self.export_buttons = [export_csv_button, export_excel_button, export_parquet_button]
+
+        # Botão dos resumos analíticos (ranking de modelos, resumo por cenário, etc.)
+        summaries_button = customtkinter.CTkButton(
+            buttons_frame,
+            text="Resumos",
+            command=self.open_summaries_window
+        )
+        summaries_button.pack(side="left", padx=(0, 10))
+
+        # Botão de limpeza do histórico (política de retenção)
+        self.prune_button = customtkinter.CTkButton(
+            buttons_frame,
+            text="Aplicar Retenção",
+            command=self.start_prune_thread
+        )
+        self.prune_button.pack(side="left")
         
         # Tabela de resultados
-        self.results_table = ttk.Treeview(frame)
+        self.results_table = ttk.Treeview(frame, columns=RESULTS_TABLE_COLUMNS, show="headings")
         self.results_table.grid(row=1, column=0, sticky="nsew", padx=20, pady=(10, 20))
+        for col in RESULTS_TABLE_COLUMNS:
+            self.results_table.heading(col, text=col, anchor=tk.W)
+            self.results_table.column(col, anchor=tk.W, width=100)
         
         # Scrollbars para a tabela
-        vsb = ttk.Scrollbar(frame, orient="vertical", command=self.results_table.yview)
-        vsb.grid(row=1, column=1, sticky="ns")
-        self.results_table.configure(yscrollcommand=vsb.set)
+        self.results_vsb = ttk.Scrollbar(frame, orient="vertical", command=self.results_table.yview)
+        self.results_vsb.grid(row=1, column=1, sticky="ns")
+        # A rolagem também dispara a busca da próxima página quando o fim da tabela se aproxima
+        self.results_table.configure(yscrollcommand=self.on_results_scroll)
         
         hsb = ttk.Scrollbar(frame, orient="horizontal", command=self.results_table.xview)
         hsb.grid(row=2, column=0, sticky="ew")
@@ -278,6 +389,21 @@ class App(customtkinter.CTk):
         
         return frame
     
+    def on_closing(self):
+        """
+        Libera o handler de logs da GUI, o gráfico, as threads de fundo da tela de resultados e as
+        fontes dos resumos antes de fechar a janela.
+        """
+        logger.removeHandler(self.log_handler)
+        self.log_handler.close()
+        if self.forecast_chart is not None:
+            self.forecast_chart.destroy()
+            self.forecast_chart = None
+        for executor in (self.results_executor, self.chart_executor, self.prefetch_executor):
+            executor.shutdown(wait=False, cancel_futures=True)
+        close_snapshots()
+        self.destroy()
+
     def show_config_frame(self):
         """
         Mostra o frame de configuração de cenários.
@@ -330,15 +456,38 @@ class App(customtkinter.CTk):
         """
         Inicia a execução dos cenários em uma thread separada para não bloquear a GUI.
         """
+        try:
+            max_workers = int(self.workers_entry.get())
+            if max_workers < 1:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Valor Inválido", "O número de processos deve ser um inteiro maior que zero.")
+            return
+
         self.execute_btn.configure(state="disabled", text="Executando...")
+        self.cancel_token = CancelToken()
+        self.cancel_btn.configure(state="normal", text="Cancelar Execução")
         self.progress_bar.set(0)
         self.status_label.configure(text="Iniciando execução...")
-        execution_thread = threading.Thread(target=self.run_all_scenarios)
+        execution_thread = threading.Thread(target=self.run_all_scenarios, args=(max_workers, self.cancel_token))
         execution_thread.start()
     
-    def run_all_scenarios(self):
+    def cancel_execution(self):
+        """
+        Solicita o cancelamento da execução em andamento. Os cenários param no próximo
+        ponto de verificação, sem gravar resultados parciais.
+        """
+        if not messagebox.askyesno("Cancelar Execução", "Interromper a execução dos cenários?"):
+            return
+        self.cancel_token.cancel()
+        self.cancel_btn.configure(state="disabled", text="Cancelando...")
+        self.status_label.configure(text="Cancelando a execução...")
+
+    def run_all_scenarios(self, max_workers=None, cancel_token=None):
         """
         Lógica de execução de todos os cenários.
+        Os cenários são distribuídos em um pool de processos; os eventos de progresso
+        (etapa de cada cenário, tempo decorrido e estimativa restante) são repassados à GUI.
         """
         config_path = get_config_path("scenarios_config.yaml")
         data_db_path = get_database_path("dados_bcb.db") # Assumindo que o banco de dados está na raiz
@@ -349,193 +498,611 @@ class App(customtkinter.CTk):
             total_scenarios = len(scenarios)
             logger.info(f"Iniciando a execução de {total_scenarios} cenários.")
             
-            for i, scenario in enumerate(scenarios):
-                scenario_name = scenario.get("nome_cenario", "Cenário Desconhecido")
-                self.after(0, self.status_label.configure, f"Executando cenário: {scenario_name} ({i+1}/{total_scenarios})")
-                self.after(0, self.progress_bar.set, (i + 1) / total_scenarios)
-                run_single_scenario(scenario, data_db_path, results_db_path)
-
-            logger.info("Todos os cenários foram executados com sucesso.")
-            self.after(0, messagebox.showinfo, "Execução Concluída", "Todos os cenários foram executados com sucesso!")
+            results = run_scenarios(
+                scenarios, data_db_path, results_db_path,
+                max_workers=max_workers,
+                cancel_token=cancel_token,
+                on_event=self.on_run_event
+            )
+            summary = summarize_results(results)
+            # Detalhes por etapa: janela "Resumos", consultas de cenários e etapas mais lentos
+            log_slowest_scenarios(results)
+            # Novas execuções foram gravadas: os gráficos preparados deixam de valer
+            get_drilldown_cache().invalidate()
+
+            if summary["cancelado"]:
+                message = (f"Execução cancelada. {summary['sucesso']} de {summary['total']} cenários concluídos com sucesso.\n"
+                           f"Cancelados: {summary['cancelado']}. Com erro: {summary['erro']}. Ignorados: {summary['ignorado']}.")
+                logger.warning(message)
+                self.after(0, messagebox.showwarning, "Execução Cancelada", message)
+            elif summary["erro"] or summary["ignorado"]:
+                message = (f"{summary['sucesso']} de {summary['total']} cenários executados com sucesso.\n"
+                           f"Com erro: {summary['erro']}. Ignorados: {summary['ignorado']}.")
+                logger.warning(message)
+                self.after(0, messagebox.showwarning, "Execução Concluída", message)
+            else:
+                logger.info("Todos os cenários foram executados com sucesso.")
+                self.after(0, messagebox.showinfo, "Execução Concluída", "Todos os cenários foram executados com sucesso!")
         except Exception as e:
             logger.error(f"Erro durante a execução dos cenários: {e}")
             self.after(0, messagebox.showerror, "Erro na Execução", f"Ocorreu um erro: {e}")
         finally:
+            final_text = "Execução cancelada." if cancel_token is not None and cancel_token.cancelled else "Execução finalizada."
             self.after(0, self.enable_execute_button)
-            self.after(0, self.status_label.configure, "Execução finalizada.")
+            self.after(0, lambda: self.status_label.configure(text=final_text))
             self.after(0, self.progress_bar.set, 1.0)
 
+    def on_run_event(self, event):
+        """
+        Recebe um evento de progresso da execução (chamado fora da thread da GUI) e agenda a
+        atualização dos widgets.
+        """
+        if event["etapa"] == ETAPA_CONCLUIDO:
+            status_text = f"Cenário concluído: {event['cenario']} [{event['status']}]"
+        else:
+            status_text = f"{event['cenario']}: {event['etapa']}"
+        status_text += (f" ({event['concluidos']}/{event['total']}) | "
+                        f"decorrido {format_duration(event['decorrido'])}")
+        if event["eta"] is not None:
+            status_text += f" | restante ~{format_duration(event['eta'])}"
+        self.after(0, lambda: self.status_label.configure(text=status_text))
+        self.after(0, self.progress_bar.set, event["concluidos"] / event["total"])
+
     def enable_execute_button(self):
         """
         Reabilita o botão de execução.
         """
         self.execute_btn.configure(state="normal", text="Iniciar Execução de Todos os Cenários")
+        self.cancel_btn.configure(state="disabled", text="Cancelar Execução")
+
+    def start_prune_thread(self):
+        """
+        Aplica a política de retenção ao banco de resultados em uma thread separada.
+        Usa a chave 'retencao' do arquivo de configuração ou, se ela não existir,
+        pergunta quantas execuções manter por cenário.
+        """
+        try:
+            policy = retention_policy_from_config(load_retention_config(get_config_path("scenarios_config.yaml")))
+        except (FileNotFoundError, ValueError) as e:
+            messagebox.showerror("Política de Retenção", f"Configuração de retenção inválida: {e}")
+            return
+
+        if policy["manter_ultimas"] is None and policy["max_dias"] is None:
+            dialog = customtkinter.CTkInputDialog(
+                text="Nenhuma política de retenção configurada (chave 'retencao').\n"
+                     "Quantas execuções mais recentes manter por cenário?",
+                title="Política de Retenção"
+            )
+            value = dialog.get_input()
+            if not value:
+                return  # Usuário cancelou
+            try:
+                policy = retention_policy_from_config({"manter_ultimas": int(value)})
+            except ValueError:
+                messagebox.showerror("Valor Inválido", "O número de execuções deve ser um inteiro maior que zero.")
+                return
+
+        description = []
+        if policy["manter_ultimas"] is not None:
+            description.append(f"manter as {policy['manter_ultimas']} execuções mais recentes de cada cenário")
+        if policy["max_dias"] is not None:
+            description.append(f"remover execuções com mais de {policy['max_dias']} dias")
+        if not messagebox.askyesno(
+            "Confirmar Retenção",
+            f"Aplicar a política de retenção ({'; '.join(description)})?\n"
+            "As execuções removidas não poderão ser recuperadas."
+        ):
+            return
+
+        self.prune_button.configure(state="disabled", text="Aplicando...")
+        prune_thread = threading.Thread(target=self.run_prune, args=(policy,), daemon=True)
+        prune_thread.start()
+
+    def run_prune(self, policy):
+        """
+        Remove as execuções fora da política de retenção e compacta o banco (fora da thread da GUI).
+        """
+        try:
+            summary = prune_results(
+                get_database_path("previsoes.db"),
+                keep_last=policy["manter_ultimas"],
+                max_age_days=policy["max_dias"]
+            )
+            get_drilldown_cache().invalidate()
+            message = (f"{summary['execucoes_removidas']} execuções ({summary['pontos_removidos']} pontos) removidas.\n"
+                       f"Tamanho do banco: {summary['bytes_antes'] / 1024 / 1024:.1f} MB -> "
+                       f"{summary['bytes_depois'] / 1024 / 1024:.1f} MB.")
+            self.after(0, messagebox.showinfo, "Retenção Concluída", message)
+            self.after(0, self.load_results_to_table)
+        except Exception as e:
+            logger.error(f"Erro ao aplicar a política de retenção: {e}")
+            self.after(0, messagebox.showerror, "Erro na Retenção", f"Ocorreu um erro: {e}")
+        finally:
+            self.after(0, lambda: self.prune_button.configure(state="normal", text="Aplicar Retenção"))
 
     def load_results_to_table(self):
         """
-        Carrega os resultados do banco de dados e os exibe na tabela.
+        Recarrega a tabela de resultados a partir da primeira página.
+
+        As linhas são buscadas em páginas (paginação por chave) em uma thread de fundo e
+        inseridas conforme o usuário rola a tabela, de modo que a interface não trava
+        qualquer que seja o tamanho do banco.
         """
         for item in self.results_table.get_children():
             self.results_table.delete(item)
 
-        try:
-            results_db_path = get_database_path("previsoes.db")
-            
-            with SqliteAdapter(str(results_db_path)) as adapter:
-                # Inclui as métricas de avaliação na consulta
-                results = adapter.query("SELECT nome_cenario, serie_id, data_execucao, data_previsao, frequencia_serie, valor_previsto, limite_inferior, limite_superior, modelo_utilizado, parametros_modelo, rmse, mae, mape FROM resultados_previsao ORDER BY data_execucao DESC")
+        # Páginas de uma carga anterior que ainda estejam a caminho são descartadas
+        self.results_generation += 1
+        self.results_next_key = None
+        self.results_exhausted = False
+        self.results_loading = False
+        self.results_loaded = 0
+        self.results_total = None
+        self.results_count_label.configure(text="Carregando resultados...")
 
-            if not results:
-                self.results_table.insert("", "end", values=("Nenhum resultado encontrado.", "", "", "", "", "", "", "", "", "", "", "", "", ""))
-                return
+        self.results_executor.submit(self.fetch_results_total, self.results_generation)
+        self.request_results_page()
 
-            # Define as colunas da tabela
-            columns = list(results[0].keys())
-            self.results_table["columns"] = columns
-            self.results_table.column("#0", width=0, stretch=tk.NO) # Coluna fantasma
-            
-            for col in columns:
-                self.results_table.heading(col, text=col, anchor=tk.W)
-                self.results_table.column(col, anchor=tk.W, width=100)
+    def on_results_scroll(self, first, last):
+        """
+        Atualiza a barra de rolagem e busca a próxima página quando o fim da tabela fica visível.
+        """
+        self.results_vsb.set(first, last)
+        if float(last) >= 0.9:
+            self.request_results_page()
 
-            # Insere os dados na tabela
-            for row in results:
-                self.results_table.insert("", "end", values=list(row))
+    def request_results_page(self):
+        """
+        Agenda a busca da próxima página, se ainda houver linhas e nenhuma busca estiver em andamento.
+        """
+        if self.results_loading or self.results_exhausted:
+            return
+        self.results_loading = True
+        self.results_executor.submit(self.fetch_results_page, self.results_generation, self.results_next_key)
 
+    def fetch_results_total(self, generation):
+        """
+        Conta as linhas da tabela de resultados (executado na thread de fundo).
+        """
+        try:
+            total = count_results(get_database_path("previsoes.db"))
         except Exception as e:
-            messagebox.showerror("Erro ao Carregar Resultados", f"Não foi possível carregar os resultados: {e}")
-            logger.error(f"Erro ao carregar resultados: {e}")
+            logger.error(f"Erro ao contar resultados: {e}")
+            total = None
+        self.after(0, self.set_results_total, generation, total)
 
-    def export_results_to_csv(self):
+    def fetch_results_page(self, generation, after):
         """
-        Exporta os resultados da tabela para um arquivo CSV.
+        Busca uma página de resultados (executado na thread de fundo) e a entrega à thread da GUI.
         """
         try:
-            # Solicita ao usuário o local para salvar o arquivo
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".csv",
-                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
-                title="Salvar resultados como CSV"
-            )
-            
-            if not file_path:
-                return  # Usuário cancelou
+            rows, next_key = fetch_results_page(get_database_path("previsoes.db"), after, DEFAULT_PAGE_SIZE)
+            # Apenas valores simples atravessam para a thread da GUI
+            rows = [(row["execucao_id"], [row[col] for col in RESULTS_TABLE_COLUMNS]) for row in rows]
+        except Exception as e:
+            logger.error(f"Erro ao carregar resultados: {e}")
+            self.after(0, self.on_results_page_error, generation, e)
+            return
+        self.after(0, self.append_results_page, generation, rows, next_key)
 
-            # Carrega os dados do banco de dados
-            results_db_path = get_database_path("previsoes.db")
-            
-            with SqliteAdapter(str(results_db_path)) as adapter:
-                results = adapter.query("SELECT * FROM resultados_previsao ORDER BY data_execucao DESC")
+    def set_results_total(self, generation, total):
+        """
+        Registra o total de linhas e atualiza o contador.
+        """
+        if generation != self.results_generation:
+            return
+        self.results_total = total
+        self.update_results_count_label()
 
-            if not results:
-                messagebox.showwarning("Aviso", "Nenhum resultado encontrado para exportar.")
-                return
+    def append_results_page(self, generation, rows, next_key):
+        """
+        Insere na tabela uma página buscada em segundo plano.
+        """
+        if generation != self.results_generation:
+            return
 
-            # Converte para DataFrame
-            df = pd.DataFrame(results)
-            if df.empty:
-                messagebox.showwarning("Aviso", "Nenhum resultado encontrado para exportar.")
-                return
+        for execucao_id, values in rows:
+            # O iid identifica a linha pela execução e pela data prevista
+            self.results_table.insert("", "end", iid=f"{execucao_id}:{values[3]}", values=values)
+        self.results_loaded += len(rows)
 
-            # Exporta usando a função utilitária
-            export_dataframe_to_csv(df, file_path)
-            messagebox.showinfo("Exportação Concluída", f"Resultados exportados com sucesso para:\n{file_path}")
-        except Exception as e:
-            messagebox.showerror("Erro na Exportação", f"Erro ao exportar resultados: {e}")
-            logger.error(f"Erro ao exportar resultados para CSV: {e}")
+        self.results_next_key = next_key
+        self.results_exhausted = next_key is None
+        self.results_loading = False
+
+        if self.results_exhausted and self.results_loaded == 0:
+            self.results_table.insert("", "end", values=("Nenhum resultado encontrado.",) + ("",) * (len(RESULTS_TABLE_COLUMNS) - 1))
+        self.update_results_count_label()
+
+        # Se a página não preencheu a área visível, a rolagem não será disparada: busca a próxima
+        if not self.results_exhausted and float(self.results_table.yview()[1]) >= 0.9:
+            self.request_results_page()
+
+    def on_results_page_error(self, generation, error):
+        """
+        Informa um erro na busca de uma página e permite nova tentativa ao rolar a tabela.
+        """
+        if generation != self.results_generation:
+            return
+        self.results_loading = False
+        self.update_results_count_label()
+        messagebox.showerror("Erro ao Carregar Resultados", f"Não foi possível carregar os resultados: {error}")
+
+    def update_results_count_label(self):
+        """
+        Mostra quantas linhas estão carregadas na tabela e o total de linhas no banco.
+        """
+        if self.results_total is None:
+            text = f"{self.results_loaded} resultados carregados"
+        else:
+            text = f"Exibindo {self.results_loaded} de {self.results_total} resultados"
+        if self.results_loading:
+            text += " (carregando...)"
+        self.results_count_label.configure(text=text)
+
+    def export_results_to_csv(self):
+        """
+        Exporta os resultados para um arquivo CSV.
+        """
+        self.start_export("csv")
 
     def export_results_to_excel(self):
         """
-        Exporta os resultados da tabela para um arquivo Excel.
+        Exporta os resultados para um arquivo Excel.
+        """
+        self.start_export("excel")
+
+    def export_results_to_parquet(self):
         """
+        Exporta os resultados para um arquivo Parquet.
+        """
+        self.start_export("parquet")
+
+    # Formatos de exportação: (função, extensão, tipos de arquivo, nome exibido)
+    EXPORT_FORMATS = {
+        "csv": (stream_results_to_csv, ".csv", [("CSV files", "*.csv"), ("All files", "*.*")], "CSV"),
+        "excel": (stream_results_to_excel, ".xlsx", [("Excel files", "*.xlsx"), ("All files", "*.*")], "Excel"),
+        "parquet": (stream_results_to_parquet, ".parquet", [("Parquet files", "*.parquet"), ("All files", "*.*")], "Parquet"),
+    }
+
+    def start_export(self, export_format):
+        """
+        Pergunta os filtros e o arquivo de destino e exporta os resultados em uma thread separada.
+        As linhas são lidas do banco e gravadas em blocos, sem carregar a tabela inteira em memória.
+        """
+        exporter, extension, filetypes, format_name = self.EXPORT_FORMATS[export_format]
+        results_db_path = get_database_path("previsoes.db")
+
         try:
-            # Solicita ao usuário o local para salvar o arquivo
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
-                title="Salvar resultados como Excel"
-            )
-            
-            if not file_path:
-                return  # Usuário cancelou
+            with SqliteAdapter(str(results_db_path), tune_storage=True) as adapter:
+                scenario_names = [row[0] for row in adapter.query(
+                    "SELECT DISTINCT nome_cenario FROM execucoes ORDER BY nome_cenario"
+                )]
+        except Exception as e:
+            messagebox.showerror("Erro na Exportação", f"Não foi possível ler os cenários do banco de resultados: {e}")
+            logger.error(f"Erro ao preparar exportação: {e}")
+            return
 
-            # Carrega os dados do banco de dados
-            results_db_path = get_database_path("previsoes.db")
-            
-            with SqliteAdapter(str(results_db_path)) as adapter:
-                results = adapter.query("SELECT * FROM resultados_previsao ORDER BY data_execucao DESC")
+        dialog = ExportOptionsDialog(self, f"Exportar {format_name}", scenario_names)
+        self.wait_window(dialog)
+        if dialog.filters is None:
+            return  # Usuário cancelou
 
-            if not results:
-                messagebox.showwarning("Aviso", "Nenhum resultado encontrado para exportar.")
-                return
+        # Solicita ao usuário o local para salvar o arquivo
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=extension,
+            filetypes=filetypes,
+            title=f"Salvar resultados como {format_name}"
+        )
+        if not file_path:
+            return  # Usuário cancelou
 
-            # Converte para DataFrame
-            df = pd.DataFrame(results)
-            if df.empty:
-                messagebox.showwarning("Aviso", "Nenhum resultado encontrado para exportar.")
-                return
+        for button in self.export_buttons:
+            button.configure(state="disabled")
+        export_thread = threading.Thread(
+            target=self.run_export,
+            args=(exporter, format_name, results_db_path, file_path, dialog.filters),
+            daemon=True
+        )
+        export_thread.start()
 
-            # Exporta usando a função utilitária
-            export_dataframe_to_excel(df, file_path)
-            messagebox.showinfo("Exportação Concluída", f"Resultados exportados com sucesso para:\n{file_path}")
+    def run_export(self, exporter, format_name, results_db_path, file_path, filters):
+        """
+        Executa a exportação fora da thread da GUI e informa o resultado ao final.
+        """
+        try:
+            total = exporter(results_db_path, file_path, **filters)
+            if total == 0:
+                self.after(0, messagebox.showwarning, "Aviso", "Nenhum resultado encontrado para exportar.")
+            else:
+                self.after(0, messagebox.showinfo, "Exportação Concluída",
+                           f"{total} resultados exportados com sucesso para:\n{file_path}")
         except Exception as e:
-            messagebox.showerror("Erro na Exportação", f"Erro ao exportar resultados: {e}")
-            logger.error(f"Erro ao exportar resultados para Excel: {e}")
+            logger.error(f"Erro ao exportar resultados para {format_name}: {e}")
+            self.after(0, messagebox.showerror, "Erro na Exportação", f"Erro ao exportar resultados: {e}")
+        finally:
+            for button in self.export_buttons:
+                self.after(0, lambda b=button: b.configure(state="normal"))
+
+    def open_summaries_window(self):
+        """
+        Abre a janela de resumos analíticos do banco de resultados (reaproveita a janela já aberta).
+        """
+        window = getattr(self, "summaries_window", None)
+        if window is not None and window.winfo_exists():
+            window.focus()
+            return
+        self.summaries_window = SummariesWindow(self, get_database_path("previsoes.db"))
+
+    # Execuções vizinhas (acima e abaixo da selecionada) pré-carregadas em segundo plano
+    PREFETCH_NEIGHBORS = 2
+    # Linhas percorridas, em cada direção, à procura das execuções vizinhas
+    PREFETCH_MAX_ROWS = 2000
 
     def on_scenario_select(self, event):
         """
-        Lida com a seleção de um cenário na tabela de resultados para exibir o gráfico.
+        Lida com a seleção de uma linha na tabela de resultados para exibir o gráfico da execução.
+        Os dados vêm do cache de gráficos; em caso de falta, são carregados em segundo plano.
         """
         selected_item = self.results_table.focus()
         if not selected_item:
             return
 
-        # Limpa o frame do gráfico antes de adicionar um novo
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-
         values = self.results_table.item(selected_item, "values")
         if not values or values[0] == "Nenhum resultado encontrado.":
+            self.chart_selection = None
+            if self.forecast_chart is not None:
+                self.forecast_chart.clear()
             return
 
-        # Extrai os dados necessários para o gráfico
-        scenario_name = values[0]
-        serie_id = values[1]
-
-        # Reconstruir o DataFrame de previsão a partir dos valores da tabela
-        # É mais robusto carregar os dados do DB novamente para garantir tipos corretos
+        # O iid da linha é "execucao_id:data_previsao"
+        key = (values[0], int(selected_item.split(":", 1)[0]))
+        self.chart_selection = key
         results_db_path = get_database_path("previsoes.db")
         data_db_path = get_database_path("dados_bcb.db")
 
+        dataset = get_drilldown_cache().peek(*key, results_db_path, data_db_path)
+        if dataset is not None:
+            self.show_forecast_chart(key, dataset)
+        else:
+            self.chart_executor.submit(self.fetch_chart_dataset, key, results_db_path, data_db_path)
+
+        neighbors = self.adjacent_executions(selected_item, key)
+        if neighbors:
+            self.prefetch_executor.submit(get_drilldown_cache().prefetch, neighbors, results_db_path, data_db_path)
+
+    def fetch_chart_dataset(self, key, results_db_path, data_db_path):
+        """
+        Carrega os dados do gráfico fora da thread da GUI e agenda a exibição.
+        """
         try:
-            with SqliteAdapter(str(results_db_path)) as adapter:
-                # Busca os resultados específicos para o cenário selecionado
-                # Pode ser necessário ajustar a query para pegar apenas a última execução do cenário
-                forecast_records = adapter.query(
-                    "SELECT data_previsao, valor_previsto, limite_inferior, limite_superior FROM resultados_previsao WHERE nome_cenario = ? ORDER BY data_execucao DESC, data_previsao ASC LIMIT ?",
-                    (scenario_name, 100) # Limita para evitar gráficos muito grandes, ajustar conforme necessário
-                )
-            if not forecast_records:
-                logger.warning(f"Nenhum dado de previsão encontrado para o cenário {scenario_name} para plotagem.")
-                return
+            dataset = get_drilldown_cache().get(*key, results_db_path, data_db_path)
+            self.after(0, self.show_forecast_chart, key, dataset)
+        except Exception as e:
+            logger.error(f"Erro ao carregar o gráfico do cenário {key[0]}: {e}", exc_info=True)
+            self.after(0, self.on_chart_error, key, e)
 
-            forecast_df = pd.DataFrame(forecast_records) 
-            # Seta o index para refletir os da query
-            forecast_df.columns = ["data_previsao", "valor_previsto", "limite_inferior", "limite_superior"]
+    def show_forecast_chart(self, key, dataset):
+        """
+        Exibe o gráfico da execução, se ela ainda for a selecionada (na thread da GUI).
+        """
+        if key != self.chart_selection:
+            return
+        try:
+            # Atualiza o gráfico (criado apenas na primeira seleção)
+            if self.forecast_chart is None:
+                self.forecast_chart = ForecastChart(self.chart_frame)
+            self.forecast_chart.update(dataset["historico"], [dataset["previsao"]], dataset["nome_cenario"])
+        except Exception as e:
+            logger.error(f"Erro ao gerar gráfico para o cenário {key[0]}: {e}", exc_info=True)
+            messagebox.showerror("Erro no Gráfico", f"Não foi possível gerar o gráfico: {e}")
 
-            forecast_df["data_previsao"] = pd.to_datetime(forecast_df["data_previsao"])
-            forecast_df["valor_previsto"] = pd.to_numeric(forecast_df["valor_previsto"])
-            forecast_df["limite_inferior"] = pd.to_numeric(forecast_df["limite_inferior"])
-            forecast_df["limite_superior"] = pd.to_numeric(forecast_df["limite_superior"])
+    def on_chart_error(self, key, error):
+        """
+        Informa uma falha ao carregar o gráfico da execução selecionada (na thread da GUI).
+        """
+        if key != self.chart_selection:
+            return
+        messagebox.showerror("Erro no Gráfico", f"Não foi possível gerar o gráfico: {error}")
+
+    def adjacent_executions(self, item, key):
+        """
+        Retorna as execuções vizinhas à linha selecionada na tabela, alternando entre a de cima
+        e a de baixo, até PREFETCH_NEIGHBORS em cada direção.
+        """
+        found = {"prev": [], "next": []}
+        seen = {key[1]}
+        for direction, step in (("prev", self.results_table.prev), ("next", self.results_table.next)):
+            current = item
+            for _ in range(self.PREFETCH_MAX_ROWS):
+                current = step(current)
+                if not current:
+                    break
+                execucao_id = int(current.split(":", 1)[0])
+                if execucao_id not in seen:
+                    seen.add(execucao_id)
+                    found[direction].append((self.results_table.set(current, "nome_cenario"), execucao_id))
+                    if len(found[direction]) == self.PREFETCH_NEIGHBORS:
+                        break
+        # Intercala as direções para que as execuções mais próximas sejam carregadas primeiro
+        neighbors = []
+        for i in range(self.PREFETCH_NEIGHBORS):
+            neighbors.extend(found[direction][i] for direction in ("next", "prev") if i < len(found[direction]))
+        return neighbors
+
+class SummariesWindow(customtkinter.CTkToplevel):
+    """
+    Janela com as consultas de resumo de AGGREGATE_QUERIES (ranking de modelos, resumo por
+    cenário, evolução mensal). As consultas rodam fora da thread da GUI, no DuckDB quando
+    instalado ou no próprio SQLite.
+    """
+
+    def __init__(self, master, results_db_path):
+        super().__init__(master)
+        self.title("Resumos dos Resultados")
+        self.geometry("900x500")
+        self.transient(master)
+        self.results_db_path = results_db_path
+        self.query_generation = 0 # Descarta respostas de consultas já substituídas
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self.query_names = {definition["titulo"]: name for name, definition in AGGREGATE_QUERIES.items()}
+
+        controls_frame = customtkinter.CTkFrame(self, fg_color="transparent")
+        controls_frame.grid(row=0, column=0, columnspan=2, sticky="ew", padx=10, pady=(15, 5))
+
+        self.query_combobox = customtkinter.CTkComboBox(
+            controls_frame, values=list(self.query_names), width=320, command=self.on_query_change
+        )
+        self.query_combobox.pack(side="left", padx=(0, 10))
+
+        self.parameter_label = customtkinter.CTkLabel(controls_frame, text="")
+        self.parameter_label.pack(side="left", padx=(0, 5))
+        self.parameter_entry = customtkinter.CTkEntry(controls_frame, width=60)
+        self.parameter_entry.pack(side="left", padx=(0, 10))
 
-            # Carregar dados históricos correspondentes
-            historical_df = load_historical_data(serie_id, data_db_path)
+        self.run_button = customtkinter.CTkButton(controls_frame, text="Consultar", width=100, command=self.run_query)
+        self.run_button.pack(side="left", padx=(0, 10))
 
-            # Cria e exibe o gráfico
-            create_forecast_chart(historical_df, [forecast_df], scenario_name, self.chart_frame)
+        self.status_label = customtkinter.CTkLabel(controls_frame, text="")
+        self.status_label.pack(side="left")
 
+        self.table = ttk.Treeview(self, show="headings")
+        self.table.grid(row=1, column=0, sticky="nsew", padx=(10, 0), pady=(5, 10))
+        vsb = ttk.Scrollbar(self, orient="vertical", command=self.table.yview)
+        vsb.grid(row=1, column=1, sticky="ns", pady=(5, 10))
+        self.table.configure(yscrollcommand=vsb.set)
+
+        first_title = next(iter(self.query_names))
+        self.query_combobox.set(first_title)
+        self.on_query_change(first_title)
+
+    def on_query_change(self, title):
+        """
+        Atualiza o rótulo e o valor padrão do parâmetro e executa a consulta escolhida.
+        """
+        definition = AGGREGATE_QUERIES[self.query_names[title]]
+        self.parameter_label.configure(text=f"{definition['parametro']}:")
+        self.parameter_entry.delete(0, tk.END)
+        self.parameter_entry.insert(0, str(definition["padrao"]))
+        self.run_query()
+
+    def run_query(self):
+        """
+        Valida o parâmetro e dispara a consulta em uma thread separada.
+        """
+        name = self.query_names[self.query_combobox.get()]
+        try:
+            parameter = int(self.parameter_entry.get().strip())
+            if parameter < 1:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Parâmetro Inválido", "Informe um número inteiro maior que zero.", parent=self)
+            return
+
+        self.query_generation += 1
+        generation = self.query_generation
+        self.status_label.configure(text="Consultando...")
+        threading.Thread(target=self.fetch_summary, args=(generation, name, parameter), daemon=True).start()
+
+    def fetch_summary(self, generation, name, parameter):
+        """
+        Executa a consulta fora da thread da GUI e agenda a exibição do resultado.
+        """
+        try:
+            result = run_aggregate(self.results_db_path, name, parameter)
+            self.after(0, self.show_summary, generation, result)
         except Exception as e:
-            logger.error(f"Erro ao gerar gráfico para o cenário {scenario_name}: {e}", exc_info=True)
-            messagebox.showerror("Erro no Gráfico", f"Não foi possível gerar o gráfico: {e}")
+            logger.error(f"Erro ao calcular o resumo '{name}': {e}")
+            self.after(0, self.show_summary_error, generation, e)
 
+    def show_summary(self, generation, result):
+        """
+        Exibe o resultado da consulta na tabela (na thread da GUI).
+        """
+        if generation != self.query_generation or not self.winfo_exists():
+            return
+        self.table.delete(*self.table.get_children())
+        self.table.configure(columns=result["colunas"])
+        for col in result["colunas"]:
+            self.table.heading(col, text=col, anchor=tk.W)
+            self.table.column(col, anchor=tk.W, width=120)
+        for row in result["linhas"]:
+            self.table.insert("", tk.END, values=[
+                round(value, 4) if isinstance(value, float) else ("" if value is None else value)
+                for value in row
+            ])
+        self.status_label.configure(
+            text=f"{len(result['linhas'])} linhas | {result['motor']} | {result['duracao']:.3f}s"
+        )
 
+    def show_summary_error(self, generation, error):
+        """
+        Informa uma falha na consulta (na thread da GUI).
+        """
+        if generation != self.query_generation or not self.winfo_exists():
+            return
+        self.status_label.configure(text="")
+        messagebox.showerror("Erro nos Resumos", f"Não foi possível calcular o resumo: {error}", parent=self)
+
+class ExportOptionsDialog(customtkinter.CTkToplevel):
+    """
+    Janela de filtros da exportação de resultados.
+    Após o fechamento, 'filters' contém os filtros escolhidos (ou None se cancelada).
+    """
+    ALL_SCENARIOS = "Todos"
+
+    def __init__(self, master, title, scenario_names):
+        super().__init__(master)
+        self.title(title)
+        self.resizable(False, False)
+        self.transient(master)
+        self.filters = None
+
+        customtkinter.CTkLabel(self, text="Cenário:").grid(row=0, column=0, padx=10, pady=(15, 5), sticky="w")
+        self.scenario_combobox = customtkinter.CTkComboBox(self, values=[self.ALL_SCENARIOS] + scenario_names, width=220)
+        self.scenario_combobox.set(self.ALL_SCENARIOS)
+        self.scenario_combobox.grid(row=0, column=1, padx=10, pady=(15, 5), sticky="ew")
+
+        customtkinter.CTkLabel(self, text="Executados a partir de:").grid(row=1, column=0, padx=10, pady=5, sticky="w")
+        self.start_entry = customtkinter.CTkEntry(self, placeholder_text="AAAA-MM-DD")
+        self.start_entry.grid(row=1, column=1, padx=10, pady=5, sticky="ew")
+
+        customtkinter.CTkLabel(self, text="Executados até:").grid(row=2, column=0, padx=10, pady=5, sticky="w")
+        self.end_entry = customtkinter.CTkEntry(self, placeholder_text="AAAA-MM-DD")
+        self.end_entry.grid(row=2, column=1, padx=10, pady=5, sticky="ew")
+
+        self.latest_only_var = tk.BooleanVar(value=False)
+        customtkinter.CTkCheckBox(
+            self, text="Apenas a última execução de cada cenário", variable=self.latest_only_var
+        ).grid(row=3, column=0, columnspan=2, padx=10, pady=10, sticky="w")
+
+        buttons_frame = customtkinter.CTkFrame(self, fg_color="transparent")
+        buttons_frame.grid(row=4, column=0, columnspan=2, padx=10, pady=(5, 15), sticky="e")
+        customtkinter.CTkButton(buttons_frame, text="Cancelar", width=100, command=self.destroy).pack(side="left", padx=(0, 10))
+        customtkinter.CTkButton(buttons_frame, text="Exportar", width=100, command=self.confirm).pack(side="left")
+
+        self.after(100, self.grab_set)
+
+    def confirm(self):
+        """
+        Valida os filtros e fecha a janela.
+        """
+        dates = {}
+        for key, entry in (("start_date", self.start_entry), ("end_date", self.end_entry)):
+            value = entry.get().strip()
+            if value:
+                try:
+                    dates[key] = datetime.strptime(value, "%Y-%m-%d").date()
+                except ValueError:
+                    messagebox.showerror("Data Inválida", f"Data inválida: '{value}'. Use o formato AAAA-MM-DD.", parent=self)
+                    return
+
+        scenario = self.scenario_combobox.get()
+        self.filters = {
+            "scenarios": [scenario] if scenario and scenario != self.ALL_SCENARIOS else None,
+            "latest_only": self.latest_only_var.get(),
+            **dates
+        }
+        self.destroy()
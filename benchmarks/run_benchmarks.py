@@ -0,0 +1,328 @@
+"""
+Suíte de benchmarks do pipeline de previsão, de ponta a ponta.
+
+Gera séries sintéticas (ver create_dummy_db.py) em um diretório temporário e mede a
+consolidação, load_historical_data, o ajuste e a previsão de cada modelo, process_results,
+insert_many, insert_forecasts e um lote completo equivalente ao "Executar Todos os Cenários"
+da GUI (consolidação, leitura do YAML e run_scenarios). Os tempos são gravados em JSON; com
+--compare, cada medida é comparada com a de um arquivo anterior, para evidenciar regressões
+entre versões.
+
+Exemplos:
+    python benchmarks/run_benchmarks.py --output base.json
+    python benchmarks/run_benchmarks.py --series 2000 --points 1500 --models RandomForest
+    python benchmarks/run_benchmarks.py --compare base.json --threshold 1.2
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Os módulos do projeto são importados pelo nome de topo (methods, modules, ...)
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from create_dummy_db import FREQUENCIAS, RUIDOS, create_synthetic_data_db
+from methods._run_batch import run_scenarios, summarize_results
+from modules.data_loader import consolidate_series, load_historical_data
+from modules.forecasting_model import GLOBAL_MODELS, forecast_factory
+from modules.results_processor import RESULT_COLUMNS, build_forecast_batch, process_results
+from modules.scenario_loader import load_scenarios
+from modules.series_cache import SeriesCache, get_series_cache
+from persistence.sqlite_adapter import SqliteAdapter
+
+# Configura o logger para este módulo
+logger = logging.getLogger("benchmarks")
+
+# Parâmetros usados nos benchmarks de cada modelo
+MODEL_PARAMS = {
+    "ARIMA": {"p": 1, "d": 1, "q": 1},
+    "Prophet": {},
+    "RandomForest": {"n_lags": 7, "n_estimators": 100},
+    "RandomForestGlobal": {"n_lags": 7, "n_estimators": 100},
+}
+
+# Diretório padrão dos arquivos de resultado
+RESULTS_DIR = Path(__file__).resolve().parent / "resultados"
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Cria o parser de argumentos da suíte.
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline de previsão, com resultados em JSON.")
+    parser.add_argument("--series", type=int, default=50, help="Quantidade de séries sintéticas (padrão: 50).")
+    parser.add_argument("--points", type=int, default=500, help="Pontos por série (padrão: 500).")
+    parser.add_argument("--frequency", action="append", choices=list(FREQUENCIAS),
+                        help="Frequência das séries; repita para alternar (padrão: diaria).")
+    parser.add_argument("--noise", action="append", choices=list(RUIDOS),
+                        help="Padrão de ruído; repita para alternar (padrão: todos).")
+    parser.add_argument("--seed", type=int, default=42, help="Semente dos dados (padrão: 42).")
+    parser.add_argument("--horizon", type=int, default=12, help="Horizonte das previsões (padrão: 12).")
+    parser.add_argument("--models", nargs="+", default=list(MODEL_PARAMS), choices=list(MODEL_PARAMS),
+                        help="Modelos medidos (padrão: todos).")
+    parser.add_argument("--sample", type=int, default=20,
+                        help="Séries usadas nos benchmarks de leitura e do modelo global (padrão: 20).")
+    parser.add_argument("--batch-scenarios", type=int, default=20,
+                        help="Cenários do lote completo, alternando entre os modelos (padrão: 20).")
+    parser.add_argument("--workers", type=int, help="Processos do lote completo (padrão: um por núcleo).")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições de cada medida (padrão: 3).")
+    parser.add_argument("--output", type=Path, help="Arquivo JSON de saída (padrão: benchmarks/resultados/).")
+    parser.add_argument("--compare", type=Path, help="Resultado anterior para comparação.")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Razão de tempo (atual/anterior) a partir da qual uma medida é regressão (padrão: 1.25).")
+    parser.add_argument("--data-dir", type=Path,
+                        help="Diretório dos bancos gerados (padrão: temporário, removido ao final).")
+    parser.add_argument("--log-level", default="WARNING", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Nível de log do pipeline (padrão: WARNING).")
+    return parser
+
+def measure(func, repeticoes: int) -> dict:
+    """
+    Executa 'func' várias vezes e resume os tempos.
+
+    Returns:
+        dict: {"media", "min", "max", "repeticoes"} (segundos) e, em "info", o retorno da última execução.
+    """
+    tempos = []
+    info = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        info = func()
+        tempos.append(time.perf_counter() - inicio)
+    resultado = {
+        "media": round(float(np.mean(tempos)), 6),
+        "min": round(min(tempos), 6),
+        "max": round(max(tempos), 6),
+        "repeticoes": repeticoes
+    }
+    if info is not None:
+        resultado["info"] = info
+    return resultado
+
+def run_benchmarks(args, data_dir: Path) -> dict:
+    """
+    Executa todos os benchmarks e retorna {nome: medida}. Uma medida que falha fica com a chave "erro".
+    """
+    resultados = {}
+    frequencias = args.frequency or ["diaria"]
+    ruidos = args.noise or list(RUIDOS)
+    data_db = data_dir / "dados.db"
+    results_db = data_dir / "previsoes.db"
+
+    def run(nome, func, repeticoes=args.repeat):
+        logger.warning(f"Benchmark: {nome}")
+        try:
+            resultados[nome] = measure(func, repeticoes)
+        except Exception as e:
+            logger.error(f"Benchmark {nome} falhou: {e}")
+            resultados[nome] = {"erro": str(e)}
+
+    # 1. Geração dos dados e consolidação (tabelas por série -> series_consolidada)
+    run("geracao", lambda: {"registros": create_synthetic_data_db(
+        data_db, args.series, args.points, frequencias, ruidos, args.seed, tabelas=True)}, 1)
+    run("consolidacao", lambda: {"mensagem": consolidate_series(data_db)[1]}, 1)
+    run("consolidacao_sem_alteracoes", lambda: {"mensagem": consolidate_series(data_db)[1]})
+
+    serie_ids = [f"SINT_{i:0{len(str(args.series))}d}" for i in range(args.series)]
+    amostra = serie_ids[:max(1, min(args.sample, args.series))]
+
+    # 2. Leitura das séries (sem o cache de séries)
+    run("load_historical_data", lambda: {"series": len(amostra), "registros": sum(
+        len(load_historical_data(serie_id, data_db)) for serie_id in amostra)})
+    historico = load_historical_data(amostra[0], data_db)
+
+    def series_cache():
+        cache = SeriesCache()
+        cache.get(amostra[0], data_db)
+        cache.get(amostra[0], data_db)
+        stats = cache.stats()
+        if stats["acertos"] != 1:
+            raise ValueError(f"A segunda leitura da série não veio do cache de séries: {stats}")
+        return stats
+    run("cache_series", series_cache)
+
+    # 3. Ajuste e previsão de cada modelo (o global, sobre as séries da amostra)
+    forecasts = {}
+    for modelo in args.models:
+        model = forecast_factory(modelo)
+        params = MODEL_PARAMS[modelo]
+        if modelo in GLOBAL_MODELS:
+            series = {serie_id: load_historical_data(serie_id, data_db) for serie_id in amostra}
+
+            def fit_predict(model=model, params=params, series=series):
+                model.predict_many(series, {serie_id: args.horizon for serie_id in series}, **params)
+                return {"series": len(series)}
+        else:
+            def fit_predict(model=model, params=params, modelo=modelo):
+                forecasts[modelo] = model.predict(historico, args.horizon, **params)
+                return {"pontos_treino": len(historico)}
+        run(f"modelo.{modelo}", fit_predict)
+
+    # 4. Processamento e gravação dos resultados de 'batch_scenarios' cenários
+    if forecasts:
+        forecast_df = next(iter(forecasts.values()))
+    else:
+        datas = pd.date_range(historico["data"].iloc[-1], periods=args.horizon + 1, freq="D")[1:]
+        forecast_df = pd.DataFrame({"data_previsao": datas, "valor_previsto": 1.0, "limite_inferior": 0.0, "limite_superior": 2.0})
+    cenarios = [
+        {"nome_cenario": f"BENCH_{i}", "serie_id": amostra[i % len(amostra)], "modelo": "RandomForest",
+         "horizonte_previsao": args.horizon, "parametros": MODEL_PARAMS["RandomForest"]}
+        for i in range(args.batch_scenarios)
+    ]
+    metrics = {"rmse": 1.0, "mae": 1.0, "mape": 1.0}
+    registros = []
+
+    def process():
+        registros[:] = [
+            record for cenario in cenarios
+            for record in process_results(cenario, forecast_df, metrics, "diário")
+        ]
+        return {"registros": len(registros)}
+    run("process_results", process)
+
+    def insert_many():
+        if not registros:
+            # Sem isso, a medida seria a de uma inserção vazia
+            raise ValueError("Nenhum registro para inserir (process_results falhou).")
+        with SqliteAdapter(str(data_dir / "insert_many.db"), persistent=False, tune_storage=True) as adapter:
+            adapter.execute("DROP TABLE IF EXISTS resultados_benchmark")
+            adapter.execute(f"CREATE TABLE resultados_benchmark ({', '.join(RESULT_COLUMNS)})")
+            adapter.insert_many("resultados_benchmark", registros)
+        return {"registros": len(registros)}
+    run("insert_many", insert_many)
+
+    def insert_forecasts():
+        path = data_dir / "insert_forecasts.db"
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+        with SqliteAdapter(str(path), persistent=False, tune_storage=True) as adapter:
+            adapter.create_schema_if_not_exists()
+            adapter.insert_forecasts(build_forecast_batch((cenario, forecast_df, metrics, "diário") for cenario in cenarios))
+        return {"execucoes": len(cenarios)}
+    run("insert_forecasts", insert_forecasts)
+
+    # 5. Lote completo: consolidação, leitura do YAML e run_scenarios, com o cache de séries vazio
+    config_path = data_dir / "scenarios_config.yaml"
+    modelos_lote = [m for m in args.models if "erro" not in resultados.get(f"modelo.{m}", {})] or ["RandomForest"]
+    lote = [
+        {"nome_cenario": f"LOTE_{i}", "serie_id": serie_ids[i % len(serie_ids)], "modelo": modelos_lote[i % len(modelos_lote)],
+         "horizonte_previsao": args.horizon, "parametros": MODEL_PARAMS[modelos_lote[i % len(modelos_lote)]]}
+        for i in range(args.batch_scenarios)
+    ]
+    with open(config_path, "w", encoding="utf-8") as file:
+        yaml.safe_dump({"cenarios": lote}, file, allow_unicode=True)
+
+    def batch():
+        get_series_cache().clear()
+        consolidate_series(data_db)
+        results = run_scenarios(load_scenarios(config_path), data_db, results_db, max_workers=args.workers)
+        return {"cenarios": len(results), "modelos": modelos_lote, **summarize_results(results)}
+    run("lote_completo", batch, 1)
+    return resultados
+
+def compare_results(atual: dict, anterior: dict, limiar: float) -> list:
+    """
+    Compara os tempos médios de duas execuções da suíte.
+
+    Args:
+        atual (dict): Resultado atual (chave "resultados").
+        anterior (dict): Resultado anterior, no mesmo formato.
+        limiar (float): Razão atual/anterior a partir da qual a medida é considerada regressão.
+
+    Returns:
+        list: Dicionários {"benchmark", "anterior", "atual", "razao", "regressao"}, para as medidas presentes nos dois.
+    """
+    comparacao = []
+    for nome, medida in atual["resultados"].items():
+        antes = anterior.get("resultados", {}).get(nome, {})
+        if "media" not in medida or not antes.get("media"):
+            continue
+        razao = medida["media"] / antes["media"]
+        comparacao.append({
+            "benchmark": nome,
+            "anterior": antes["media"],
+            "atual": medida["media"],
+            "razao": round(razao, 3),
+            "regressao": razao >= limiar
+        })
+    return comparacao
+
+def _git_version():
+    """
+    Commit atual do projeto, se disponível.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def main(argv=None) -> int:
+    """
+    Ponto de entrada da suíte. Retorna 1 se --compare encontrar regressões.
+    """
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level), format="%(asctime)s - %(levelname)s - %(message)s")
+
+    inicio = datetime.now()
+    if args.data_dir:
+        args.data_dir.mkdir(parents=True, exist_ok=True)
+        resultados = run_benchmarks(args, args.data_dir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="benchmarks_") as tmp:
+            resultados = run_benchmarks(args, Path(tmp))
+
+    report = {
+        "versao": _git_version(),
+        "data": inicio.isoformat(),
+        "ambiente": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__
+        },
+        "config": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "resultados": resultados
+    }
+
+    output = args.output or RESULTS_DIR / f"benchmark_{inicio:%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+    print(f"{'benchmark':<32} {'media (s)':>12} {'min (s)':>12}")
+    for nome, medida in resultados.items():
+        if "erro" in medida:
+            print(f"{nome:<32} {'erro: ' + medida['erro'][:60]}")
+        else:
+            print(f"{nome:<32} {medida['media']:>12.4f} {medida['min']:>12.4f}")
+    print(f"Resultados gravados em {output}")
+
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding="utf-8") as file:
+        anterior = json.load(file)
+    comparacao = compare_results(report, anterior, args.threshold)
+    print(f"\nComparação com {args.compare} (versão {anterior.get('versao')}):")
+    for item in comparacao:
+        marca = "  REGRESSÃO" if item["regressao"] else ""
+        print(f"{item['benchmark']:<32} {item['anterior']:>10.4f} -> {item['atual']:>10.4f}  x{item['razao']:.2f}{marca}")
+    return 1 if any(item["regressao"] for item in comparacao) else 0
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
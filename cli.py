@@ -0,0 +1,516 @@
+"""
+Execução em lote sem interface gráfica.
+
+Roda o mesmo pipeline da GUI (consolidação, previsão e gravação dos resultados)
+sem importar tkinter, customtkinter ou matplotlib, para uso em servidores sem
+display e agendadores como o cron.
+
+Exemplos:
+    python cli.py run --workers 8 --summary resumo.json
+    python cli.py run --scenario PrevisaoTR --scenario Ptax-Dolar
+    python cli.py backtest --folds 8 --window deslizante --window-size 720 --summary backtest.json
+    python cli.py prune --keep-last 20 --max-age-days 180
+    python cli.py export resultados.parquet --latest-only
+    python cli.py summary ranking_modelos --last 10
+    python cli.py summary etapas_mais_lentas
+    python cli.py convert-series series_parquet && python cli.py run --data-db series_parquet
+    python -m processador_cenarios list
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import signal
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from utils.get_base_path import get_config_path, get_database_path
+
+# Configura o logger para este módulo
+logger = logging.getLogger("processador_cenarios")
+
+# Formatos do comando export, por extensão de arquivo
+EXPORT_FORMATS = {
+    "csv": (".csv",),
+    "excel": (".xlsx",),
+    "parquet": (".parquet", ".pq"),
+}
+
+# Códigos de saída
+EXIT_OK = 0
+EXIT_SCENARIO_ERRORS = 1
+EXIT_CONFIG_ERROR = 2
+EXIT_CANCELLED = 130
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Cria o parser de argumentos da linha de comando.
+    """
+    parser = argparse.ArgumentParser(
+        prog="processador_cenarios",
+        description="Processador de Cenários de Previsão (modo sem interface gráfica)."
+    )
+    parser.add_argument(
+        "--log-level", default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Nível de log escrito em stderr (padrão: INFO)."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config", type=Path, default=None,
+                        help="Arquivo YAML de cenários (padrão: scenarios_config.yaml).")
+    common.add_argument("--scenario", action="append", default=[], metavar="NOME",
+                        help="Seleciona um cenário pelo nome (pode ser repetido).")
+    common.add_argument("--serie", action="append", default=[], metavar="SERIE_ID",
+                        help="Seleciona os cenários de uma série (pode ser repetido).")
+    common.add_argument("--model", action="append", default=[], metavar="MODELO",
+                        help="Seleciona os cenários de um modelo (pode ser repetido).")
+
+    run_parser = subparsers.add_parser("run", parents=[common], help="Executa os cenários selecionados.")
+    run_parser.add_argument("--data-db", type=Path, default=None,
+                            help="Banco de dados históricos ou diretório do armazenamento colunar "
+                                 "de séries (padrão: dados_bcb.db).")
+    run_parser.add_argument("--results-db", type=Path, default=None,
+                            help="Banco de dados de resultados (padrão: previsoes.db).")
+    run_parser.add_argument("--workers", type=int, default=None,
+                            help="Número de processos (padrão: um por núcleo).")
+    run_parser.add_argument("--summary", default=None, metavar="ARQUIVO",
+                            help="Grava o resumo da execução em JSON ('-' para stdout).")
+    run_parser.add_argument("--evaluation-mode", choices=["reajustar", "estender"], default=None,
+                            help="Modo de avaliação aplicado aos cenários que não definem 'modo_avaliacao'.")
+    run_parser.add_argument("--skip-consolidation", action="store_true",
+                            help="Não consolida as tabelas de séries antes da execução.")
+    run_parser.add_argument("--profile-memory", action="store_true",
+                            help="Mede também o pico de memória de cada etapa (tabela 'tempos_etapas'); "
+                                 "deixa a execução bem mais lenta.")
+
+    backtest_parser = subparsers.add_parser(
+        "backtest", parents=[common], help="Avalia os cenários selecionados com backtesting de origem móvel."
+    )
+    backtest_parser.add_argument("--data-db", type=Path, default=None,
+                                 help="Banco de dados históricos ou diretório do armazenamento colunar "
+                                      "de séries (padrão: dados_bcb.db).")
+    backtest_parser.add_argument("--results-db", type=Path, default=None,
+                                 help="Banco de dados de resultados (padrão: previsoes.db).")
+    backtest_parser.add_argument("--workers", type=int, default=None,
+                                 help="Número de processos (padrão: um por núcleo).")
+    backtest_parser.add_argument("--folds", type=int, default=None, metavar="N",
+                                 help="Dobras por cenário (sobrepõe 'backtest.dobras'; padrão: 5).")
+    backtest_parser.add_argument("--step", type=int, default=None, metavar="N",
+                                 help="Pontos entre origens consecutivas (sobrepõe 'backtest.passo'; padrão: o horizonte).")
+    backtest_parser.add_argument("--window", choices=["expansiva", "deslizante"], default=None,
+                                 help="Janela de treino (sobrepõe 'backtest.janela'; padrão: expansiva).")
+    backtest_parser.add_argument("--window-size", type=int, default=None, metavar="N",
+                                 help="Pontos de treino da janela deslizante (sobrepõe 'backtest.tamanho_janela').")
+    backtest_parser.add_argument("--evaluation-mode", choices=["reajustar", "estender"], default=None,
+                                 help="Modo aplicado aos cenários que não definem 'modo_avaliacao' "
+                                      "(padrão: reajustar; estender reaproveita o ajuste entre dobras).")
+    backtest_parser.add_argument("--summary", default=None, metavar="ARQUIVO",
+                                 help="Grava o resumo do backtest em JSON ('-' para stdout).")
+
+    subparsers.add_parser("list", parents=[common], help="Lista os cenários selecionados.")
+
+    prune_parser = subparsers.add_parser(
+        "prune", help="Remove execuções antigas do banco de resultados (política de retenção)."
+    )
+    prune_parser.add_argument("--config", type=Path, default=None,
+                              help="Arquivo YAML com a chave 'retencao' (padrão: scenarios_config.yaml).")
+    prune_parser.add_argument("--results-db", type=Path, default=None,
+                              help="Banco de dados de resultados (padrão: previsoes.db).")
+    prune_parser.add_argument("--keep-last", type=int, default=None, metavar="N",
+                              help="Mantém as N execuções mais recentes de cada cenário (sobrepõe 'retencao.manter_ultimas').")
+    prune_parser.add_argument("--max-age-days", type=int, default=None, metavar="DIAS",
+                              help="Remove execuções com mais de DIAS dias (sobrepõe 'retencao.max_dias').")
+    prune_parser.add_argument("--batch-size", type=int, default=None,
+                              help="Execuções removidas por transação.")
+    prune_parser.add_argument("--no-vacuum", action="store_true",
+                              help="Não compacta o arquivo após a remoção.")
+    prune_parser.add_argument("--dry-run", action="store_true",
+                              help="Apenas informa o que seria removido.")
+
+    convert_parser = subparsers.add_parser(
+        "convert-series", help="Converte as séries do banco SQLite para o armazenamento colunar (Parquet)."
+    )
+    convert_parser.add_argument("output", type=Path, help="Diretório do armazenamento colunar.")
+    convert_parser.add_argument("--data-db", type=Path, default=None,
+                                help="Banco de dados históricos (padrão: dados_bcb.db).")
+    convert_parser.add_argument("--serie", action="append", default=[], metavar="SERIE_ID",
+                                help="Converte apenas esta série (pode ser repetido).")
+
+    export_parser = subparsers.add_parser("export", help="Exporta os resultados em fluxo (CSV, Excel ou Parquet).")
+    export_parser.add_argument("output", type=Path, help="Arquivo de saída.")
+    export_parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default=None,
+                               help="Formato do arquivo (padrão: deduzido da extensão da saída).")
+    export_parser.add_argument("--results-db", type=Path, default=None,
+                               help="Banco de dados de resultados (padrão: previsoes.db).")
+    export_parser.add_argument("--scenario", action="append", default=[], metavar="NOME",
+                               help="Exporta apenas este cenário (pode ser repetido).")
+    export_parser.add_argument("--since", type=date.fromisoformat, default=None, metavar="AAAA-MM-DD",
+                               help="Exporta apenas execuções a partir desta data.")
+    export_parser.add_argument("--until", type=date.fromisoformat, default=None, metavar="AAAA-MM-DD",
+                               help="Exporta apenas execuções até esta data (inclusive).")
+    export_parser.add_argument("--latest-only", action="store_true",
+                               help="Exporta apenas a execução mais recente de cada cenário.")
+
+    summary_parser = subparsers.add_parser(
+        "summary", help="Calcula um resumo analítico dos resultados (ranking de modelos, resumo por cenário...)."
+    )
+    summary_parser.add_argument("query", help="Consulta: ranking_modelos, resumo_cenarios, evolucao_mensal, "
+                                              "cenarios_mais_lentos ou etapas_mais_lentas.")
+    summary_parser.add_argument("--last", type=int, default=None, metavar="N",
+                                help="Parâmetro da consulta (últimas N execuções ou últimos N meses).")
+    summary_parser.add_argument("--engine", choices=("auto", "duckdb", "sqlite"), default="auto",
+                                help="Motor de consulta (padrão: DuckDB se instalado, senão SQLite).")
+    summary_parser.add_argument("--source", type=Path, default=None,
+                                help="Banco de resultados ou exportação Parquet (padrão: previsoes.db).")
+
+    return parser
+
+def select_scenarios(scenarios: list, names: list = None, series: list = None, models: list = None) -> list:
+    """
+    Filtra os cenários por nome, série e modelo. Filtros vazios não restringem a seleção.
+
+    Args:
+        scenarios (list): Lista de cenários carregados do YAML.
+        names (list, optional): Nomes de cenário aceitos.
+        series (list, optional): IDs de série aceitos.
+        models (list, optional): Modelos aceitos.
+
+    Returns:
+        list: Cenários que atendem a todos os filtros informados.
+
+    Raises:
+        ValueError: Se algum nome de cenário informado não existir na configuração.
+    """
+    if names:
+        known = {s.get("nome_cenario") for s in scenarios}
+        missing = [n for n in names if n not in known]
+        if missing:
+            raise ValueError(f"Cenários não encontrados na configuração: {missing}")
+
+    return [
+        s for s in scenarios
+        if (not names or s.get("nome_cenario") in names)
+        and (not series or s.get("serie_id") in series)
+        and (not models or s.get("modelo") in models)
+    ]
+
+def _load_selected_scenarios(args) -> list:
+    """
+    Carrega o YAML indicado e aplica os filtros da linha de comando.
+    """
+    from modules.scenario_loader import load_scenarios
+
+    config_path = args.config or get_config_path("scenarios_config.yaml")
+    scenarios = load_scenarios(config_path)
+    return select_scenarios(scenarios, args.scenario, args.serie, args.model)
+
+def command_list(args) -> int:
+    """
+    Imprime os cenários selecionados, um por linha, em JSON.
+    """
+    for cenario in _load_selected_scenarios(args):
+        print(json.dumps(cenario, ensure_ascii=False))
+    return EXIT_OK
+
+def command_run(args) -> int:
+    """
+    Executa os cenários selecionados e, opcionalmente, grava o resumo em JSON.
+    """
+    from methods._run_batch import log_slowest_scenarios, run_scenarios, summarize_results
+    from modules.data_loader import consolidate_series
+    from utils.run_control import CancelToken
+
+    data_db_path = args.data_db or Path(get_database_path("dados_bcb.db"))
+    results_db_path = args.results_db or Path(get_database_path("previsoes.db"))
+
+    scenarios = _load_selected_scenarios(args)
+    if not scenarios:
+        logger.warning("Nenhum cenário selecionado para execução.")
+    if args.evaluation_mode:
+        scenarios = [{"modo_avaliacao": args.evaluation_mode, **s} for s in scenarios]
+    if args.profile_memory:
+        scenarios = [{**s, "medir_memoria": True} for s in scenarios]
+
+    if not args.skip_consolidation:
+        status = consolidate_series(data_db_path)
+        if not status[0]:
+            logger.warning(status[1])
+
+    started_at = datetime.now()
+    inicio = time.perf_counter()
+    # Ctrl+C (ou SIGTERM do agendador) cancela a execução de forma cooperativa: os cenários
+    # em andamento param no próximo ponto de verificação e o resumo ainda é gravado
+    cancel_token = CancelToken()
+    previous_handlers = _install_cancel_handlers(cancel_token)
+    try:
+        results = run_scenarios(
+            scenarios, data_db_path, results_db_path,
+            max_workers=args.workers,
+            cancel_token=cancel_token,
+            on_event=_log_progress_event
+        )
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+    summary = summarize_results(results)
+    logger.info(f"Execução finalizada: {summary}")
+    log_slowest_scenarios(results)
+
+    if args.summary:
+        report = {
+            "inicio": started_at.isoformat(),
+            "duracao": round(time.perf_counter() - inicio, 3),
+            "data_db": str(data_db_path),
+            "results_db": str(results_db_path),
+            "workers": args.workers,
+            "resumo": summary,
+            "cenarios": results
+        }
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.summary == "-":
+            print(text)
+        else:
+            Path(args.summary).write_text(text + "\n", encoding="utf-8")
+
+    if summary["cancelado"]:
+        return EXIT_CANCELLED
+    return EXIT_SCENARIO_ERRORS if summary["erro"] else EXIT_OK
+
+def command_backtest(args) -> int:
+    """
+    Avalia os cenários selecionados com backtesting e, opcionalmente, grava o resumo em JSON.
+    """
+    from methods._run_backtest import run_backtests
+    from methods._run_batch import summarize_results
+    from utils.run_control import CancelToken
+
+    data_db_path = args.data_db or Path(get_database_path("dados_bcb.db"))
+    results_db_path = args.results_db or Path(get_database_path("previsoes.db"))
+
+    scenarios = _load_selected_scenarios(args)
+    if not scenarios:
+        logger.warning("Nenhum cenário selecionado para o backtest.")
+    if args.evaluation_mode:
+        scenarios = [{"modo_avaliacao": args.evaluation_mode, **s} for s in scenarios]
+    config = {
+        "dobras": args.folds,
+        "passo": args.step,
+        "janela": args.window,
+        "tamanho_janela": args.window_size
+    }
+
+    started_at = datetime.now()
+    inicio = time.perf_counter()
+    cancel_token = CancelToken()
+    previous_handlers = _install_cancel_handlers(cancel_token)
+    try:
+        results = run_backtests(
+            scenarios, data_db_path, results_db_path,
+            max_workers=args.workers,
+            config=config,
+            cancel_token=cancel_token,
+            on_event=_log_progress_event
+        )
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+    summary = summarize_results(results)
+    logger.info(f"Backtest finalizado: {summary}")
+
+    if args.summary:
+        report = {
+            "inicio": started_at.isoformat(),
+            "duracao": round(time.perf_counter() - inicio, 3),
+            "data_db": str(data_db_path),
+            "results_db": str(results_db_path),
+            "workers": args.workers,
+            "backtest": {key: value for key, value in config.items() if value is not None},
+            "resumo": summary,
+            "cenarios": results
+        }
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.summary == "-":
+            print(text)
+        else:
+            Path(args.summary).write_text(text + "\n", encoding="utf-8")
+
+    if summary["cancelado"]:
+        return EXIT_CANCELLED
+    return EXIT_SCENARIO_ERRORS if summary["erro"] else EXIT_OK
+
+def _install_cancel_handlers(cancel_token) -> dict:
+    """
+    Faz SIGINT e SIGTERM acionarem o token de cancelamento. Um segundo Ctrl+C interrompe
+    imediatamente (KeyboardInterrupt).
+
+    Returns:
+        dict: Tratadores anteriores, por sinal, para restauração.
+    """
+    def handle(signum, frame):
+        if cancel_token.cancelled and signum == signal.SIGINT:
+            raise KeyboardInterrupt
+        logger.warning("Cancelamento solicitado; aguardando os cenários em andamento pararem "
+                       "(Ctrl+C novamente para interromper imediatamente).")
+        cancel_token.cancel()
+
+    previous = {}
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            previous[signum] = signal.signal(signum, handle)
+        except (ValueError, OSError):
+            # Fora da thread principal (ou sinal indisponível na plataforma)
+            pass
+    return previous
+
+def _log_progress_event(event: dict) -> None:
+    """
+    Registra os eventos de progresso: a conclusão de cada cenário (com tempo decorrido e
+    estimativa restante) em INFO e as etapas em DEBUG.
+    """
+    from utils.run_control import ETAPA_CONCLUIDO, format_duration
+
+    progress = f"({event['concluidos']}/{event['total']}, decorrido {format_duration(event['decorrido'])}"
+    if event["eta"] is not None:
+        progress += f", restante ~{format_duration(event['eta'])}"
+    progress += ")"
+    if event["etapa"] == ETAPA_CONCLUIDO:
+        logger.info(f"Cenário '{event['cenario']}' finalizado [{event['status']}] {progress}")
+    else:
+        logger.debug(f"Cenário '{event['cenario']}': etapa {event['etapa']} {progress}")
+
+def command_prune(args) -> int:
+    """
+    Aplica a política de retenção ao banco de resultados e imprime o resumo em JSON.
+
+    Os limites da linha de comando têm precedência sobre a chave 'retencao' do YAML.
+    """
+    from modules.results_retention import DEFAULT_BATCH_SIZE, prune_results, retention_policy_from_config
+    from modules.scenario_loader import load_retention_config
+
+    results_db_path = args.results_db or Path(get_database_path("previsoes.db"))
+
+    config_path = args.config or get_config_path("scenarios_config.yaml")
+    try:
+        config = load_retention_config(config_path)
+    except FileNotFoundError:
+        if args.config:
+            raise
+        config = {}
+    policy = retention_policy_from_config({
+        **config,
+        **{k: v for k, v in (("manter_ultimas", args.keep_last), ("max_dias", args.max_age_days)) if v is not None}
+    })
+    if policy["manter_ultimas"] is None and policy["max_dias"] is None:
+        raise ValueError("Nenhuma política de retenção definida: use --keep-last/--max-age-days "
+                         "ou a chave 'retencao' do arquivo de configuração.")
+
+    summary = prune_results(
+        results_db_path,
+        keep_last=policy["manter_ultimas"],
+        max_age_days=policy["max_dias"],
+        batch_size=args.batch_size if args.batch_size is not None else DEFAULT_BATCH_SIZE,
+        vacuum=not args.no_vacuum,
+        dry_run=args.dry_run
+    )
+    print(json.dumps({"politica": policy, "simulacao": args.dry_run, **summary}, ensure_ascii=False, indent=2))
+    return EXIT_OK
+
+def command_convert_series(args) -> int:
+    """
+    Converte as séries de dados_bcb.db para o armazenamento colunar e imprime o resumo em JSON.
+    """
+    from modules.data_loader import convert_series_to_store
+
+    data_db_path = args.data_db or Path(get_database_path("dados_bcb.db"))
+    converted = convert_series_to_store(data_db_path, args.output, args.serie or None)
+    print(json.dumps({"armazenamento": str(args.output), "series": converted}, ensure_ascii=False, indent=2))
+    return EXIT_OK
+
+def command_export(args) -> int:
+    """
+    Exporta os resultados filtrados, lendo e gravando em blocos (memória constante).
+    """
+    from modules.data_exporter import stream_results_to_csv, stream_results_to_excel, stream_results_to_parquet
+
+    exporters = {
+        "csv": stream_results_to_csv,
+        "excel": stream_results_to_excel,
+        "parquet": stream_results_to_parquet
+    }
+    export_format = args.format or next(
+        (name for name, extensions in EXPORT_FORMATS.items() if args.output.suffix.lower() in extensions), None
+    )
+    if export_format is None:
+        raise ValueError(f"Não foi possível deduzir o formato de '{args.output}'; use --format.")
+
+    results_db_path = args.results_db or Path(get_database_path("previsoes.db"))
+    total = exporters[export_format](
+        results_db_path, args.output,
+        scenarios=args.scenario or None,
+        start_date=args.since,
+        end_date=args.until,
+        latest_only=args.latest_only
+    )
+    if total == 0:
+        logger.warning("Nenhum resultado encontrado para exportar.")
+    return EXIT_OK
+
+def command_summary(args) -> int:
+    """
+    Calcula um resumo analítico e imprime as linhas em JSON.
+    """
+    from modules.results_analytics import run_aggregate
+
+    source_path = args.source or Path(get_database_path("previsoes.db"))
+    result = run_aggregate(source_path, args.query, args.last, engine=args.engine)
+    print(json.dumps({
+        "titulo": result["titulo"],
+        "motor": result["motor"],
+        "duracao": result["duracao"],
+        "linhas": [dict(zip(result["colunas"], row)) for row in result["linhas"]]
+    }, ensure_ascii=False, indent=2, default=str))
+    return EXIT_OK
+
+def main(argv: list = None) -> int:
+    """
+    Ponto de entrada da linha de comando.
+
+    Returns:
+        int: Código de saída (0 sucesso, 1 cenários com erro, 2 erro de configuração).
+    """
+    args = build_parser().parse_args(argv)
+
+    # Logs vão para stderr para manter stdout livre para o resumo em JSON
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=getattr(logging, args.log_level),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    commands = {
+        "run": command_run,
+        "backtest": command_backtest,
+        "list": command_list,
+        "prune": command_prune,
+        "convert-series": command_convert_series,
+        "export": command_export,
+        "summary": command_summary
+    }
+    try:
+        return commands[args.command](args)
+    except (FileNotFoundError, ValueError, ImportError) as e:
+        logger.error(f"Erro de configuração: {e}")
+        return EXIT_CONFIG_ERROR
+    except sqlite3.Error as e:
+        logger.error(f"Erro no banco de dados: {e}")
+        return EXIT_CONFIG_ERROR
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,12 +1,11 @@
 import customtkinter
 import tkinter as tk
 from tkinter import messagebox, ttk, filedialog
-import yaml
 import json
 import logging
 from pathlib import Path
 
-from modules.scenario_loader import load_scenarios
+from modules.scenario_loader import load_scenarios, save_scenarios
 from modules.data_loader import consolidate_series, get_available_series, load_data_from_csv, load_data_from_excel
 from utils.get_base_path import get_config_path, get_database_path
 from utils.logger_config import setup_logger
@@ -173,8 +172,7 @@ class ConfigManagerFrame(customtkinter.CTkFrame):
                 self.scenarios = [s for s in self.scenarios if s["nome_cenario"] != scenario_name]
 
                 # Salva a lista atualizada de cenários no arquivo YAML
-                with open(self.config_file_path, "w", encoding="utf-8") as f:
-                    yaml.dump({"cenarios": self.scenarios}, f, allow_unicode=True, sort_keys=False)
+                save_scenarios(self.config_file_path, self.scenarios)
 
                 messagebox.showinfo("Sucesso", f"Cenário \'{scenario_name}\' removido com sucesso!")
                 logger.info(f"Cenário \'{scenario_name}\' removido.")
@@ -285,7 +283,7 @@ class ScenarioFormWindow(customtkinter.CTkToplevel):
 
         # Modelo
         customtkinter.CTkLabel(self, text="Modelo:").grid(row=row, column=0, padx=10, pady=5, sticky="w")
-        self.model_options = ["ARIMA", "Prophet", "RandomForest"]
+        self.model_options = ["ARIMA", "Prophet", "RandomForest", "RandomForestGlobal"]
         self.model_menu = customtkinter.CTkOptionMenu(self, values=self.model_options)
         self.model_menu.grid(row=row, column=1, padx=10, pady=5, sticky="ew")
         self.model_menu.set(self.model_options[0])
@@ -373,6 +371,10 @@ class ScenarioFormWindow(customtkinter.CTkToplevel):
             messagebox.showerror("Erro de Parâmetros", "Parâmetros do Modelo não são um JSON válido.")
             return
 
+        # Chaves não editadas pelo formulário (ex.: 'modo_avaliacao', 'backtest') são mantidas
+        for key, value in self.scenario_data.items():
+            new_scenario.setdefault(key, value)
+
         # Validação básica
         if not new_scenario["nome_cenario"] or not new_scenario["serie_id"]:
             messagebox.showerror("Erro de Validação", "Nome do Cenário e ID da Série são obrigatórios.")
@@ -402,8 +404,7 @@ class ScenarioFormWindow(customtkinter.CTkToplevel):
             all_scenarios.append(new_scenario)
 
         try:
-            with open(self.master_frame.config_file_path, "w", encoding="utf-8") as f:
-                yaml.dump({"cenarios": all_scenarios}, f, allow_unicode=True, sort_keys=False)
+            save_scenarios(self.master_frame.config_file_path, all_scenarios)
             messagebox.showinfo("Sucesso", "Cenário salvo com sucesso!")
             logger.info(f"Cenário \'{new_scenario["nome_cenario"]}\' salvo/atualizado.")
             self.destroy()
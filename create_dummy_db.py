@@ -1,8 +1,23 @@
+import argparse
 import sqlite3
+import numpy as np
 import pandas as pd
+from scipy.signal import lfilter
 from datetime import datetime, timedelta
 from pathlib import Path
 
+# Frequências do gerador sintético: nome -> (frequência do pandas, período sazonal)
+FREQUENCIAS = {
+    "diaria": ("D", 7),
+    "semanal": ("W", 52),
+    "mensal": ("MS", 12),
+    "trimestral": ("QS", 4),
+    "anual": ("YS", 1),
+}
+
+# Padrões de ruído do gerador sintético
+RUIDOS = ("gaussiano", "caudas_pesadas", "autocorrelacionado", "outliers")
+
 def create_dummy_data_db(db_path: Path):
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
@@ -49,9 +64,169 @@ def create_dummy_data_db(db_path: Path):
     conn.close()
     print(f"Banco de dados de dados históricos criado em {db_path} com dados de exemplo.")
 
+def generate_series_values(n_points: int, periodo: int, ruido: str, rng: np.random.Generator) -> np.ndarray:
+    """
+    Gera os valores de uma série sintética: nível, tendência, sazonalidade e ruído.
+
+    Args:
+        n_points (int): Quantidade de pontos.
+        periodo (int): Período sazonal (1 = sem sazonalidade).
+        ruido (str): Padrão de ruído (ver RUIDOS).
+        rng (np.random.Generator): Gerador de números aleatórios.
+
+    Returns:
+        np.ndarray: Valores da série.
+    """
+    t = np.arange(n_points)
+    nivel = rng.uniform(10, 1000)
+    escala = nivel * rng.uniform(0.01, 0.05)
+    valores = nivel + rng.normal(0, escala / 20) * t
+    if periodo > 1:
+        valores += escala * rng.uniform(1, 3) * np.sin(2 * np.pi * t / periodo + rng.uniform(0, 2 * np.pi))
+
+    if ruido == "gaussiano":
+        valores += rng.normal(0, escala, n_points)
+    elif ruido == "caudas_pesadas":
+        valores += escala * rng.standard_t(3, n_points)
+    elif ruido == "autocorrelacionado":
+        # Passeio aleatório amortecido (AR(1) com phi = 0.9)
+        valores += lfilter([1.0], [1.0, -0.9], rng.normal(0, escala, n_points))
+    elif ruido == "outliers":
+        valores += rng.normal(0, escala, n_points)
+        picos = rng.random(n_points) < 0.01
+        valores[picos] += escala * rng.choice([-10, 10], picos.sum())
+    else:
+        raise ValueError(f"Padrão de ruído '{ruido}' inválido. Use um de: {list(RUIDOS)}")
+    return valores
+
+def create_synthetic_data_db(
+    db_path: Path,
+    n_series: int,
+    n_points: int,
+    frequencias: list = ("diaria",),
+    ruidos: list = ("gaussiano",),
+    seed: int = 42,
+    tabelas: bool = False,
+    data_inicial: str = "2000-01-01"
+) -> int:
+    """
+    Cria um banco de dados de séries sintéticas em escala configurável.
+
+    As frequências e os padrões de ruído informados são alternados entre as séries
+    (série i usa frequencias[i % len] e ruidos[i % len]). As séries são gravadas em
+    'series_consolidada' ou, com tabelas=True, uma tabela (data, valor) por série, o
+    formato de origem lido por consolidate_series.
+
+    Args:
+        db_path (Path): Caminho do banco de dados (tabelas existentes de mesmo nome são recriadas).
+        n_series (int): Quantidade de séries.
+        n_points (int): Pontos por série.
+        frequencias (list): Frequências (ver FREQUENCIAS).
+        ruidos (list): Padrões de ruído (ver RUIDOS).
+        seed (int): Semente, para gerar sempre os mesmos dados.
+        tabelas (bool): Grava uma tabela por série em vez de 'series_consolidada'.
+        data_inicial (str): Data do primeiro ponto de cada série.
+
+    Returns:
+        int: Quantidade de registros gravados.
+
+    Raises:
+        ValueError: Se uma frequência ou ruído for inválido ou as datas excederem o limite do pandas.
+    """
+    for frequencia in frequencias:
+        if frequencia not in FREQUENCIAS:
+            raise ValueError(f"Frequência '{frequencia}' inválida. Use uma de: {list(FREQUENCIAS)}")
+    for ruido in ruidos:
+        if ruido not in RUIDOS:
+            raise ValueError(f"Padrão de ruído '{ruido}' inválido. Use um de: {list(RUIDOS)}")
+
+    # As datas de cada frequência são geradas uma única vez e reaproveitadas pelas séries
+    datas = {}
+    for frequencia in set(frequencias):
+        try:
+            datas[frequencia] = pd.date_range(data_inicial, periods=n_points, freq=FREQUENCIAS[frequencia][0]).strftime("%Y-%m-%d").tolist()
+        except (pd.errors.OutOfBoundsDatetime, OverflowError):
+            raise ValueError(f"{n_points} pontos com frequência {frequencia} a partir de {data_inicial} "
+                             f"ultrapassam a maior data suportada.")
+
+    rng = np.random.default_rng(seed)
+    largura = len(str(n_series))
+    total = 0
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA synchronous = OFF")
+        if not tabelas:
+            cursor.execute("DROP TABLE IF EXISTS series_consolidada")
+            cursor.execute("""
+                CREATE TABLE series_consolidada (
+                    serie_id TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    valor REAL NOT NULL,
+                    PRIMARY KEY (serie_id, data)
+                )
+            """)
+
+        for i in range(n_series):
+            frequencia = frequencias[i % len(frequencias)]
+            ruido = ruidos[i % len(ruidos)]
+            serie_id = f"SINT_{i:0{largura}d}"
+            valores = np.round(generate_series_values(n_points, FREQUENCIAS[frequencia][1], ruido, rng), 4).tolist()
+            if tabelas:
+                cursor.execute(f"DROP TABLE IF EXISTS {serie_id}")
+                cursor.execute(f"CREATE TABLE {serie_id} (data TEXT, valor REAL)")
+                cursor.executemany(f"INSERT INTO {serie_id} (data, valor) VALUES (?, ?)", zip(datas[frequencia], valores))
+            else:
+                cursor.executemany(
+                    "INSERT INTO series_consolidada (serie_id, data, valor) VALUES (?, ?, ?)",
+                    ((serie_id, data, valor) for data, valor in zip(datas[frequencia], valores))
+                )
+            total += n_points
+
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"Banco de dados sintético criado em {db_path}: {n_series} séries, {total} registros.")
+    return total
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Cria o parser de argumentos do gerador.
+    """
+    parser = argparse.ArgumentParser(
+        description="Cria o banco de dados de séries de exemplo. Sem --series, gera as três séries "
+                    "de exemplo em dados_bcb.db; com --series, gera séries sintéticas em escala."
+    )
+    parser.add_argument("--series", type=int, help="Quantidade de séries sintéticas.")
+    parser.add_argument("--points", type=int, default=1000, help="Pontos por série (padrão: 1000).")
+    parser.add_argument("--frequency", action="append", choices=list(FREQUENCIAS),
+                        help="Frequência das séries; repita para alternar entre várias (padrão: diaria).")
+    parser.add_argument("--noise", action="append", choices=list(RUIDOS),
+                        help="Padrão de ruído; repita para alternar entre vários (padrão: gaussiano).")
+    parser.add_argument("--seed", type=int, default=42, help="Semente dos dados (padrão: 42).")
+    parser.add_argument("--tables", action="store_true",
+                        help="Grava uma tabela por série (formato de origem da consolidação).")
+    parser.add_argument("--start-date", default="2000-01-01", help="Data do primeiro ponto (padrão: 2000-01-01).")
+    parser.add_argument("--output", type=Path,
+                        help="Banco de dados de saída (padrão: dados_bcb.db, ou dados_sinteticos.db com --series).")
+    return parser
+
 if __name__ == "__main__":
+    args = build_parser().parse_args()
     base_path = Path(__file__).parent
-    db_file = base_path / "dados_bcb.db"
-    create_dummy_data_db(db_file)
+    if args.series is None:
+        db_file = args.output or base_path / "dados_bcb.db"
+        create_dummy_data_db(db_file)
+    else:
+        create_synthetic_data_db(
+            args.output or base_path / "dados_sinteticos.db",
+            args.series,
+            args.points,
+            frequencias=args.frequency or ["diaria"],
+            ruidos=args.noise or ["gaussiano"],
+            seed=args.seed,
+            tabelas=args.tables,
+            data_inicial=args.start_date
+        )
 
 
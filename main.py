@@ -1,7 +1,13 @@
-import customtkinter
-from app_gui import App
+import multiprocessing
 
 if __name__ == "__main__":
+    # Necessário para o pool de processos no executável congelado (PyInstaller/Windows)
+    multiprocessing.freeze_support()
+
+    # Importados aqui para que os processos do pool não carreguem a GUI ao reimportar este módulo
+    import customtkinter
+    from app_gui import App
+
     # Configura o tema e a cor da CustomTkinter
     customtkinter.set_appearance_mode("System")  # Modes: "System" (default), "Dark", "Light"
     customtkinter.set_default_color_theme("green")  # Themes: "blue" (default), "dark-blue", "green"
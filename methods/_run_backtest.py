@@ -0,0 +1,329 @@
+import json
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from methods._run_batch import default_max_workers, preload_series, run_pool_tasks
+from methods._run_forecasting import MODO_ESTENDER, MODO_REAJUSTAR, MODOS_AVALIACAO
+from modules.forecasting_model import forecast_factory
+from modules.model_evaluator import (
+    JANELA_EXPANSIVA, aggregate_fold_metrics, build_backtest_folds, calculate_metrics
+)
+from modules.series_cache import get_series_cache
+from persistence.sqlite_adapter import SqliteAdapter
+from utils.run_control import (
+    CancelToken, ProgressTracker, RunCancelled, activate, check_cancelled, report_stage,
+    ETAPA_INICIO, ETAPA_AJUSTE, ETAPA_METRICAS, ETAPA_GRAVACAO
+)
+
+# Configura o logger para este módulo
+logger = logging.getLogger(__name__)
+
+# Configuração padrão do backtesting (chave "backtest" do cenário)
+DEFAULT_BACKTEST_CONFIG = {
+    "dobras": 5,             # Quantidade de origens avaliadas
+    "passo": None,           # Distância entre origens (padrão: o horizonte)
+    "janela": JANELA_EXPANSIVA,
+    "tamanho_janela": None,  # Pontos de treino da janela deslizante
+    "min_treino": 1,         # Dobras com menos pontos de treino são descartadas
+}
+
+def backtest_config(cenario: dict, overrides: dict = None) -> dict:
+    """
+    Combina a configuração padrão, a chave 'backtest' do cenário e as sobreposições informadas.
+
+    Args:
+        cenario (dict): Dicionário do cenário.
+        overrides (dict, optional): Valores que prevalecem sobre os do cenário (None é ignorado).
+
+    Returns:
+        dict: Configuração com as chaves de DEFAULT_BACKTEST_CONFIG.
+
+    Raises:
+        ValueError: Se a chave 'backtest' do cenário não for um dicionário ou tiver chaves desconhecidas.
+    """
+    scenario_config = cenario.get("backtest") or {}
+    if not isinstance(scenario_config, dict):
+        raise ValueError("A chave 'backtest' do cenário deve ser um dicionário.")
+    unknown = set(scenario_config) - set(DEFAULT_BACKTEST_CONFIG)
+    if unknown:
+        raise ValueError(f"Chaves desconhecidas em 'backtest': {sorted(unknown)}. "
+                         f"Disponíveis: {list(DEFAULT_BACKTEST_CONFIG)}")
+    config = {**DEFAULT_BACKTEST_CONFIG, **scenario_config}
+    config.update({key: value for key, value in (overrides or {}).items() if value is not None})
+    return config
+
+def run_backtests(
+    scenarios: list,
+    data_db_path: Path,
+    results_db_path: Path,
+    max_workers: int = None,
+    config: dict = None,
+    cancel_token: CancelToken = None,
+    on_event: Callable[[dict], None] = None
+) -> list:
+    """
+    Avalia os cenários com backtesting de origem móvel (janela expansiva ou deslizante).
+
+    Cada cenário é avaliado em várias dobras (ver build_backtest_folds) em vez de uma única
+    divisão treino/teste. As dobras são distribuídas em um pool de processos: modelos que
+    reaproveitam o ajuste entre dobras (ARIMA, com 'modo_avaliacao: estender') rodam todas as
+    dobras de um cenário em uma única tarefa; os demais, uma tarefa por dobra. O modo padrão é
+    "reajustar", como na execução normal, para que o backtest meça o mesmo que a produção.
+    As métricas de cada dobra (calculate_metrics) e as agregadas são gravadas nas tabelas
+    'backtest_dobras' e 'backtests' do banco de resultados, pelo processo principal.
+
+    O cancelamento segue run_scenarios: cenários cancelados não gravam nada.
+
+    Args:
+        scenarios (list): Lista de dicionários de cenário (ver load_scenarios).
+        data_db_path (Path): Caminho para o banco de dados de dados históricos.
+        results_db_path (Path): Caminho para o banco de dados de resultados.
+        max_workers (int, optional): Número de processos. Se None, usa um por núcleo.
+                                     Com 1, as dobras rodam sequencialmente no processo atual.
+        config (dict, optional): Configuração de backtest aplicada a todos os cenários, sobrepondo
+                                 a chave 'backtest' de cada um (ver DEFAULT_BACKTEST_CONFIG).
+        cancel_token (CancelToken, optional): Token para cancelar a execução a partir de outra thread.
+        on_event (Callable, optional): Recebe os eventos de progresso (ver ProgressTracker).
+
+    Returns:
+        list: Um resumo por cenário, na ordem de entrada, com as chaves de run_single_scenario
+              e "backtest_id", "dobras", "rmse", "mae", "mape" e "mape_desvio".
+    """
+    total = len(scenarios)
+    if total == 0:
+        logger.warning("Nenhum cenário para o backtest.")
+        return []
+
+    cancel_token = cancel_token or CancelToken()
+    tracker = ProgressTracker(total, on_event)
+    data_execucao = datetime.now()
+
+    with SqliteAdapter(str(results_db_path), tune_storage=True) as adapter:
+        adapter.create_backtest_schema_if_not_exists()
+
+    series = preload_series(scenarios, data_db_path)
+
+    # Planejamento no processo principal: dobras de cada cenário e tarefas do pool
+    results = [None] * total
+    states = {}
+    tasks, owners = [], []
+    for i, cenario in enumerate(scenarios):
+        nome_cenario = cenario.get("nome_cenario", "Cenário Desconhecido")
+        tracker.stage(ETAPA_INICIO, nome_cenario)
+        try:
+            plan = _plan_backtest(cenario, series.get(cenario.get("serie_id")), data_db_path, config)
+        except Exception as e:
+            logger.error(f"Erro ao planejar o backtest do cenário {nome_cenario}: {e}")
+            plan = {"status": "erro", "mensagem": str(e)}
+        if plan.get("status"):
+            results[i] = _resumo_backtest(nome_cenario, plan["status"], plan["mensagem"])
+            tracker.finish(nome_cenario, plan["status"])
+            continue
+
+        states[i] = {**plan, "resultados": [], "restantes": len(plan["tarefas"]), "duracao": 0.0,
+                     "erro": None, "cancelado": False}
+        for primeira_dobra, folds in plan["tarefas"]:
+            tasks.append((cenario, data_db_path, plan["historico"], folds, primeira_dobra, plan["reaproveitar"]))
+            owners.append(i)
+
+    if not tasks:
+        return results
+
+    def task_done(j, outcome, value):
+        i = owners[j]
+        state = states[i]
+        state["restantes"] -= 1
+        if outcome == "sucesso":
+            state["resultados"].extend(value["dobras"])
+            state["duracao"] += value["duracao"]
+        elif outcome == "cancelado":
+            state["cancelado"] = True
+        elif state["erro"] is None:
+            state["erro"] = value
+        if state["restantes"] == 0:
+            resumo = _finish_backtest(scenarios[i], state, results_db_path, data_execucao, cancel_token, tracker)
+            results[i] = resumo
+            tracker.finish(resumo["nome_cenario"], resumo["status"])
+
+    workers = max(1, min(max_workers or default_max_workers(), len(tasks)))
+    logger.info(f"Backtest de {len(states)} cenários em {len(tasks)} tarefas com {workers} processo(s).")
+
+    if workers == 1:
+        with activate(cancel_token, tracker.stage):
+            for j, args in enumerate(tasks):
+                if cancel_token.cancelled:
+                    task_done(j, "cancelado", None)
+                    continue
+                try:
+                    task_done(j, "sucesso", run_backtest_folds(*args))
+                except RunCancelled:
+                    task_done(j, "cancelado", None)
+                except Exception as e:
+                    logger.error(f"Erro no backtest do cenário {args[0].get('nome_cenario')}: {e}", exc_info=True)
+                    task_done(j, "erro", str(e))
+        return results
+
+    def on_done(j, future):
+        if future.cancelled():
+            task_done(j, "cancelado", None)
+            return
+        try:
+            task_done(j, "sucesso", future.result())
+        except RunCancelled:
+            task_done(j, "cancelado", None)
+        except Exception as e:
+            logger.error(f"Erro no backtest do cenário {tasks[j][0].get('nome_cenario')}: {e}")
+            task_done(j, "erro", str(e))
+
+    run_pool_tasks(run_backtest_folds, tasks, workers, tracker, cancel_token, on_done)
+    return results
+
+def run_backtest_folds(cenario: dict, data_db_path: Path, historical_data: pd.DataFrame, folds: list,
+                       primeira_dobra: int = 1, reuse: bool = True) -> dict:
+    """
+    Executa um conjunto de dobras de um cenário e calcula as métricas de cada uma.
+
+    Args:
+        cenario (dict): Dicionário do cenário.
+        data_db_path (Path): Banco de séries (usado se historical_data for None).
+        historical_data (pd.DataFrame): Série do cenário, com colunas 'data' e 'valor'.
+        folds (list): Tuplas (inicio_treino, fim_treino, fim_teste), ver build_backtest_folds.
+        primeira_dobra (int): Número da primeira dobra do conjunto (numeração a partir de 1).
+        reuse (bool): Permite ao modelo reaproveitar o ajuste entre as dobras.
+
+    Returns:
+        dict: {"dobras" (lista de dicionários com as colunas de 'backtest_dobras'), "duracao"}.
+
+    Raises:
+        RunCancelled: Se a execução ativa for cancelada.
+    """
+    inicio = time.perf_counter()
+    nome_cenario = cenario.get("nome_cenario", "Cenário Desconhecido")
+    horizonte = cenario.get("horizonte_previsao")
+    if historical_data is None:
+        historical_data = get_series_cache().get(cenario.get("serie_id"), data_db_path)
+
+    check_cancelled(ETAPA_AJUSTE)
+    report_stage(ETAPA_AJUSTE, nome_cenario)
+    model = forecast_factory(cenario.get("modelo"))
+    forecasts = model.backtest(historical_data, folds, horizonte, reuse=reuse, **cenario.get("parametros", {}))
+
+    check_cancelled(ETAPA_METRICAS)
+    report_stage(ETAPA_METRICAS, nome_cenario)
+    values = historical_data["valor"]
+    dates = pd.DatetimeIndex(historical_data["data"]).strftime("%Y-%m-%d")
+    resultados = []
+    for numero, ((inicio_treino, fim_treino, fim_teste), forecast_df) in enumerate(zip(folds, forecasts), start=primeira_dobra):
+        metrics = calculate_metrics(
+            values.iloc[fim_treino:fim_teste].reset_index(drop=True),
+            forecast_df["valor_previsto"].reset_index(drop=True)
+        )
+        resultados.append({
+            "dobra": numero,
+            "inicio_treino": dates[inicio_treino],
+            "fim_treino": dates[fim_treino - 1],
+            "fim_teste": dates[fim_teste - 1],
+            "pontos_treino": fim_treino - inicio_treino,
+            **metrics
+        })
+    logger.info(f"Backtest do cenário {nome_cenario}: {len(folds)} dobra(s) a partir da {primeira_dobra} concluídas.")
+    return {"dobras": resultados, "duracao": time.perf_counter() - inicio}
+
+def _plan_backtest(cenario: dict, historical_data: pd.DataFrame, data_db_path: Path, overrides: dict) -> dict:
+    """
+    Define as dobras do cenário e como elas são divididas em tarefas.
+
+    Returns:
+        dict: {"historico", "config", "dobras", "reaproveitar", "tarefas" (lista de
+              (primeira_dobra, dobras))} ou {"status", "mensagem"} se o cenário for ignorado.
+    """
+    nome_cenario = cenario.get("nome_cenario", "Cenário Desconhecido")
+    horizonte = cenario.get("horizonte_previsao")
+    modo_avaliacao = cenario.get("modo_avaliacao", MODO_REAJUSTAR)
+    if modo_avaliacao not in MODOS_AVALIACAO:
+        raise ValueError(f"Modo de avaliação '{modo_avaliacao}' inválido. Use um de: {list(MODOS_AVALIACAO)}")
+    config = backtest_config(cenario, overrides)
+    model = forecast_factory(cenario.get("modelo"))
+
+    if historical_data is None:
+        historical_data = get_series_cache().get(cenario.get("serie_id"), data_db_path)
+    if historical_data.empty or len(historical_data) < horizonte + config["min_treino"]:
+        mensagem = (f"Dados insuficientes para o backtest do cenário {nome_cenario}. "
+                    f"Mínimo de {horizonte + config['min_treino']} pontos necessários.")
+        logger.warning(mensagem)
+        return {"status": "ignorado", "mensagem": mensagem}
+
+    folds = build_backtest_folds(
+        len(historical_data), horizonte, config["dobras"], config["passo"],
+        config["janela"], config["tamanho_janela"], config["min_treino"]
+    )
+    reuse = modo_avaliacao == MODO_ESTENDER and model.reuses_fit
+    if reuse:
+        tarefas = [(1, folds)]
+    else:
+        tarefas = [(numero, [fold]) for numero, fold in enumerate(folds, start=1)]
+    return {"historico": historical_data, "config": config, "dobras": folds, "reaproveitar": reuse, "tarefas": tarefas}
+
+def _finish_backtest(cenario: dict, state: dict, results_db_path: Path, data_execucao: datetime,
+                     cancel_token: CancelToken, tracker: ProgressTracker) -> dict:
+    """
+    Consolida as dobras de um cenário e grava o backtest, se todas tiverem sido concluídas.
+    """
+    nome_cenario = cenario.get("nome_cenario", "Cenário Desconhecido")
+    duracao = round(state["duracao"], 3)
+    if state["erro"] is not None:
+        return _resumo_backtest(nome_cenario, "erro", state["erro"], duracao)
+    if state["cancelado"] or cancel_token.cancelled:
+        return _resumo_backtest(nome_cenario, "cancelado", "Backtest cancelado.", duracao)
+
+    folds = sorted(state["resultados"], key=lambda fold: fold["dobra"])
+    metrics = aggregate_fold_metrics(folds)
+    config = state["config"]
+    backtest = {
+        "nome_cenario": nome_cenario,
+        "serie_id": cenario.get("serie_id"),
+        "data_execucao": data_execucao.isoformat(),
+        "modelo_utilizado": cenario.get("modelo"),
+        "parametros_modelo": json.dumps(cenario.get("parametros", {})),
+        "horizonte": cenario.get("horizonte_previsao"),
+        "janela": config["janela"],
+        "passo": config["passo"] or cenario.get("horizonte_previsao"),
+        "dobras": len(folds),
+        **metrics,
+        "duracao": duracao
+    }
+    try:
+        tracker.stage(ETAPA_GRAVACAO, nome_cenario)
+        with SqliteAdapter(str(results_db_path), tune_storage=True) as adapter:
+            backtest_id = adapter.insert_backtest(backtest, folds)
+    except Exception as e:
+        logger.error(f"Erro ao gravar o backtest do cenário {nome_cenario}: {e}")
+        return _resumo_backtest(nome_cenario, "erro", str(e), duracao)
+
+    logger.info(f"Backtest do cenário {nome_cenario} concluído: {len(folds)} dobras, "
+                f"MAPE médio {metrics['mape']}, desvio {metrics['mape_desvio']}.")
+    return _resumo_backtest(nome_cenario, "sucesso", None, duracao, backtest_id, len(folds), metrics)
+
+def _resumo_backtest(nome_cenario: str, status: str, mensagem: str, duracao: float = None,
+                     backtest_id: int = None, dobras: int = None, metrics: dict = None) -> dict:
+    """
+    Monta o dicionário de resumo devolvido por run_backtests.
+    """
+    metrics = metrics or {}
+    return {
+        "nome_cenario": nome_cenario,
+        "status": status,
+        "mensagem": mensagem,
+        "duracao": duracao,
+        "backtest_id": backtest_id,
+        "dobras": dobras,
+        "rmse": metrics.get("rmse"),
+        "mae": metrics.get("mae"),
+        "mape": metrics.get("mape"),
+        "mape_desvio": metrics.get("mape_desvio")
+    }
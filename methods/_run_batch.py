@@ -0,0 +1,447 @@
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable
+
+from methods._run_forecasting import run_global_scenarios, run_single_scenario
+from modules.forecasting_model import GLOBAL_MODELS
+from modules.results_processor import build_timing_rows
+from modules.series_cache import get_series_cache
+from persistence.sqlite_adapter import SqliteAdapter
+from utils.run_control import CancelToken, ProgressTracker, activate
+from utils.stage_timer import ETAPA_TEMPO_CARREGAMENTO
+
+# Intervalo (s) com que o processo principal repassa um cancelamento aos processos do pool
+CANCEL_POLL_INTERVAL = 0.2
+
+# Configura o logger para este módulo
+logger = logging.getLogger(__name__)
+
+def default_max_workers() -> int:
+    """
+    Retorna o número padrão de processos do pool (um por núcleo disponível).
+    """
+    return os.cpu_count() or 1
+
+def run_scenarios(
+    scenarios: list,
+    data_db_path: Path,
+    results_db_path: Path,
+    max_workers: int = None,
+    on_progress: Callable[[int, int, dict], None] = None,
+    cancel_token: CancelToken = None,
+    on_event: Callable[[dict], None] = None
+) -> list:
+    """
+    Executa uma lista de cenários distribuindo-os em um pool de processos.
+
+    Cada cenário roda isolado: uma falha (inclusive a queda de um processo do pool)
+    é registrada no resumo daquele cenário e não interrompe os demais.
+
+    Cenários de modelos globais (ex.: RandomForestGlobal) com os mesmos parâmetros são
+    executados juntos, com um único ajuste para todas as suas séries (ver run_global_scenarios).
+
+    Cenários com a chave 'busca_parametros' passam antes por uma busca de parâmetros
+    (ver tune_scenarios); o vencedor é usado na execução e gravado em 'parametros_modelo',
+    e o resumo do cenário recebe a chave "busca".
+
+    O cancelamento é cooperativo: ao acionar cancel_token, os cenários ainda não iniciados
+    não são executados e os em andamento param no próximo ponto de verificação (entre as
+    etapas ou dentro de laços longos), sem gravar resultados; todos ficam com status "cancelado".
+
+    Args:
+        scenarios (list): Lista de dicionários de cenário (ver load_scenarios).
+        data_db_path (Path): Caminho para o banco de dados de dados históricos.
+        results_db_path (Path): Caminho para o banco de dados de resultados.
+        max_workers (int, optional): Número de processos. Se None, usa um por núcleo.
+                                     Com 1, os cenários rodam sequencialmente no processo atual.
+        on_progress (Callable, optional): Chamado a cada cenário concluído com
+                                          (concluidos, total, resumo). É invocado na thread
+                                          que chamou run_scenarios.
+        cancel_token (CancelToken, optional): Token para cancelar a execução a partir de outra thread.
+        on_event (Callable, optional): Recebe os eventos de progresso (ver ProgressTracker): início
+                                       de cada etapa de cada cenário e conclusão de cada cenário,
+                                       com tempo decorrido e estimativa do tempo restante. Pode ser
+                                       chamado de uma thread auxiliar.
+
+    Ao final, as medidas de tempo das etapas de cada cenário são gravadas na tabela
+    'tempos_etapas' (ver save_stage_timings).
+
+    Returns:
+        list: Resumos de execução (ver run_single_scenario), na ordem dos cenários de entrada.
+    """
+    total = len(scenarios)
+    if total == 0:
+        logger.warning("Nenhum cenário para executar.")
+        return []
+
+    workers = max(1, min(max_workers or default_max_workers(), total))
+    logger.info(f"Executando {total} cenários com {workers} processo(s).")
+
+    cancel_token = cancel_token or CancelToken()
+    tracker = ProgressTracker(total, on_event)
+
+    # Cenários com 'busca_parametros' têm os parâmetros escolhidos antes da execução
+    searches = {}
+    if any(cenario.get("busca_parametros") for cenario in scenarios):
+        from methods._run_search import tune_scenarios
+        scenarios, searches = tune_scenarios(scenarios, data_db_path, max_workers, cancel_token, tracker)
+
+    def finish(resumo, i):
+        if i in searches:
+            resumo["busca"] = searches[i]
+        tracker.finish(resumo["nome_cenario"], resumo["status"])
+        if on_progress:
+            on_progress(tracker.done, total, resumo)
+
+    results = [None] * total
+
+    # Cenários de modelos globais rodam em grupos (mesmo modelo e parâmetros) no processo
+    # principal: cada grupo faz um único ajuste para todas as séries, que já usa todos os núcleos
+    groups = _global_groups(scenarios)
+    if groups:
+        with activate(cancel_token, tracker.stage):
+            for indices in groups:
+                group = [scenarios[i] for i in indices]
+                if cancel_token.cancelled:
+                    resumos = [_resumo_cancelado(cenario) for cenario in group]
+                else:
+                    resumos = _run_global_isolated(group, data_db_path, results_db_path)
+                for i, resumo in zip(indices, resumos):
+                    results[i] = resumo
+                    finish(resumo, i)
+    remaining = [i for i in range(total) if results[i] is None]
+
+    if remaining and workers == 1:
+        with activate(cancel_token, tracker.stage):
+            for i in remaining:
+                if cancel_token.cancelled:
+                    resumo = _resumo_cancelado(scenarios[i])
+                else:
+                    resumo = _run_isolated(scenarios[i], data_db_path, results_db_path)
+                results[i] = resumo
+                finish(resumo, i)
+
+    elif remaining:
+        # Cada série é lida e convertida uma única vez, no processo principal, e enviada
+        # pronta aos processos do pool. O tempo da leitura é somado à etapa "carregamento"
+        # dos cenários da série, dividido entre eles (no processo do pool ela não custa nada)
+        load_times = {}
+        series = preload_series([scenarios[i] for i in remaining], data_db_path, load_times)
+        shares = {}
+        for i in remaining:
+            serie_id = scenarios[i].get("serie_id")
+            shares[serie_id] = shares.get(serie_id, 0) + 1
+
+        def on_done(j, future):
+            i = remaining[j]
+            if future.cancelled():
+                resumo = _resumo_cancelado(scenarios[i])
+            else:
+                try:
+                    resumo = future.result()
+                except Exception as e:
+                    nome_cenario = scenarios[i].get("nome_cenario", "Cenário Desconhecido")
+                    logger.error(f"Falha no processo que executava o cenário {nome_cenario}: {e}")
+                    resumo = {"nome_cenario": nome_cenario, "status": "erro", "mensagem": str(e), "duracao": None}
+            serie_id = scenarios[i].get("serie_id")
+            if serie_id in load_times:
+                _add_load_time(resumo, *(t / shares[serie_id] for t in load_times[serie_id]))
+            results[i] = resumo
+            finish(resumo, i)
+
+        tasks = [
+            (scenarios[i], data_db_path, results_db_path, series.get(scenarios[i].get("serie_id")))
+            for i in remaining
+        ]
+        run_pool_tasks(run_single_scenario, tasks, min(workers, len(tasks)), tracker, cancel_token, on_done)
+
+    save_stage_timings(scenarios, results, results_db_path)
+    return results
+
+def save_stage_timings(scenarios: list, results: list, results_db_path: Path) -> int:
+    """
+    Grava na tabela 'tempos_etapas' as medidas das etapas de cada cenário executado.
+    Uma falha na gravação é apenas registrada: ela não afeta os resultados do lote.
+
+    Args:
+        scenarios (list): Cenários executados.
+        results (list): Resumos devolvidos pela execução, na ordem dos cenários.
+        results_db_path (Path): Caminho para o banco de dados de resultados.
+
+    Returns:
+        int: Quantidade de medidas gravadas.
+    """
+    rows = [row for cenario, resumo in zip(scenarios, results) for row in build_timing_rows(cenario, resumo)]
+    if not rows:
+        return 0
+    try:
+        with SqliteAdapter(str(results_db_path), tune_storage=True) as adapter:
+            adapter.create_schema_if_not_exists()
+            adapter.create_timing_schema_if_not_exists()
+            return adapter.insert_stage_timings(rows)
+    except Exception as e:
+        logger.warning(f"Não foi possível gravar os tempos das etapas: {e}")
+        return 0
+
+def run_pool_tasks(
+    func: Callable,
+    tasks: list,
+    workers: int,
+    tracker: ProgressTracker,
+    cancel_token: CancelToken,
+    on_done: Callable
+) -> None:
+    """
+    Executa func(*argumentos) para cada tupla de 'tasks' em um pool de processos.
+
+    Os registros de log dos processos filhos são redespachados no processo principal, os
+    eventos de etapa (report_stage) chegam a 'tracker' e o cancelamento de 'cancel_token'
+    é repassado aos filhos (check_cancelled); as tarefas ainda não iniciadas são descartadas.
+
+    Args:
+        func (Callable): Função de nível de módulo (precisa ser serializável).
+        tasks (list): Argumentos de cada tarefa.
+        workers (int): Número de processos.
+        tracker (ProgressTracker): Destino dos eventos de etapa.
+        cancel_token (CancelToken): Token de cancelamento do lote.
+        on_done (Callable): Chamado na thread atual com (índice da tarefa, future) a cada tarefa
+                            finalizada; future.cancelled() indica que ela nem chegou a começar.
+    """
+    # Os processos filhos enviam seus registros de log por esta fila; o listener
+    # os redespacha para os loggers do processo principal (console e GUI).
+    mp_context = multiprocessing.get_context()
+    log_queue = mp_context.Queue()
+    listener = logging.handlers.QueueListener(log_queue, _DispatchHandler())
+    listener.start()
+
+    # Cancelamento e eventos de etapa atravessam os processos por um Event e uma fila próprios
+    cancel_event = mp_context.Event()
+    progress_queue = mp_context.Queue()
+    progress_thread = threading.Thread(
+        target=_forward_progress, args=(progress_queue, tracker), name="progresso", daemon=True
+    )
+    progress_thread.start()
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(log_queue, logging.getLogger().getEffectiveLevel(), cancel_event, progress_queue)
+        ) as executor:
+            futures = {executor.submit(_run_in_worker, func, *args): i for i, args in enumerate(tasks)}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                if cancel_token.cancelled and not cancel_event.is_set():
+                    logger.warning("Cancelamento solicitado: interrompendo as tarefas do lote.")
+                    cancel_event.set()
+                    for future in pending:
+                        future.cancel() # Apenas as que ainda não começaram
+                for future in done:
+                    on_done(futures[future], future)
+    finally:
+        listener.stop()
+        log_queue.close()
+        progress_queue.put(None)
+        progress_thread.join()
+        progress_queue.close()
+
+def summarize_results(results: list) -> dict:
+    """
+    Conta os resumos de execução por status.
+
+    Args:
+        results (list): Resumos devolvidos por run_scenarios.
+
+    Returns:
+        dict: Dicionário {"total", "sucesso", "ignorado", "erro", "cancelado"}.
+    """
+    summary = {"total": len(results), "sucesso": 0, "ignorado": 0, "erro": 0, "cancelado": 0}
+    for resumo in results:
+        summary[resumo["status"]] = summary.get(resumo["status"], 0) + 1
+    return summary
+
+def slowest_scenarios(results: list, limit: int = 5) -> list:
+    """
+    Lista os cenários mais lentos do lote, com a etapa principal mais lenta de cada um.
+
+    Args:
+        results (list): Resumos devolvidos por run_scenarios.
+        limit (int): Quantidade de cenários.
+
+    Returns:
+        list: Dicionários {"nome_cenario", "duracao", "etapa", "duracao_etapa"}, do mais lento
+              para o mais rápido (apenas cenários com medidas de etapas).
+    """
+    slowest = []
+    for resumo in results:
+        stages = [record for record in resumo.get("tempos_etapas") or [] if record.get("etapa_pai") is None]
+        if not stages:
+            continue
+        worst = max(stages, key=lambda record: record["duracao"])
+        slowest.append({
+            "nome_cenario": resumo["nome_cenario"],
+            "duracao": round(sum(record["duracao"] for record in stages), 3),
+            "etapa": worst["etapa"],
+            "duracao_etapa": round(worst["duracao"], 3)
+        })
+    slowest.sort(key=lambda item: item["duracao"], reverse=True)
+    return slowest[:limit]
+
+def log_slowest_scenarios(results: list, limit: int = 5) -> None:
+    """
+    Registra no log os cenários mais lentos do lote (ver slowest_scenarios).
+    """
+    slowest = slowest_scenarios(results, limit)
+    if not slowest:
+        return
+    logger.info("Cenários mais lentos: " + "; ".join(
+        f"{item['nome_cenario']} {item['duracao']}s (etapa mais lenta: {item['etapa']}, {item['duracao_etapa']}s)"
+        for item in slowest
+    ))
+
+def preload_series(scenarios: list, data_db_path: Path, load_times: dict = None) -> dict:
+    """
+    Carrega, pelo cache de séries, cada série distinta usada pelos cenários.
+    Séries que falham ao carregar ficam de fora; o erro reaparece no cenário correspondente.
+
+    Args:
+        scenarios (list): Cenários do lote.
+        data_db_path (Path): Caminho para o banco de dados de dados históricos.
+        load_times (dict, optional): Recebe {serie_id: (tempo de relógio, tempo de CPU)} da
+                                     leitura de cada série carregada.
+
+    Returns:
+        dict: {serie_id: DataFrame}.
+    """
+    cache = get_series_cache()
+    series = {}
+    for serie_id in dict.fromkeys(s.get("serie_id") for s in scenarios):
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+        try:
+            series[serie_id] = cache.get(serie_id, data_db_path)
+        except Exception as e:
+            logger.warning(f"Não foi possível pré-carregar a série {serie_id}: {e}")
+            continue
+        if load_times is not None:
+            load_times[serie_id] = (time.perf_counter() - inicio, time.process_time() - inicio_cpu)
+    return series
+
+def _add_load_time(resumo: dict, duracao: float, tempo_cpu: float) -> None:
+    """
+    Soma à etapa "carregamento" do resumo o tempo da leitura feita antes do cenário (ver preload_series).
+    """
+    for record in resumo.get("tempos_etapas") or []:
+        if record["etapa"] == ETAPA_TEMPO_CARREGAMENTO and record["etapa_pai"] is None:
+            record["duracao"] = round(record["duracao"] + duracao, 6)
+            if record["tempo_cpu"] is not None:
+                record["tempo_cpu"] = round(record["tempo_cpu"] + tempo_cpu, 6)
+            return
+
+def _run_isolated(cenario: dict, data_db_path: Path, results_db_path: Path) -> dict:
+    """
+    Executa um cenário no processo atual garantindo que nenhuma exceção escape.
+    """
+    try:
+        return run_single_scenario(cenario, data_db_path, results_db_path)
+    except Exception as e:
+        nome_cenario = cenario.get("nome_cenario", "Cenário Desconhecido")
+        logger.error(f"Erro inesperado ao executar o cenário {nome_cenario}: {e}", exc_info=True)
+        return {"nome_cenario": nome_cenario, "status": "erro", "mensagem": str(e), "duracao": None}
+
+def _global_groups(scenarios: list) -> list:
+    """
+    Agrupa os cenários de modelos globais por modelo e parâmetros.
+
+    Returns:
+        list: Listas de índices de cenários, uma por grupo.
+    """
+    groups = {}
+    for i, cenario in enumerate(scenarios):
+        if cenario.get("modelo") in GLOBAL_MODELS:
+            key = (cenario.get("modelo"), json.dumps(cenario.get("parametros", {}), sort_keys=True, default=str))
+            groups.setdefault(key, []).append(i)
+    return list(groups.values())
+
+def _run_global_isolated(scenarios: list, data_db_path: Path, results_db_path: Path) -> list:
+    """
+    Executa um grupo de cenários de modelo global garantindo que nenhuma exceção escape.
+    """
+    try:
+        return run_global_scenarios(scenarios, data_db_path, results_db_path)
+    except Exception as e:
+        logger.error(f"Erro inesperado na execução global do modelo {scenarios[0].get('modelo')}: {e}", exc_info=True)
+        return [
+            {"nome_cenario": cenario.get("nome_cenario", "Cenário Desconhecido"), "status": "erro",
+             "mensagem": str(e), "duracao": None}
+            for cenario in scenarios
+        ]
+
+def _resumo_cancelado(cenario: dict) -> dict:
+    """
+    Resumo de um cenário que não chegou a ser executado por causa do cancelamento.
+    """
+    return {
+        "nome_cenario": cenario.get("nome_cenario", "Cenário Desconhecido"),
+        "status": "cancelado",
+        "mensagem": "Execução cancelada antes do início do cenário.",
+        "duracao": None
+    }
+
+def _forward_progress(progress_queue, tracker: ProgressTracker) -> None:
+    """
+    Repassa ao acompanhamento do lote os eventos de etapa enviados pelos processos do pool,
+    até receber None.
+    """
+    while True:
+        item = progress_queue.get()
+        if item is None:
+            return
+        tracker.stage(*item)
+
+# Token de cancelamento e fila de progresso de cada processo do pool (ver _init_worker)
+_worker_cancel_token = None
+_worker_progress_queue = None
+
+def _init_worker(log_queue, log_level: int, cancel_event=None, progress_queue=None) -> None:
+    """
+    Inicializa um processo do pool: todo log é encaminhado para a fila do processo principal,
+    e o cancelamento e o progresso passam pelo Event e pela fila recebidos.
+    """
+    global _worker_cancel_token, _worker_progress_queue
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(log_level)
+
+    # Ctrl+C cancela pelo processo principal; os filhos não devem morrer no meio de uma gravação
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_cancel_token = CancelToken(cancel_event) if cancel_event is not None else None
+    _worker_progress_queue = progress_queue
+
+def _run_in_worker(func: Callable, *args):
+    """
+    Executa uma tarefa em um processo do pool, com o token e a fila de progresso do processo ativos.
+    """
+    reporter = (lambda etapa, nome: _worker_progress_queue.put((etapa, nome))) if _worker_progress_queue else None
+    with activate(_worker_cancel_token, reporter):
+        return func(*args)
+
+class _DispatchHandler(logging.Handler):
+    """
+    Reenvia registros vindos dos processos filhos para o logger de mesmo nome no processo principal.
+    """
+    def emit(self, record):
+        logger_destino = logging.getLogger(record.name)
+        if logger_destino.isEnabledFor(record.levelno):
+            logger_destino.handle(record)
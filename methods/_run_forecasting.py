@@ -1,49 +1,99 @@
 import logging
+import time
 from pathlib import Path
 from datetime import datetime
 import pandas as pd
 
-from modules.data_loader import load_historical_data, infer_frequency # Importa infer_frequency
+from modules.data_loader import infer_frequency # Importa infer_frequency
+from modules.series_cache import get_series_cache
 from modules.forecasting_model import forecast_factory
-from modules.results_processor import process_results
+from modules.results_processor import build_forecast_batch
 from modules.model_evaluator import calculate_metrics
 from persistence.sqlite_adapter import SqliteAdapter
+from utils.run_control import (
+    RunCancelled, check_cancelled, report_stage,
+    ETAPA_INICIO, ETAPA_CARREGAMENTO, ETAPA_AJUSTE, ETAPA_METRICAS, ETAPA_GRAVACAO
+)
+from utils.stage_timer import (
+    StageTimer, activate_timer, split_records,
+    ETAPA_TEMPO_CARREGAMENTO, ETAPA_TEMPO_FREQUENCIA, ETAPA_TEMPO_AJUSTE, ETAPA_TEMPO_AJUSTE_TESTE,
+    ETAPA_TEMPO_AJUSTE_FINAL, ETAPA_TEMPO_METRICAS, ETAPA_TEMPO_PROCESSAMENTO, ETAPA_TEMPO_GRAVACAO
+)
 
 # Configura o logger para este módulo
 logger = logging.getLogger(__name__)
 
+# Modos de avaliação (chave "modo_avaliacao" do cenário)
+MODO_REAJUSTAR = "reajustar"  # Ajustes independentes para teste e previsão final
+MODO_ESTENDER = "estender"    # Ajuste único no treino, estendido com as observações de teste
+MODOS_AVALIACAO = (MODO_REAJUSTAR, MODO_ESTENDER)
+
 def run_single_scenario(
     cenario: dict,
     data_db_path: Path,
-    results_db_path: Path
-) -> None:
+    results_db_path: Path,
+    historical_data: pd.DataFrame = None
+) -> dict:
     """
     Executa um único cenário de previsão de ponta a ponta.
 
+    Entre as etapas, o cenário informa o progresso e verifica o cancelamento da execução
+    ativa (ver utils.run_control.activate); se cancelado, nada é gravado.
+
+    Cada etapa (carregamento, inferência da frequência, ajustes, métricas, processamento e
+    gravação) é medida com StageTimer; as medidas voltam no resumo, em "tempos_etapas", e
+    são gravadas por run_scenarios na tabela 'tempos_etapas'. O pico de memória de cada etapa
+    só é medido com a chave 'medir_memoria: true' no cenário (o tracemalloc deixa o ajuste
+    bem mais lento).
+
     Args:
         cenario (dict): Dicionário contendo as informações do cenário.
         data_db_path (Path): Caminho para o banco de dados de dados históricos (dados_bcb.db).
         results_db_path (Path): Caminho para o banco de dados de resultados (previsoes.db).
+        historical_data (pd.DataFrame, optional): Série histórica já carregada. Se None, a série
+                                                  é obtida do cache de séries do processo.
+
+    Returns:
+        dict: Resumo da execução com as chaves "nome_cenario", "status"
+              ("sucesso", "ignorado", "erro" ou "cancelado"), "mensagem", "duracao" (segundos),
+              "data_execucao" (início, ISO), "execucao_id" (None se nada foi gravado) e
+              "tempos_etapas" (ver StageTimer).
     """
     nome_cenario = cenario.get("nome_cenario", "Cenário Desconhecido")
     serie_id = cenario.get("serie_id")
     modelo_nome = cenario.get("modelo")
     horizonte = cenario.get("horizonte_previsao")
     parametros = cenario.get("parametros", {})
+    modo_avaliacao = cenario.get("modo_avaliacao", MODO_REAJUSTAR)
 
     logger.info(f"Iniciando execução do cenário: {nome_cenario} (Série: {serie_id}, Modelo: {modelo_nome})")
+    inicio = time.perf_counter()
+    data_execucao = datetime.now()
+    timer = StageTimer(trace_memory=bool(cenario.get("medir_memoria", False)))
+    status, mensagem, execucao_id = "sucesso", None, None
 
     try:
-        # 1. Carregar dados históricos
-        historical_data = load_historical_data(serie_id, data_db_path)
+        report_stage(ETAPA_INICIO, nome_cenario)
+        check_cancelled(ETAPA_INICIO)
+
+        # 1. Carregar dados históricos (lidos do banco uma única vez por lote)
+        report_stage(ETAPA_CARREGAMENTO, nome_cenario)
+        with timer.stage(ETAPA_TEMPO_CARREGAMENTO):
+            if historical_data is None:
+                historical_data = get_series_cache().get(serie_id, data_db_path)
         logger.info(f"Dados históricos carregados para {serie_id}. Total de {len(historical_data)} registros.")
 
         if historical_data.empty or len(historical_data) < horizonte + 1: # +1 para ter pelo menos um ponto de treino
-            logger.warning(f"Dados insuficientes para o cenário {nome_cenario}. Mínimo de {horizonte + 1} pontos necessários.")
-            return
+            mensagem = f"Dados insuficientes para o cenário {nome_cenario}. Mínimo de {horizonte + 1} pontos necessários."
+            logger.warning(mensagem)
+            return _resumo_execucao(nome_cenario, "ignorado", mensagem, inicio, data_execucao, timer)
+
+        if modo_avaliacao not in MODOS_AVALIACAO:
+            raise ValueError(f"Modo de avaliação '{modo_avaliacao}' inválido. Use um de: {list(MODOS_AVALIACAO)}")
 
         # Inferir frequência da série temporal
-        frequency = infer_frequency(historical_data)
+        with timer.stage(ETAPA_TEMPO_FREQUENCIA):
+            frequency = infer_frequency(historical_data)
         logger.info(f"Frequência inferida para a série {serie_id}: {frequency}")
 
         # Dividir dados em treino e teste para avaliação
@@ -51,36 +101,210 @@ def run_single_scenario(
         test_data = historical_data.iloc[-horizonte:]
 
         # 2. Instanciar e executar o modelo de previsão
+        check_cancelled(ETAPA_AJUSTE)
+        report_stage(ETAPA_AJUSTE, nome_cenario)
         model = forecast_factory(modelo_nome)
         
-        # Previsão no conjunto de teste para avaliação
-        forecast_test_df = model.predict(train_data, horizonte, **parametros)
-        logger.info(f"Previsão no conjunto de teste concluída para o cenário {nome_cenario}.")
+        # Previsão no conjunto de teste (avaliação) e previsão final com todos os dados históricos.
+        # No modo "estender", modelos que suportam extensão são ajustados uma única vez.
+        # Os ajustes de teste e final são medidos pelo próprio modelo, como subetapas (ver timed_stage)
+        with timer.stage(ETAPA_TEMPO_AJUSTE), activate_timer(timer):
+            forecast_test_df, final_forecast_df = model.evaluate_and_forecast(
+                train_data, historical_data, horizonte,
+                extend=modo_avaliacao == MODO_ESTENDER,
+                **parametros
+            )
+        logger.info(f"Previsões de teste e final concluídas para o cenário {nome_cenario}.")
 
         # Calcular métricas de avaliação
-        metrics = calculate_metrics(test_data["valor"].reset_index(drop=True), forecast_test_df["valor_previsto"].reset_index(drop=True))
+        check_cancelled(ETAPA_METRICAS)
+        report_stage(ETAPA_METRICAS, nome_cenario)
+        with timer.stage(ETAPA_TEMPO_METRICAS):
+            metrics = calculate_metrics(test_data["valor"].reset_index(drop=True), forecast_test_df["valor_previsto"].reset_index(drop=True))
         logger.info(f"Métricas de avaliação para {nome_cenario}: {metrics}")
 
-        # Previsão final usando todos os dados históricos para o horizonte real
-        final_forecast_df = model.predict(historical_data, horizonte, **parametros)
-        logger.info(f"Previsão final concluída para o cenário {nome_cenario}.")
-
         # 3. Processar resultados para inserção no banco de dados
-        # Passa as métricas e a frequência para o processador de resultados
-        processed_records = process_results(cenario, final_forecast_df, metrics, frequency) # Passa a frequência
-        logger.info(f"Resultados processados para o cenário {nome_cenario}. Total de {len(processed_records)} registros de previsão.")
+        # Metadados e métricas formam um único registro de execução; os pontos são gerados sob demanda
+        with timer.stage(ETAPA_TEMPO_PROCESSAMENTO):
+            forecasts = build_forecast_batch([(cenario, final_forecast_df, metrics, frequency)], data_execucao=data_execucao)
 
-        # 4. Salvar resultados no banco de dados
-        with SqliteAdapter(str(results_db_path)) as adapter:
-            adapter.create_schema_if_not_exists()
-            adapter.insert_many("resultados_previsao", processed_records)
-        logger.info(f"Resultados do cenário {nome_cenario} salvos no banco de dados.")
+        # 4. Salvar resultados no banco de dados (último ponto em que o cancelamento é aceito)
+        check_cancelled(ETAPA_GRAVACAO)
+        report_stage(ETAPA_GRAVACAO, nome_cenario)
+        with timer.stage(ETAPA_TEMPO_GRAVACAO):
+            with SqliteAdapter(str(results_db_path), tune_storage=True) as adapter:
+                adapter.create_schema_if_not_exists()
+                execucao_id = adapter.insert_forecasts(forecasts)[0]
+        logger.info(f"Resultados do cenário {nome_cenario} salvos no banco de dados. Total de {len(final_forecast_df)} registros de previsão.")
 
+    except RunCancelled as rc:
+        logger.warning(f"Cenário {nome_cenario} cancelado: {rc}")
+        status, mensagem = "cancelado", str(rc)
     except ValueError as ve:
         logger.error(f"Erro de validação no cenário {nome_cenario}: {ve}")
+        status, mensagem = "erro", str(ve)
     except Exception as e:
         logger.error(f"Erro inesperado ao executar o cenário {nome_cenario}: {e}", exc_info=True)
+        status, mensagem = "erro", str(e)
 
     logger.info(f"Execução do cenário {nome_cenario} finalizada.")
+    return _resumo_execucao(nome_cenario, status, mensagem, inicio, data_execucao, timer, execucao_id)
+
+def run_global_scenarios(
+    scenarios: list,
+    data_db_path: Path,
+    results_db_path: Path,
+    series: dict = None
+) -> list:
+    """
+    Executa juntos cenários de um mesmo modelo global (ex.: RandomForestGlobal) com os mesmos
+    parâmetros: um ajuste com as séries de treino de todos os cenários gera as previsões de
+    avaliação, e um segundo ajuste com as séries completas gera as previsões finais. Os
+    resultados são gravados por cenário, como em run_single_scenario, em uma única transação.
+
+    Cenários com dados insuficientes são ignorados; uma falha no ajuste afeta todo o grupo.
+    A "duracao" de cada resumo é a do grupo inteiro; os tempos das etapas ("tempos_etapas")
+    são divididos igualmente entre os cenários executados.
+
+    Args:
+        scenarios (list): Cenários do grupo (mesmo modelo e mesmos parâmetros).
+        data_db_path (Path): Caminho para o banco de dados de dados históricos.
+        results_db_path (Path): Caminho para o banco de dados de resultados.
+        series (dict, optional): {serie_id: DataFrame} já carregadas; as demais são obtidas
+                                 do cache de séries do processo.
+
+    Returns:
+        list: Resumos de execução (ver run_single_scenario), na ordem dos cenários de entrada.
+    """
+    inicio = time.perf_counter()
+    series = dict(series or {})
+    modelo_nome = scenarios[0].get("modelo")
+    parametros = scenarios[0].get("parametros", {})
+    n_lags = parametros.get("n_lags", 5)
+    nomes = [cenario.get("nome_cenario", "Cenário Desconhecido") for cenario in scenarios]
+    logger.info(f"Iniciando execução global de {len(scenarios)} cenários (Modelo: {modelo_nome})")
+    resumos = [None] * len(scenarios)
+    data_execucao = datetime.now()
+    timer = StageTimer(trace_memory=any(cenario.get("medir_memoria", False) for cenario in scenarios))
+    ativos, execucao_ids = [], {}
+
+    try:
+        for nome_cenario in nomes:
+            report_stage(ETAPA_INICIO, nome_cenario)
+        check_cancelled(ETAPA_INICIO)
+
+        # 1. Carregar as séries (uma vez por série) e separar os cenários com dados suficientes
+        with timer.stage(ETAPA_TEMPO_CARREGAMENTO):
+            for i, cenario in enumerate(scenarios):
+                report_stage(ETAPA_CARREGAMENTO, nomes[i])
+                serie_id = cenario.get("serie_id")
+                if serie_id not in series:
+                    series[serie_id] = get_series_cache().get(serie_id, data_db_path)
+                horizonte = cenario.get("horizonte_previsao")
+                if len(series[serie_id]) < horizonte + n_lags + 1:
+                    mensagem = (f"Dados insuficientes para o cenário {nomes[i]}. "
+                                f"Mínimo de {horizonte + n_lags + 1} pontos necessários.")
+                    logger.warning(mensagem)
+                    resumos[i] = _resumo_execucao(nomes[i], "ignorado", mensagem, inicio, data_execucao)
+                else:
+                    ativos.append(i)
+        if not ativos:
+            timer.close()
+            return resumos
+
+        with timer.stage(ETAPA_TEMPO_FREQUENCIA):
+            frequencies = {
+                serie_id: infer_frequency(series[serie_id])
+                for serie_id in dict.fromkeys(scenarios[i].get("serie_id") for i in ativos)
+            }
+
+        # 2. Ajustes globais: avaliação (séries sem o período de teste) e previsão final.
+        # Séries de treino iguais (mesma série e horizonte) entram uma única vez.
+        check_cancelled(ETAPA_AJUSTE)
+        for i in ativos:
+            report_stage(ETAPA_AJUSTE, nomes[i])
+        model = forecast_factory(modelo_nome)
+        test_keys = {i: (scenarios[i].get("serie_id"), scenarios[i].get("horizonte_previsao")) for i in ativos}
+        final_horizons = {}
+        for i in ativos:
+            serie_id = scenarios[i].get("serie_id")
+            final_horizons[serie_id] = max(final_horizons.get(serie_id, 0), scenarios[i].get("horizonte_previsao"))
+        with timer.stage(ETAPA_TEMPO_AJUSTE):
+            with timer.substage(ETAPA_TEMPO_AJUSTE_TESTE):
+                test_forecasts = model.predict_many(
+                    {key: series[key[0]].iloc[:-key[1]] for key in test_keys.values()},
+                    {key: key[1] for key in test_keys.values()},
+                    **parametros
+                )
+            with timer.substage(ETAPA_TEMPO_AJUSTE_FINAL):
+                final_forecasts = model.predict_many(
+                    {serie_id: series[serie_id] for serie_id in final_horizons}, final_horizons, **parametros
+                )
+        logger.info(f"Previsões globais de teste e finais concluídas para {len(ativos)} cenários.")
 
+        # 3. Métricas por cenário
+        check_cancelled(ETAPA_METRICAS)
+        entries = []
+        with timer.stage(ETAPA_TEMPO_METRICAS):
+            for i in ativos:
+                report_stage(ETAPA_METRICAS, nomes[i])
+                serie_id, horizonte = test_keys[i]
+                metrics = calculate_metrics(
+                    series[serie_id]["valor"].iloc[-horizonte:].reset_index(drop=True),
+                    test_forecasts[test_keys[i]]["valor_previsto"].reset_index(drop=True)
+                )
+                final_forecast_df = final_forecasts[serie_id].iloc[:horizonte]
+                entries.append((scenarios[i], final_forecast_df, metrics, frequencies[serie_id]))
+        with timer.stage(ETAPA_TEMPO_PROCESSAMENTO):
+            forecasts = build_forecast_batch(entries, data_execucao=data_execucao)
 
+        # 4. Gravação de todos os cenários do grupo
+        check_cancelled(ETAPA_GRAVACAO)
+        for i in ativos:
+            report_stage(ETAPA_GRAVACAO, nomes[i])
+        with timer.stage(ETAPA_TEMPO_GRAVACAO):
+            with SqliteAdapter(str(results_db_path), tune_storage=True) as adapter:
+                adapter.create_schema_if_not_exists()
+                execucao_ids = dict(zip(ativos, adapter.insert_forecasts(forecasts)))
+        logger.info(f"Resultados de {len(ativos)} cenários do modelo {modelo_nome} salvos no banco de dados.")
+        status, mensagem = "sucesso", None
+
+    except RunCancelled as rc:
+        logger.warning(f"Execução global do modelo {modelo_nome} cancelada: {rc}")
+        status, mensagem = "cancelado", str(rc)
+    except ValueError as ve:
+        logger.error(f"Erro de validação na execução global do modelo {modelo_nome}: {ve}")
+        status, mensagem = "erro", str(ve)
+    except Exception as e:
+        logger.error(f"Erro inesperado na execução global do modelo {modelo_nome}: {e}", exc_info=True)
+        status, mensagem = "erro", str(e)
+
+    tempos = split_records(timer.close(), len(ativos)) if ativos else []
+    return [
+        resumo if resumo is not None else _resumo_execucao(
+            nomes[i], status, mensagem, inicio, data_execucao, execucao_id=execucao_ids.get(i), tempos=tempos
+        )
+        for i, resumo in enumerate(resumos)
+    ]
+
+def _resumo_execucao(nome_cenario: str, status: str, mensagem: str, inicio: float,
+                     data_execucao: datetime = None, timer: StageTimer = None, execucao_id: int = None,
+                     tempos: list = None) -> dict:
+    """
+    Monta o dicionário de resumo devolvido por run_single_scenario, encerrando o medidor de etapas.
+    """
+    if timer is not None:
+        tempos = timer.close()
+    return {
+        "nome_cenario": nome_cenario,
+        "status": status,
+        "mensagem": mensagem,
+        "duracao": round(time.perf_counter() - inicio, 3),
+        "data_execucao": data_execucao.isoformat() if data_execucao else None,
+        "execucao_id": execucao_id,
+        "tempos_etapas": [
+            {**record, "duracao": round(record["duracao"], 6),
+             "tempo_cpu": round(record["tempo_cpu"], 6) if record["tempo_cpu"] is not None else None}
+            for record in tempos or []
+        ]
+    }
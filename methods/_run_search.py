@@ -0,0 +1,266 @@
+import logging
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from methods._run_backtest import run_backtest_folds
+from methods._run_batch import default_max_workers, run_pool_tasks
+from modules.forecasting_model import forecast_factory
+from modules.model_evaluator import build_backtest_folds
+from modules.parameter_search import (
+    build_candidates, prune_by_information_criterion, search_config, select_survivors
+)
+from modules.series_cache import get_series_cache
+from utils.run_control import (
+    CancelToken, ProgressTracker, RunCancelled, activate, check_cancelled, ETAPA_BUSCA
+)
+
+# Configura o logger para este módulo
+logger = logging.getLogger(__name__)
+
+def tune_scenarios(
+    scenarios: list,
+    data_db_path: Path,
+    max_workers: int = None,
+    cancel_token: CancelToken = None,
+    tracker: ProgressTracker = None
+) -> tuple:
+    """
+    Escolhe os parâmetros dos cenários que declaram 'busca_parametros'.
+
+    Os candidatos de todos os cenários são avaliados juntos, em um pool de processos, em
+    rodadas sucessivas: cada rodada avalia os candidatos restantes em mais uma dobra de
+    backtest (da mais recente para a mais antiga) e mantém apenas a melhor fração deles
+    (ver select_survivors). Para modelos que fornecem critério de informação (ARIMA), uma
+    rodada inicial ajusta cada candidato uma única vez e descarta os de AIC muito pior que
+    o melhor, sem gerar previsões; com 'metrica: aic', o vencedor é o de menor AIC.
+
+    Se a busca de um cenário falhar, ele é executado com os parâmetros declarados.
+
+    Args:
+        scenarios (list): Lista de dicionários de cenário.
+        data_db_path (Path): Caminho para o banco de dados de dados históricos.
+        max_workers (int, optional): Número de processos. Se None, usa um por núcleo.
+        cancel_token (CancelToken, optional): Token de cancelamento do lote.
+        tracker (ProgressTracker, optional): Destino dos eventos de etapa (etapa "busca").
+
+    Returns:
+        tuple: (cenários com os parâmetros vencedores em 'parametros', {índice do cenário:
+               resumo da busca}). O resumo tem "status" ("sucesso" ou "erro") e, no sucesso,
+               "parametros", "metrica", "valor", "candidatos", "descartados_aic" e "avaliacoes".
+               Se a execução for cancelada, os cenários são devolvidos sem alteração.
+    """
+    cancel_token = cancel_token or CancelToken()
+    tracker = tracker or ProgressTracker(len(scenarios))
+    searches, infos = {}, {}
+    for i, cenario in enumerate(scenarios):
+        if not cenario.get("busca_parametros"):
+            continue
+        nome_cenario = cenario.get("nome_cenario", "Cenário Desconhecido")
+        tracker.stage(ETAPA_BUSCA, nome_cenario)
+        try:
+            searches[i] = _plan_search(cenario, data_db_path)
+        except Exception as e:
+            logger.warning(f"Busca de parâmetros do cenário {nome_cenario} não realizada ({e}); "
+                           f"usando os parâmetros declarados.")
+            infos[i] = {"status": "erro", "mensagem": str(e)}
+    if not searches:
+        return scenarios, infos
+
+    total_candidates = sum(len(s["candidatos"]) for s in searches.values())
+    logger.info(f"Busca de parâmetros: {len(searches)} cenário(s), {total_candidates} candidatos.")
+
+    # 1. Pré-seleção pelo critério de informação (um ajuste por candidato, sem previsões)
+    tasks, owners = [], []
+    for i, search in searches.items():
+        if search["usa_criterio"]:
+            fim_treino = search["dobras"][-1][1]
+            for c in search["ativos"]:
+                tasks.append((_candidate(search, c), data_db_path, search["historico"], fim_treino))
+                owners.append((i, c))
+    if tasks:
+        outcomes = _run_tasks(information_criterion_task, tasks, max_workers, cancel_token, tracker)
+        if outcomes is None:
+            return scenarios, {}
+        for (i, c), outcome in zip(owners, outcomes):
+            searches[i]["aic"][c] = outcome if isinstance(outcome, float) else None
+        for search in searches.values():
+            if search["usa_criterio"]:
+                _prune_by_aic(search)
+
+    # 2. Rodadas de avaliação em dobras, com poda sucessiva dos piores candidatos
+    for rodada in range(max(len(s["dobras"]) for s in searches.values())):
+        tasks, owners = [], []
+        for i, search in searches.items():
+            if search["concluida"] or rodada >= len(search["dobras"]) or (rodada > 0 and len(search["ativos"]) <= 1):
+                continue
+            numero = len(search["dobras"]) - rodada
+            fold = search["dobras"][numero - 1]
+            for c in search["ativos"]:
+                tasks.append((_candidate(search, c), data_db_path, search["historico"], [fold], numero, False))
+                owners.append((i, c))
+        if not tasks:
+            break
+
+        outcomes = _run_tasks(run_backtest_folds, tasks, max_workers, cancel_token, tracker)
+        if outcomes is None:
+            return scenarios, {}
+        touched = set()
+        for (i, c), outcome in zip(owners, outcomes):
+            search = searches[i]
+            value = outcome["dobras"][0].get(search["config"]["metrica"]) if isinstance(outcome, dict) else None
+            search["metricas"][c].append(math.inf if value is None else float(value))
+            search["avaliacoes"] += 1
+            touched.add(i)
+        for i in touched:
+            search = searches[i]
+            scores = {c: float(np.mean(search["metricas"][c])) for c in search["ativos"]}
+            is_last = rodada + 1 >= len(search["dobras"])
+            search["ativos"] = select_survivors(scores, search["config"]["fator_reducao"] if not is_last else len(scores))
+            search["pontuacoes"].update(scores)
+
+    # 3. Vencedores
+    tuned = list(scenarios)
+    for i, search in searches.items():
+        nome_cenario = search["cenario"].get("nome_cenario", "Cenário Desconhecido")
+        info = _search_summary(search)
+        infos[i] = info
+        if info["status"] != "sucesso":
+            logger.warning(f"Busca de parâmetros do cenário {nome_cenario} sem vencedor ({info['mensagem']}); "
+                           f"usando os parâmetros declarados.")
+            continue
+        tuned[i] = {**search["cenario"], "parametros": info["parametros"]}
+        logger.info(f"Busca de parâmetros do cenário {nome_cenario}: {info['parametros']} "
+                    f"({info['metrica']} = {info['valor']}, {info['candidatos']} candidatos, "
+                    f"{info['avaliacoes']} avaliações).")
+    return tuned, infos
+
+def information_criterion_task(cenario: dict, data_db_path: Path, historical_data: pd.DataFrame,
+                               fim_treino: int) -> float:
+    """
+    Ajusta o modelo do cenário ao treino da dobra mais recente e retorna o critério de informação.
+    """
+    check_cancelled(ETAPA_BUSCA)
+    if historical_data is None:
+        historical_data = get_series_cache().get(cenario.get("serie_id"), data_db_path)
+    model = forecast_factory(cenario.get("modelo"))
+    return model.information_criterion(historical_data.iloc[:fim_treino], **cenario.get("parametros", {}))
+
+def _plan_search(cenario: dict, data_db_path: Path) -> dict:
+    """
+    Valida a configuração da busca, gera os candidatos e define as dobras de avaliação.
+    """
+    config = search_config(cenario)
+    horizonte = cenario.get("horizonte_previsao")
+    model = forecast_factory(cenario.get("modelo"))
+    if config["metrica"] == "aic" and not model.supports_information_criterion:
+        raise ValueError(f"O modelo {cenario.get('modelo')} não fornece critério de informação (metrica: aic).")
+
+    historical_data = get_series_cache().get(cenario.get("serie_id"), data_db_path)
+    if historical_data.empty or len(historical_data) < horizonte + 1:
+        raise ValueError(f"Dados insuficientes: mínimo de {horizonte + 1} pontos necessários.")
+    folds = build_backtest_folds(len(historical_data), horizonte, config["dobras"], config["passo"])
+    candidates = build_candidates(config["espaco"], cenario.get("parametros"), config["max_candidatos"], config["semente"])
+
+    return {
+        "cenario": cenario,
+        "config": config,
+        "historico": historical_data,
+        "dobras": folds,
+        "candidatos": candidates,
+        "ativos": list(range(len(candidates))),
+        "usa_criterio": model.supports_information_criterion and (
+            config["metrica"] == "aic" or (config["criterio_informacao"] and len(candidates) > 1)),
+        "aic": {},
+        "metricas": {c: [] for c in range(len(candidates))},
+        "pontuacoes": {},
+        "avaliacoes": 0,
+        "descartados_aic": 0,
+        "concluida": False
+    }
+
+def _prune_by_aic(search: dict) -> None:
+    """
+    Aplica a pré-seleção por AIC. Ordens de diferenciação diferentes ('d', no ARIMA) são
+    comparadas separadamente.
+    """
+    candidates = search["candidatos"]
+    ativos = search["ativos"]
+    criteria = [search["aic"].get(c) for c in ativos]
+    if search["config"]["metrica"] == "aic":
+        kept = prune_by_information_criterion(criteria, 0.0)[:1]
+        search["concluida"] = True
+    else:
+        groups = [candidates[c].get("d", 1) for c in ativos]
+        kept = prune_by_information_criterion(criteria, search["config"]["limiar_aic"], groups)
+    search["descartados_aic"] = len(ativos) - len(kept)
+    search["ativos"] = [ativos[k] for k in kept]
+
+def _search_summary(search: dict) -> dict:
+    """
+    Monta o resumo da busca de um cenário a partir do estado final.
+    """
+    metrica = search["config"]["metrica"]
+    if not search["ativos"]:
+        return {"status": "erro", "mensagem": "Todos os candidatos falharam."}
+    if metrica == "aic":
+        best = search["ativos"][0]
+        valor = search["aic"][best]
+    else:
+        best = min(search["ativos"], key=lambda c: search["pontuacoes"].get(c, math.inf))
+        valor = search["pontuacoes"].get(best)
+        if valor is None or not math.isfinite(valor):
+            return {"status": "erro", "mensagem": f"Nenhum candidato com {metrica} válido."}
+    return {
+        "status": "sucesso",
+        "parametros": search["candidatos"][best],
+        "metrica": metrica,
+        "valor": valor,
+        "candidatos": len(search["candidatos"]),
+        "descartados_aic": search["descartados_aic"],
+        "avaliacoes": search["avaliacoes"]
+    }
+
+def _candidate(search: dict, index: int) -> dict:
+    """
+    Cenário com os parâmetros do candidato (sem a chave de busca).
+    """
+    cenario = {key: value for key, value in search["cenario"].items() if key != "busca_parametros"}
+    cenario["parametros"] = search["candidatos"][index]
+    return cenario
+
+def _run_tasks(func, tasks: list, max_workers: int, cancel_token: CancelToken, tracker: ProgressTracker):
+    """
+    Executa as tarefas de uma rodada (em um pool ou, com um processo, em sequência).
+
+    Returns:
+        list ou None: Resultado (ou exceção) de cada tarefa; None se a execução foi cancelada.
+    """
+    outcomes = [None] * len(tasks)
+    workers = max(1, min(max_workers or default_max_workers(), len(tasks)))
+    if workers == 1:
+        with activate(cancel_token, tracker.stage):
+            for j, args in enumerate(tasks):
+                if cancel_token.cancelled:
+                    return None
+                try:
+                    outcomes[j] = func(*args)
+                except RunCancelled:
+                    return None
+                except Exception as e:
+                    logger.debug(f"Candidato {args[0].get('parametros')} falhou: {e}")
+                    outcomes[j] = e
+    else:
+        def on_done(j, future):
+            if future.cancelled():
+                return
+            try:
+                outcomes[j] = future.result()
+            except Exception as e:
+                logger.debug(f"Candidato {tasks[j][0].get('parametros')} falhou: {e}")
+                outcomes[j] = e
+
+        run_pool_tasks(func, tasks, workers, tracker, cancel_token, on_done)
+    return None if cancel_token.cancelled else outcomes
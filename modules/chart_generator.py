@@ -1,6 +1,6 @@
 import customtkinter
+import matplotlib
 from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 import pandas as pd
 import numpy as np
@@ -8,10 +8,266 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Cores do gráfico por modo de aparência: (fundo, grade, texto)
+THEME_COLORS = {
+    "Dark": ("#2B2B2B", "#474747", "white"),
+    "Light": ("#EBEBEB", "#D9D9D9", "black"),
+}
+
+class ForecastChart:
+    """
+    Gráfico de previsões persistente, embutido em um frame CustomTkinter.
+
+    A figura, o canvas e a barra de ferramentas são criados uma única vez; a cada nova
+    seleção, update() apenas troca os dados das linhas e faixas já existentes e agenda o
+    redesenho (draw_idle), em vez de recriar todos os objetos do Matplotlib. Linhas e faixas
+    excedentes ficam ocultas e são reaproveitadas nas seleções seguintes.
+
+    destroy() libera a figura e os widgets; depois dele o gráfico não pode mais ser usado.
+    """
+
+    def __init__(self, master_frame: any):
+        """
+        Cria a figura, o canvas e a barra de ferramentas no frame informado.
+
+        Args:
+            master_frame (any): O frame CustomTkinter onde o gráfico será incorporado.
+        """
+        self.master_frame = master_frame
+        self.appearance_mode = None
+        self.layout_key = None
+
+        self.fig = Figure(figsize=(10, 6))
+        self.ax = self.fig.add_subplot(111)
+        self.ax.tick_params(axis='x', labelsize=9, labelrotation=45)
+        self.ax.tick_params(axis='y', labelsize=9)
+        self.ax.set_xlabel('Data')
+        self.ax.set_ylabel('Valor')
+
+        # Artistas reaproveitados entre as seleções
+        self.history_lines = []
+        self.forecast_lines = []
+        self.forecast_bands = []
+
+        # Cria o canvas que desenhará o gráfico e a barra de ferramentas
+        self.canvas = FigureCanvasTkAgg(self.fig, master=master_frame)
+        self.toolbar = NavigationToolbar2Tk(self.canvas, master_frame, pack_toolbar=False)
+        self.toolbar.update()
+
+        # Posiciona os widgets na tela
+        self.toolbar.pack(side="top", fill="x", padx=5)
+        self.canvas.get_tk_widget().pack(side="top", fill="both", expand=True)
+
+        self._apply_theme()
+
+    def update(self, historical_data: pd.DataFrame, list_of_forecast_dfs: list[pd.DataFrame], title: str):
+        """
+        Atualiza o gráfico com dados históricos e previsões de múltiplos cenários.
+
+        Args:
+            historical_data (pd.DataFrame): DataFrame com dados históricos (colunas 'data', 'valor').
+            list_of_forecast_dfs (list[pd.DataFrame]): Lista de DataFrames, onde cada um contém dados de previsão
+                                                      (colunas 'data_previsao', 'valor_previsto', 'limite_inferior',
+                                                      'limite_superior', 'nome_cenario').
+            title (str): Título do gráfico.
+        """
+        logger.info(f"Atualizando gráfico para: {title}")
+        self._apply_theme()
+
+        # --- Séries históricas ---
+        history = []
+        if not historical_data.empty:
+            if 'serie_id' in historical_data.columns and historical_data['serie_id'].nunique() > 1:
+                for serie_id in historical_data['serie_id'].unique():
+                    subset = historical_data[historical_data['serie_id'] == serie_id]
+                    history.append((subset['data'], subset['valor'], f'Histórico ({serie_id})'))
+            else:
+                history.append((historical_data['data'], historical_data['valor'], 'Dados Históricos'))
+
+        cycle_colors = matplotlib.rcParams['axes.prop_cycle'].by_key()['color']
+        for i, (x, y, label) in enumerate(history):
+            line = self._pooled_line(self.history_lines, i, marker='o', markersize=4)
+            line.set_data(x, y)
+            line.set_label(label)
+            line.set_color('blue' if len(history) == 1 else cycle_colors[i % len(cycle_colors)])
+            line.set_visible(True)
+        self._hide_unused(self.history_lines, len(history))
+
+        # --- Previsões ---
+        # Cores para os cenários (usando um colormap mais moderno)
+        colors = matplotlib.colormaps['plasma'].resampled(max(len(list_of_forecast_dfs), 1))
+        lines_used = 0
+        bands_used = 0
+        for i, forecast_df in enumerate(list_of_forecast_dfs):
+            if forecast_df.empty:
+                continue
+            scenario_name = forecast_df['nome_cenario'].iloc[0] if 'nome_cenario' in forecast_df.columns else f'Previsão {i+1}'
+            color = colors(i)
+
+            line = self._pooled_line(self.forecast_lines, lines_used, linestyle='--', marker='x')
+            line.set_data(forecast_df['data_previsao'], forecast_df['valor_previsto'])
+            line.set_label(f'Previsão ({scenario_name})')
+            line.set_color(color)
+            line.set_visible(True)
+            lines_used += 1
+
+            if 'limite_inferior' in forecast_df.columns and 'limite_superior' in forecast_df.columns:
+                band = self._pooled_band(
+                    bands_used,
+                    forecast_df['data_previsao'],
+                    forecast_df['limite_inferior'],
+                    forecast_df['limite_superior']
+                )
+                band.set_color(color)
+                band.set_alpha(0.2)
+                band.set_visible(True)
+                bands_used += 1
+        self._hide_unused(self.forecast_lines, lines_used)
+        self._hide_unused(self.forecast_bands, bands_used)
+
+        self.ax.set_title(title)
+        self._rescale()
+        self._update_legend()
+        self._update_layout()
+        self.canvas.draw_idle()
+
+    def clear(self):
+        """
+        Oculta todos os dados do gráfico, mantendo a figura para as próximas seleções.
+        """
+        for artists in (self.history_lines, self.forecast_lines, self.forecast_bands):
+            self._hide_unused(artists, 0)
+        self.ax.set_title("")
+        legend = self.ax.get_legend()
+        if legend is not None:
+            legend.remove()
+        self.canvas.draw_idle()
+
+    def destroy(self):
+        """
+        Libera a figura, o canvas e a barra de ferramentas. Pode ser chamado mais de uma vez.
+        """
+        if self.canvas is None:
+            return
+        self.toolbar.destroy()
+        self.canvas.get_tk_widget().destroy()
+        self.fig.clear()
+        self.history_lines.clear()
+        self.forecast_lines.clear()
+        self.forecast_bands.clear()
+        self.canvas = None
+        self.toolbar = None
+        self.fig = None
+        self.ax = None
+
+    def _pooled_line(self, pool: list, index: int, **style):
+        """
+        Retorna a linha de posição 'index' do conjunto, criando-a com o estilo informado se necessário.
+        """
+        if index < len(pool):
+            return pool[index]
+        line, = self.ax.plot([], [], **style)
+        pool.append(line)
+        return line
+
+    def _pooled_band(self, index: int, x, lower, upper):
+        """
+        Atualiza (ou cria) a faixa de confiança de posição 'index' com os novos limites.
+        """
+        if index < len(self.forecast_bands):
+            band = self.forecast_bands[index]
+            # Matplotlib >= 3.10 permite trocar os dados da faixa no lugar
+            if hasattr(band, "set_data"):
+                band.set_data(x, lower, upper)
+                return band
+            band.remove()
+            self.forecast_bands[index] = self.ax.fill_between(x, lower, upper)
+            return self.forecast_bands[index]
+        band = self.ax.fill_between(x, lower, upper)
+        self.forecast_bands.append(band)
+        return band
+
+    @staticmethod
+    def _hide_unused(pool: list, used: int):
+        """
+        Oculta os artistas do conjunto a partir da posição 'used'.
+        """
+        for artist in pool[used:]:
+            artist.set_visible(False)
+
+    def _rescale(self):
+        """
+        Recalcula os limites dos eixos considerando apenas os artistas visíveis
+        (relim não considera as faixas de confiança, incluídas à parte).
+        """
+        self.ax.relim(visible_only=True)
+        for band in self.forecast_bands:
+            if band.get_visible():
+                self.ax.update_datalim(band.get_datalim(self.ax.transData))
+        self.ax.autoscale_view()
+
+    def _update_layout(self):
+        """
+        Reajusta as margens (tight_layout) apenas quando a largura dos rótulos do eixo y pode
+        ter mudado, isto é, quando muda a ordem de grandeza ou o sinal dos limites. O ajuste
+        custa quase tanto quanto o próprio desenho e é desnecessário entre seleções parecidas.
+        """
+        ymin, ymax = self.ax.get_ylim()
+        magnitude = max(abs(ymin), abs(ymax))
+        key = (int(np.floor(np.log10(magnitude))) if magnitude > 0 else 0, ymin < 0)
+        if key != self.layout_key:
+            self.fig.tight_layout()
+            self.layout_key = key
+
+    def _update_legend(self):
+        """
+        Refaz a legenda com as linhas visíveis, nas cores do tema atual.
+        """
+        handles = [line for line in self.history_lines + self.forecast_lines if line.get_visible()]
+        legend = self.ax.get_legend()
+        if legend is not None:
+            legend.remove()
+        if not handles:
+            return
+        bg_color, _, text_color = THEME_COLORS[self.appearance_mode]
+        legend = self.ax.legend(handles=handles)
+        legend.get_frame().set_facecolor(bg_color) # Adiciona cor de fundo à legenda
+        for text in legend.get_texts():
+            text.set_color(text_color)
+
+    def _apply_theme(self):
+        """
+        Aplica as cores do modo de aparência atual, se ele mudou desde o último desenho.
+        """
+        appearance_mode = "Dark" if customtkinter.get_appearance_mode() == "Dark" else "Light"
+        if appearance_mode == self.appearance_mode:
+            return
+        self.appearance_mode = appearance_mode
+        bg_color, grid_color, text_color = THEME_COLORS[appearance_mode]
+
+        self.fig.set_facecolor(bg_color)
+        self.ax.set_facecolor(bg_color)
+        self.ax.tick_params(axis='x', colors=text_color)
+        self.ax.tick_params(axis='y', colors=text_color)
+        for spine in self.ax.spines.values():
+            spine.set_edgecolor(text_color)
+        self.ax.title.set_color(text_color)
+        self.ax.xaxis.label.set_color(text_color)
+        self.ax.yaxis.label.set_color(text_color)
+        self.ax.grid(True, color=grid_color, linestyle='--', alpha=0.5)
+
+        # Estiliza a barra de ferramentas para combinar com o tema
+        self.toolbar.config(background=bg_color)
+        for button in self.toolbar.winfo_children():
+            button.config(background=bg_color)
+
 def create_forecast_chart(historical_data: pd.DataFrame, list_of_forecast_dfs: list[pd.DataFrame], title: str, master_frame: any) -> FigureCanvasTkAgg:
     """
     Cria um gráfico interativo mostrando dados históricos e previsões de múltiplos cenários.
 
+    Mantido por compatibilidade: o gráfico (ForecastChart) é criado na primeira chamada para
+    o frame e reaproveitado nas seguintes, que apenas atualizam seus dados.
+
     Args:
         historical_data (pd.DataFrame): DataFrame com dados históricos (colunas 'data', 'valor').
         list_of_forecast_dfs (list[pd.DataFrame]): Lista de DataFrames, onde cada um contém dados de previsão
@@ -21,89 +277,11 @@ def create_forecast_chart(historical_data: pd.DataFrame, list_of_forecast_dfs: l
         master_frame (any): O frame CustomTkinter onde o gráfico será incorporado.
 
     Returns:
-        FigureCanvasTkAgg: O objeto canvas do Matplotlib para ser empacotado na GUI.
+        FigureCanvasTkAgg: O objeto canvas do Matplotlib já empacotado na GUI.
     """
-    # Limpa o frame mestre de widgets antigos antes de desenhar o novo gráfico
-    for widget in master_frame.winfo_children():
-        widget.destroy()
-
-    logger.info(f"Gerando gráfico para: {title}")
-    
-    # --- Lógica de Cores (permanece a mesma) ---
-    appearance_mode = customtkinter.get_appearance_mode()
-    if appearance_mode == "Dark":
-        bg_color = "#2B2B2B"
-        grid_color = "#474747"
-        text_color = "white"
-    else: # "Light"
-        bg_color = "#EBEBEB"
-        grid_color = "#D9D9D9"
-        text_color = "black"
-
-    # --- Criação do Gráfico (Estilo Orientado a Objetos) ---
-    # ALTERADO: Usamos Figure() em vez de plt.subplots() para melhor integração
-    fig = Figure(figsize=(10, 6), facecolor=bg_color)
-    ax = fig.add_subplot(111)
-    ax.set_facecolor(bg_color)
-
-    # --- Configuração e Plotagem dos Dados (seu código, com pequenas adaptações) ---
-    ax.tick_params(axis='x', colors=text_color, labelsize=9)
-    ax.tick_params(axis='y', colors=text_color, labelsize=9)
-    for spine in ax.spines.values():
-        spine.set_edgecolor(text_color)
-
-    if not historical_data.empty:
-        if 'serie_id' in historical_data.columns and historical_data['serie_id'].nunique() > 1:
-            for serie_id in historical_data['serie_id'].unique():
-                subset = historical_data[historical_data['serie_id'] == serie_id]
-                ax.plot(subset['data'], subset['valor'], label=f'Histórico ({serie_id})', marker='o', markersize=4)
-        else:
-            ax.plot(historical_data['data'], historical_data['valor'], label='Dados Históricos', color='blue', marker='o', markersize=4)
-
-    # Cores para os cenários (usando um colormap mais moderno)
-    colors = plt.cm.get_cmap('plasma', len(list_of_forecast_dfs))
-
-    for i, forecast_df in enumerate(list_of_forecast_dfs):
-        if not forecast_df.empty:
-            scenario_name = forecast_df['nome_cenario'].iloc[0] if 'nome_cenario' in forecast_df.columns else f'Previsão {i+1}'
-            color = colors(i)
-            ax.plot(forecast_df['data_previsao'], forecast_df['valor_previsto'], label=f'Previsão ({scenario_name})', color=color, linestyle='--', marker='x')
-            if 'limite_inferior' in forecast_df.columns and 'limite_superior' in forecast_df.columns:
-                ax.fill_between(
-                    forecast_df['data_previsao'],
-                    forecast_df['limite_inferior'],
-                    forecast_df['limite_superior'],
-                    color=color, alpha=0.2
-                )
-
-    ax.set_title(title, color=text_color)
-    ax.set_xlabel('Data', color=text_color)
-    ax.set_ylabel('Valor', color=text_color)
-    legend = ax.legend()
-    legend.get_frame().set_facecolor(bg_color) # Adiciona cor de fundo à legenda
-    for text in legend.get_texts():
-        text.set_color(text_color)
-        
-    ax.grid(True, color=grid_color, linestyle='--', alpha=0.5)
-    # ALTERADO: fig.autofmt_xdate() é melhor para rotacionar datas
-    fig.autofmt_xdate(rotation=45) 
-    fig.tight_layout()
-
-    # --- NOVO: Integração da Barra de Ferramentas e do Canvas ---
-    
-    # Cria o canvas que desenhará o gráfico
-    canvas = FigureCanvasTkAgg(fig, master=master_frame)
-    canvas_widget = canvas.get_tk_widget()
-    
-    # Cria a barra de ferramentas
-    toolbar = NavigationToolbar2Tk(canvas, master_frame, pack_toolbar=False)
-    toolbar.update()
-    
-    # Estiliza a barra de ferramentas para combinar com o tema
-    toolbar.config(background=bg_color)
-    for button in toolbar.winfo_children():
-        button.config(background=bg_color)
-
-    # Posiciona os widgets na tela
-    toolbar.pack(side="top", fill="x", padx=5)
-    canvas_widget.pack(side="top", fill="both", expand=True)
\ No newline at end of file
+    chart = getattr(master_frame, "forecast_chart", None)
+    if chart is None or chart.canvas is None:
+        chart = ForecastChart(master_frame)
+        master_frame.forecast_chart = chart
+    chart.update(historical_data, list_of_forecast_dfs, title)
+    return chart.canvas
@@ -1,7 +1,11 @@
+import csv
 import pandas as pd
 import logging
 from pathlib import Path
 
+from modules.results_processor import RESULT_COLUMNS
+from persistence.sqlite_adapter import SqliteAdapter
+
 logger = logging.getLogger(__name__)
 
 def export_dataframe_to_csv(df: pd.DataFrame, file_path: Path) -> bool:
@@ -47,3 +51,206 @@ def export_dataframe_to_excel(df: pd.DataFrame, file_path: Path) -> bool:
         return False
 
 
+# --- Exportação em fluxo direto do banco de resultados --- #
+
+# Linhas lidas do cursor (e gravadas) por vez nas exportações em fluxo
+EXPORT_CHUNK_SIZE = 10000
+
+# Limite de linhas de uma planilha do Excel (incluindo o cabeçalho)
+EXCEL_MAX_ROWS = 1048576
+
+def build_results_query(scenarios: list = None, start_date=None, end_date=None, latest_only: bool = False) -> tuple:
+    """
+    Monta a consulta dos resultados a exportar, no layout de RESULT_COLUMNS.
+
+    Args:
+        scenarios (list, optional): Nomes dos cenários a incluir. Todos se vazio.
+        start_date (date | str, optional): Inclui apenas execuções a partir desta data.
+        end_date (date | str, optional): Inclui apenas execuções até esta data (inclusive).
+        latest_only (bool): Inclui apenas a execução mais recente de cada cenário.
+
+    Returns:
+        tuple: (sql, parâmetros).
+    """
+    point_columns = ("data_previsao", "valor_previsto", "limite_inferior", "limite_superior")
+    select = ", ".join(f"p.{col}" if col in point_columns else f"e.{col}" for col in RESULT_COLUMNS)
+
+    conditions = []
+    params = []
+    if scenarios:
+        conditions.append(f"e.nome_cenario IN ({', '.join('?' for _ in scenarios)})")
+        params.extend(scenarios)
+    # Intervalo sobre o texto de data_execucao ('AAAA-MM-DD...', com 'T' ou espaço), usando o índice
+    if start_date:
+        conditions.append("e.data_execucao >= ?")
+        params.append(str(start_date)[:10])
+    if end_date:
+        conditions.append("e.data_execucao < date(?, '+1 day')")
+        params.append(str(end_date)[:10])
+    if latest_only:
+        conditions.append("""e.id = (
+            SELECT x.id FROM execucoes x
+            WHERE x.nome_cenario = e.nome_cenario
+            ORDER BY x.data_execucao DESC, x.id DESC
+            LIMIT 1
+        )""")
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"""
+        SELECT {select}
+        FROM execucoes e
+        JOIN pontos_previsao p ON p.execucao_id = e.id
+        {where}
+        ORDER BY e.data_execucao DESC, e.id DESC, p.data_previsao
+    """
+    return sql, tuple(params)
+
+def check_results_db(results_db_path) -> None:
+    """
+    Verifica se o banco de resultados existe e tem a tabela 'execucoes', sem criá-lo.
+
+    Raises:
+        FileNotFoundError: Se o arquivo do banco não existir.
+        ValueError: Se o banco não tiver a tabela 'execucoes'.
+    """
+    if not Path(results_db_path).is_file():
+        raise FileNotFoundError(f"Banco de resultados não encontrado: {results_db_path}")
+    with SqliteAdapter(str(results_db_path), persistent=False) as adapter:
+        found = adapter.query("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'execucoes'")
+    if not found:
+        raise ValueError(f"O banco {results_db_path} não contém resultados (tabela 'execucoes' inexistente).")
+
+def iter_results_chunks(results_db_path, chunk_size: int = EXPORT_CHUNK_SIZE, **filters):
+    """
+    Lê os resultados do banco em blocos, sem carregar a tabela inteira em memória.
+
+    Args:
+        results_db_path (Path): Caminho para o banco de dados de resultados.
+        chunk_size (int): Quantidade de linhas por bloco.
+        **filters: Filtros aceitos por build_results_query.
+
+    Yields:
+        list: Blocos de até 'chunk_size' tuplas na ordem de RESULT_COLUMNS.
+    """
+    check_results_db(results_db_path)
+    sql, params = build_results_query(**filters)
+    # Conexão própria: a exportação roda em uma thread de curta duração
+    with SqliteAdapter(str(results_db_path), persistent=False, tune_storage=True) as adapter:
+        cursor = adapter.connection.cursor()
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [tuple(row) for row in rows]
+
+def stream_results_to_csv(results_db_path, file_path: Path, chunk_size: int = EXPORT_CHUNK_SIZE, **filters) -> int:
+    """
+    Exporta os resultados para CSV gravando cada bloco do cursor diretamente no arquivo.
+
+    Args:
+        results_db_path (Path): Caminho para o banco de dados de resultados.
+        file_path (Path): Caminho do arquivo CSV de saída.
+        chunk_size (int): Quantidade de linhas lidas e gravadas por vez.
+        **filters: Filtros aceitos por build_results_query.
+
+    Returns:
+        int: Quantidade de linhas exportadas.
+    """
+    check_results_db(results_db_path)  # Antes de criar o arquivo de saída
+    total = 0
+    with open(file_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(RESULT_COLUMNS)
+        for rows in iter_results_chunks(results_db_path, chunk_size, **filters):
+            writer.writerows(rows)
+            total += len(rows)
+    logger.info(f"{total} resultados exportados para CSV: {file_path}")
+    return total
+
+def stream_results_to_excel(results_db_path, file_path: Path, chunk_size: int = EXPORT_CHUNK_SIZE, **filters) -> int:
+    """
+    Exporta os resultados para Excel com o modo somente escrita do openpyxl, que grava
+    as linhas em fluxo com memória constante. Resultados maiores que o limite de uma
+    planilha continuam em planilhas seguintes.
+
+    Args:
+        results_db_path (Path): Caminho para o banco de dados de resultados.
+        file_path (Path): Caminho do arquivo Excel de saída.
+        chunk_size (int): Quantidade de linhas lidas por vez.
+        **filters: Filtros aceitos por build_results_query.
+
+    Returns:
+        int: Quantidade de linhas exportadas.
+    """
+    from openpyxl import Workbook
+
+    check_results_db(results_db_path)  # Antes de criar o arquivo de saída
+    workbook = Workbook(write_only=True)
+    sheet = None
+    sheet_rows = EXCEL_MAX_ROWS
+    total = 0
+    for rows in iter_results_chunks(results_db_path, chunk_size, **filters):
+        for row in rows:
+            if sheet_rows >= EXCEL_MAX_ROWS:
+                sheet = workbook.create_sheet(title="resultados" if sheet is None else f"resultados_{len(workbook.worksheets) + 1}")
+                sheet.append(RESULT_COLUMNS)
+                sheet_rows = 1
+            sheet.append(row)
+            sheet_rows += 1
+        total += len(rows)
+
+    if sheet is None:
+        workbook.create_sheet(title="resultados").append(RESULT_COLUMNS)
+    workbook.save(file_path)
+    logger.info(f"{total} resultados exportados para Excel: {file_path}")
+    return total
+
+def stream_results_to_parquet(results_db_path, file_path: Path, chunk_size: int = EXPORT_CHUNK_SIZE, **filters) -> int:
+    """
+    Exporta os resultados para Parquet, gravando um grupo de linhas por bloco do cursor.
+
+    As datas de execução e de previsão são gravadas como timestamp/data e as métricas
+    como float. Requer o pacote opcional 'pyarrow'.
+
+    Args:
+        results_db_path (Path): Caminho para o banco de dados de resultados.
+        file_path (Path): Caminho do arquivo Parquet de saída.
+        chunk_size (int): Quantidade de linhas por grupo de linhas do arquivo.
+        **filters: Filtros aceitos por build_results_query.
+
+    Returns:
+        int: Quantidade de linhas exportadas.
+
+    Raises:
+        ImportError: Se o pyarrow não estiver instalado.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("A exportação para Parquet requer o pacote 'pyarrow' (pip install pyarrow).") from e
+
+    check_results_db(results_db_path)  # Antes de criar o arquivo de saída
+    float_columns = ("valor_previsto", "limite_inferior", "limite_superior", "rmse", "mae", "mape")
+    schema = pa.schema([
+        (col,
+         pa.float64() if col in float_columns
+         else pa.timestamp("us") if col == "data_execucao"
+         else pa.date32() if col == "data_previsao"
+         else pa.string())
+        for col in RESULT_COLUMNS
+    ])
+
+    total = 0
+    with pq.ParquetWriter(file_path, schema) as writer:
+        for rows in iter_results_chunks(results_db_path, chunk_size, **filters):
+            chunk = pd.DataFrame.from_records(rows, columns=RESULT_COLUMNS)
+            chunk["data_execucao"] = pd.to_datetime(chunk["data_execucao"], format="ISO8601")
+            chunk["data_previsao"] = pd.to_datetime(chunk["data_previsao"], format="ISO8601").dt.date
+            for col in float_columns:
+                chunk[col] = pd.to_numeric(chunk[col], errors="coerce")
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            total += len(rows)
+    logger.info(f"{total} resultados exportados para Parquet: {file_path}")
+    return total
@@ -2,6 +2,7 @@ import pandas as pd
 import logging
 from pathlib import Path
 from persistence.sqlite_adapter import SqliteAdapter
+from persistence.parquet_series_adapter import ParquetSeriesAdapter, is_series_store
 
 # Configura o logger para este módulo
 logger = logging.getLogger(__name__)
@@ -10,9 +11,12 @@ def load_historical_data(serie_id: str, db_path) -> pd.DataFrame:
     """
     Carrega dados históricos de uma série temporal do banco de dados.
 
+    Se 'db_path' for um armazenamento colunar de séries (ver convert_series_to_store), a série
+    é lida do seu arquivo Parquet com memória mapeada, já com os tipos finais.
+
     Args:
         serie_id (str): Identificador da série temporal.
-        db_path (Path): Caminho para o banco de dados SQLite.
+        db_path (Path): Caminho para o banco de dados SQLite ou para o armazenamento colunar.
 
     Returns:
         pd.DataFrame: DataFrame com colunas "data" (datetime) e "valor" (float).
@@ -23,6 +27,16 @@ def load_historical_data(serie_id: str, db_path) -> pd.DataFrame:
     """
     logger.info(f"Carregando dados históricos para a série: {serie_id}")
 
+    if is_series_store(db_path):
+        try:
+            with ParquetSeriesAdapter(str(db_path)) as store:
+                df = store.read_series_frame(serie_id)
+            logger.info(f"Carregados {len(df)} registros para a série {serie_id} (armazenamento colunar)")
+            return df
+        except Exception as e:
+            logger.error(f"Erro ao carregar dados para a série {serie_id}: {e}")
+            raise
+
     # SQL para buscar os dados da série
     sql = """
     SELECT data, valor 
@@ -40,14 +54,7 @@ def load_historical_data(serie_id: str, db_path) -> pd.DataFrame:
                 raise ValueError(f"Nenhum dado encontrado para a série {serie_id}")
 
             # Converte os resultados para DataFrame
-            data = []
-            for row in results:
-                data.append({
-                    "data": row["data"],
-                    "valor": row["valor"]
-                })
-
-            df = pd.DataFrame(data)
+            df = pd.DataFrame.from_records(results, columns=["data", "valor"])
 
             # Converte os tipos de dados
             df["data"] = pd.to_datetime(df["data"])
@@ -87,41 +94,163 @@ def get_series_tables(db_path):
     return series_tables
 
 
+# Tabela com a marca d'água de cada tabela de série já consolidada
+CONTROL_TABLE = "series_consolidada_controle"
+
+# Assinatura de uma tabela de série: quantidade de registros, menor e maior data,
+# soma dos valores e soma dos valores ponderada pela data (detecta valores trocados de lugar)
+_SIGNATURE_COLUMNS = "COUNT(*), MIN(data), MAX(data), TOTAL(valor), TOTAL(valor * julianday(data))"
+
 def consolidate_series(db_path):
     """
     Consolida todas as tabelas de séries em uma única tabela 'series_consolidada'.
+
+    A consolidação é incremental: para cada tabela de origem é guardada uma marca d'água
+    (quantidade de registros, intervalo de datas e somas de verificação) e, a cada chamada,
+    apenas as tabelas alteradas são processadas:
+      - tabelas inalteradas são ignoradas;
+      - tabelas que só receberam datas novas têm apenas essas linhas copiadas;
+      - tabelas alteradas de outra forma têm a série recarregada;
+      - séries cujas tabelas deixaram de existir são removidas.
+    Tudo ocorre em uma única transação.
     """
-    print("Consolidando tabelas de séries em uma tabela única...")
+    if is_series_store(db_path):
+        logger.info("Armazenamento colunar de séries: nada a consolidar.")
+        return True, "Armazenamento colunar de séries não requer consolidação."
+
+    logger.info("Consolidando tabelas de séries em uma tabela única...")
+
+    # Cria (ou migra) a tabela consolidada indexada por (serie_id, data)
+    with SqliteAdapter(str(db_path)) as adapter:
+        adapter.create_series_schema_if_not_exists()
 
     series_tables = get_series_tables(db_path)
     if not series_tables:
         logger.warning("Nenhuma tabela de série encontrada para consolidação.")
         return False, "Nenhuma tabela de série encontrada para consolidação."
 
+    counts = {"inalteradas": 0, "incrementais": 0, "recarregadas": 0, "removidas": 0}
+
     with SqliteAdapter(str(db_path)) as adapter:
-        # Cria tabela consolidada se não existir
-        adapter.execute("""
-            CREATE TABLE IF NOT EXISTS series_consolidada (
-                serie_id TEXT,
-                data TEXT,
-                valor REAL
-            )
-        """)
-
-        # Limpa dados antigos
-        adapter.execute("DELETE FROM series_consolidada")
-
-        # Copia dados das tabelas
-        for table in series_tables:
-            adapter.execute(f"""
-                INSERT INTO series_consolidada (serie_id, data, valor)
-                SELECT '{table}', data, valor
-                FROM {table}
+        with adapter.transaction() as cursor:
+            # Cria tabela de controle se não existir
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {CONTROL_TABLE} (
+                    tabela TEXT PRIMARY KEY,
+                    n_registros INTEGER NOT NULL,
+                    data_min TEXT,
+                    data_max TEXT,
+                    soma_valores REAL,
+                    soma_ponderada REAL
+                )
             """)
 
-        print(f"{len(series_tables)} tabelas consolidadas na tabela 'series_consolidada'.")
-        print("Consolidação concluída.")
-        return True, "Consolidação concluída com sucesso."
+            watermarks = {
+                row[0]: tuple(row[1:])
+                for row in cursor.execute(
+                    f"SELECT tabela, n_registros, data_min, data_max, soma_valores, soma_ponderada FROM {CONTROL_TABLE}"
+                )
+            }
+            if not watermarks:
+                # Primeira consolidação incremental: descarta cópias anteriores sem marca d'água
+                cursor.execute("DELETE FROM series_consolidada")
+
+            for table in series_tables:
+                signature = tuple(cursor.execute(f"SELECT {_SIGNATURE_COLUMNS} FROM {table}").fetchone())
+                previous = watermarks.get(table)
+
+                if previous == signature:
+                    counts["inalteradas"] += 1
+                    continue
+
+                if previous and _is_append_only(cursor, table, previous, signature):
+                    cursor.execute(f"""
+                        INSERT OR REPLACE INTO series_consolidada (serie_id, data, valor)
+                        SELECT ?, data, valor
+                        FROM {table}
+                        WHERE data > ?
+                    """, (table, previous[2]))
+                    counts["incrementais"] += 1
+                else:
+                    cursor.execute("DELETE FROM series_consolidada WHERE serie_id = ?", (table,))
+                    cursor.execute(f"""
+                        INSERT OR REPLACE INTO series_consolidada (serie_id, data, valor)
+                        SELECT ?, data, valor
+                        FROM {table}
+                        WHERE data IS NOT NULL
+                    """, (table,))
+                    counts["recarregadas"] += 1
+
+                cursor.execute(f"""
+                    INSERT OR REPLACE INTO {CONTROL_TABLE}
+                        (tabela, n_registros, data_min, data_max, soma_valores, soma_ponderada)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (table, *signature))
+
+            for table in set(watermarks) - set(series_tables):
+                cursor.execute("DELETE FROM series_consolidada WHERE serie_id = ?", (table,))
+                cursor.execute(f"DELETE FROM {CONTROL_TABLE} WHERE tabela = ?", (table,))
+                counts["removidas"] += 1
+
+    logger.info(f"{len(series_tables)} tabelas verificadas para a tabela 'series_consolidada': {counts}")
+    logger.info("Consolidação concluída.")
+    return True, "Consolidação concluída com sucesso."
+
+def _is_append_only(cursor, table: str, previous: tuple, signature: tuple) -> bool:
+    """
+    Verifica se a tabela apenas recebeu datas posteriores à marca d'água anterior,
+    comparando a assinatura das linhas até a data máxima anterior com a assinatura salva.
+    """
+    n_registros, data_min, data_max = previous[:3]
+    if data_max is None or signature[0] <= n_registros or signature[1] != data_min:
+        return False
+    prefix = cursor.execute(
+        f"SELECT {_SIGNATURE_COLUMNS} FROM {table} WHERE data <= ?", (data_max,)
+    ).fetchone()
+    return tuple(prefix) == previous
+
+def convert_series_to_store(db_path, store_path, serie_ids: list = None) -> dict:
+    """
+    Converte as séries de 'series_consolidada' do banco SQLite para o armazenamento colunar
+    (um arquivo Parquet por série, com datas e valores já tipados).
+
+    Args:
+        db_path (Path): Caminho para o banco de dados de séries (ex.: dados_bcb.db).
+        store_path (Path): Diretório do armazenamento colunar (criado se não existir).
+        serie_ids (list, optional): Séries a converter. Se None, converte todas e remove do
+                                    armazenamento as séries que não existem mais no banco.
+
+    Returns:
+        dict: Quantidade de registros gravados por serie_id.
+
+    Raises:
+        ImportError: Se o pyarrow não estiver instalado.
+    """
+    consolidate_series(db_path)
+    convert_all = not serie_ids
+    serie_ids = serie_ids or get_available_series(db_path)
+    converted = {}
+
+    with ParquetSeriesAdapter(str(store_path)) as store:
+        store.create_schema_if_not_exists()
+        if convert_all:
+            for serie_id in set(store.list_series()) - set(serie_ids):
+                store.delete_series(serie_id)
+                logger.info(f"Série {serie_id} removida do armazenamento colunar.")
+        with SqliteAdapter(str(db_path)) as adapter:
+            for serie_id in serie_ids:
+                rows = adapter.query(
+                    "SELECT data, valor FROM series_consolidada WHERE serie_id = ? ORDER BY data", (serie_id,)
+                )
+                if not rows:
+                    logger.warning(f"Série {serie_id} sem dados; não convertida.")
+                    continue
+                df = pd.DataFrame.from_records(rows, columns=["data", "valor"])
+                converted[serie_id] = store.write_series(serie_id, df)
+                logger.info(f"Série {serie_id} convertida: {converted[serie_id]} registros.")
+
+    logger.info(f"{len(converted)} séries convertidas para o armazenamento colunar em {store_path}.")
+    return converted
 
 def get_available_series(db_path) -> list:
     """
@@ -134,7 +263,22 @@ def get_available_series(db_path) -> list:
         list: Uma lista de strings com os IDs das séries disponíveis.
     """
     logger.info(f"Buscando séries disponíveis em: {db_path}")
-    sql = "SELECT DISTINCT serie_id FROM series_consolidada ORDER BY serie_id"
+    if is_series_store(db_path):
+        with ParquetSeriesAdapter(str(db_path)) as store:
+            return store.list_series()
+
+    # Percorre a chave (serie_id, data) saltando de uma série para a próxima:
+    # uma busca no índice por série, em vez de varrer todas as linhas
+    sql = """
+    WITH RECURSIVE series(serie_id) AS (
+        SELECT MIN(serie_id) FROM series_consolidada
+        UNION ALL
+        SELECT (SELECT MIN(serie_id) FROM series_consolidada WHERE serie_id > series.serie_id)
+        FROM series
+        WHERE series.serie_id IS NOT NULL
+    )
+    SELECT serie_id FROM series WHERE serie_id IS NOT NULL
+    """
     try:
         with SqliteAdapter(str(db_path)) as adapter:
             results = adapter.query(sql)
@@ -1,10 +1,15 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import logging
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import warnings
 
+from utils.run_control import RunCancelled, check_cancelled
+from utils.stage_timer import ETAPA_TEMPO_AJUSTE_FINAL, ETAPA_TEMPO_AJUSTE_TESTE, timed_stage
+
 # Suprime warnings desnecessários dos modelos
 warnings.filterwarnings('ignore')
 
@@ -15,6 +20,12 @@ class BaseModel(ABC):
     """
     Classe base abstrata para todos os modelos de previsão.
     """
+
+    # Indica se backtest() reaproveita o ajuste entre dobras (que então rodam em sequência)
+    reuses_fit = False
+
+    # Indica se o modelo implementa information_criterion (pré-seleção na busca de parâmetros)
+    supports_information_criterion = False
     
     @abstractmethod
     def predict(self, data: pd.DataFrame, horizonte: int, **params) -> pd.DataFrame:
@@ -32,49 +43,81 @@ class BaseModel(ABC):
         """
         pass
 
+    def evaluate_and_forecast(self, train_data: pd.DataFrame, data: pd.DataFrame, horizonte: int,
+                              extend: bool = False, **params) -> tuple:
+        """
+        Gera a previsão de avaliação (a partir de train_data) e a previsão final (a partir de data).
+
+        A implementação padrão executa os dois ajustes independentes em paralelo e ignora
+        'extend'. Apenas os modelos com reuses_fit (ARIMA) o utilizam: sobrescrevem este método
+        para ajustar uma única vez quando extend=True.
+
+        Args:
+            train_data (pd.DataFrame): Dados de treino (histórico sem o período de teste).
+            data (pd.DataFrame): Histórico completo, com colunas 'data' e 'valor'.
+            horizonte (int): Número de períodos a prever.
+            extend (bool): Permite reaproveitar o ajuste de treino na previsão final (modo
+                           "estender"). Padrão False, como o modo padrão "reajustar".
+            **params: Parâmetros específicos do modelo
+
+        Returns:
+            tuple: (previsão sobre o período de teste, previsão final), ambas no formato de predict.
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            test_future = executor.submit(self._timed_predict, ETAPA_TEMPO_AJUSTE_TESTE, train_data, horizonte, **params)
+            final_future = executor.submit(self._timed_predict, ETAPA_TEMPO_AJUSTE_FINAL, data, horizonte, **params)
+            return test_future.result(), final_future.result()
+
+    def _timed_predict(self, etapa: str, data: pd.DataFrame, horizonte: int, **params) -> pd.DataFrame:
+        """
+        Executa predict registrando a subetapa no medidor ativo (ver utils.stage_timer).
+        """
+        with timed_stage(etapa):
+            return self.predict(data, horizonte, **params)
+
+    def backtest(self, data: pd.DataFrame, folds: list, horizonte: int, reuse: bool = True, **params) -> list:
+        """
+        Gera a previsão de cada dobra de um backtesting com origem móvel.
+
+        A implementação padrão ajusta o modelo de novo em cada dobra. Modelos que conseguem
+        reaproveitar o ajuste entre dobras (reuses_fit) sobrescrevem este método.
+
+        Args:
+            data (pd.DataFrame): Série completa, com colunas 'data' e 'valor'.
+            folds (list): Tuplas (inicio_treino, fim_treino, fim_teste), ver build_backtest_folds.
+            horizonte (int): Número de períodos a prever em cada dobra.
+            reuse (bool): Permite reaproveitar o ajuste entre dobras.
+            **params: Parâmetros específicos do modelo
+
+        Returns:
+            list: Uma previsão (no formato de predict) por dobra, na ordem de folds.
+        """
+        forecasts = []
+        for inicio_treino, fim_treino, _ in folds:
+            check_cancelled("backtest")
+            forecasts.append(self.predict(data.iloc[inicio_treino:fim_treino], horizonte, **params))
+        return forecasts
+
 class ArimaModel(BaseModel):
     """
     Implementa previsão usando modelo ARIMA.
     """
+
+    reuses_fit = True
+    supports_information_criterion = True
     
     def predict(self, data: pd.DataFrame, horizonte: int, **params) -> pd.DataFrame:
         """
         Executa previsão ARIMA.
         """
         try:
-            from statsmodels.tsa.arima.model import ARIMA
-            
             logger.info(f"Executando previsão ARIMA para {horizonte} períodos")
             
-            # Parâmetros padrão
-            p = params.get('p', 1)
-            d = params.get('d', 1)
-            q = params.get('q', 1)
-            
-            # Prepara os dados
-            ts = data.set_index('data')['valor']
-            
             # Treina o modelo
-            model = ARIMA(ts, order=(p, d, q))
-            fitted_model = model.fit()
+            fitted_model = self._fit(data, **params)
             
             # Faz a previsão
-            forecast = fitted_model.get_forecast(steps=horizonte)
-            forecast_mean = forecast.predicted_mean
-            forecast_ci = forecast.conf_int()
-            
-            # Gera as datas futuras
-            last_date = data['data'].max()
-            future_dates = pd.date_range(start=last_date + timedelta(days=1), 
-                                       periods=horizonte, freq='D')
-            
-            # Monta o DataFrame de resultado
-            result = pd.DataFrame({
-                'data_previsao': future_dates,
-                'valor_previsto': forecast_mean.values,
-                'limite_inferior': forecast_ci.iloc[:, 0].values,
-                'limite_superior': forecast_ci.iloc[:, 1].values
-            })
+            result = self._forecast(fitted_model, data['data'].max(), horizonte)
             
             logger.info("Previsão ARIMA concluída com sucesso")
             return result
@@ -83,6 +126,111 @@ class ArimaModel(BaseModel):
             logger.error(f"Erro na previsão ARIMA: {e}")
             raise
 
+    def evaluate_and_forecast(self, train_data: pd.DataFrame, data: pd.DataFrame, horizonte: int,
+                              extend: bool = False, **params) -> tuple:
+        """
+        Ajusta o ARIMA uma única vez sobre train_data e, para a previsão final, estende o
+        modelo de espaço de estados com as observações de teste sem reestimar os parâmetros.
+        """
+        if not extend:
+            return super().evaluate_and_forecast(train_data, data, horizonte, extend=False, **params)
+
+        try:
+            logger.info(f"Executando avaliação ARIMA (ajuste único com extensão) para {horizonte} períodos")
+
+            with timed_stage(ETAPA_TEMPO_AJUSTE_TESTE):
+                fitted_model = self._fit(train_data, **params)
+                forecast_test_df = self._forecast(fitted_model, train_data['data'].max(), horizonte)
+
+            with timed_stage(ETAPA_TEMPO_AJUSTE_FINAL):
+                new_data = data.iloc[len(train_data):]
+                try:
+                    # Filtra as novas observações com os parâmetros já estimados (sem novo ajuste)
+                    extended_model = fitted_model.append(new_data.set_index('data')['valor'], refit=False)
+                except Exception as e:
+                    logger.warning(f"Não foi possível estender o ajuste ARIMA ({e}). Reajustando com todos os dados.")
+                    extended_model = self._fit(data, **params)
+                final_forecast_df = self._forecast(extended_model, data['data'].max(), horizonte)
+
+            logger.info("Avaliação ARIMA concluída com sucesso")
+            return forecast_test_df, final_forecast_df
+
+        except Exception as e:
+            logger.error(f"Erro na previsão ARIMA: {e}")
+            raise
+
+    def backtest(self, data: pd.DataFrame, folds: list, horizonte: int, reuse: bool = True, **params) -> list:
+        """
+        Ajusta o ARIMA apenas na primeira dobra; nas seguintes, os parâmetros estimados são
+        reaproveitados e o modelo só filtra os dados de treino da dobra: estendido com as
+        novas observações (janela expansiva) ou reaplicado à nova janela (deslizante).
+        """
+        if not reuse:
+            return super().backtest(data, folds, horizonte, reuse=False, **params)
+
+        ts = data.set_index('data')['valor']
+        forecasts = []
+        fitted_model, fitted_range = None, None
+        for inicio_treino, fim_treino, _ in folds:
+            check_cancelled("backtest ARIMA")
+            if fitted_model is None:
+                fitted_model = self._fit(data.iloc[inicio_treino:fim_treino], **params)
+            else:
+                try:
+                    if inicio_treino == fitted_range[0] and fim_treino > fitted_range[1]:
+                        fitted_model = fitted_model.append(ts.iloc[fitted_range[1]:fim_treino], refit=False)
+                    else:
+                        fitted_model = fitted_model.apply(ts.iloc[inicio_treino:fim_treino], refit=False)
+                except Exception as e:
+                    logger.warning(f"Não foi possível reaproveitar o ajuste ARIMA ({e}). Reajustando a dobra.")
+                    fitted_model = self._fit(data.iloc[inicio_treino:fim_treino], **params)
+            fitted_range = (inicio_treino, fim_treino)
+            forecasts.append(self._forecast(fitted_model, ts.index[fim_treino - 1], horizonte))
+        return forecasts
+
+    def information_criterion(self, data: pd.DataFrame, **params) -> float:
+        """
+        Ajusta o ARIMA aos dados e retorna o AIC, sem gerar previsões.
+        """
+        return float(self._fit(data, **params).aic)
+
+    def _fit(self, data: pd.DataFrame, **params):
+        """
+        Ajusta o ARIMA aos dados e retorna o resultado do statsmodels.
+        """
+        from statsmodels.tsa.arima.model import ARIMA
+
+        # Parâmetros padrão
+        p = params.get('p', 1)
+        d = params.get('d', 1)
+        q = params.get('q', 1)
+
+        # Prepara os dados
+        ts = data.set_index('data')['valor']
+
+        model = ARIMA(ts, order=(p, d, q))
+        return model.fit()
+
+    def _forecast(self, fitted_model, last_date, horizonte: int) -> pd.DataFrame:
+        """
+        Gera a previsão e o intervalo de confiança a partir de um ARIMA ajustado.
+        """
+        forecast = fitted_model.get_forecast(steps=horizonte)
+        forecast_mean = forecast.predicted_mean
+        forecast_ci = forecast.conf_int()
+
+        # Gera as datas futuras
+        future_dates = pd.date_range(start=last_date + timedelta(days=1), 
+                                   periods=horizonte, freq='D')
+
+        # Monta o DataFrame de resultado
+        return pd.DataFrame({
+            'data_previsao': future_dates,
+            'valor_previsto': forecast_mean.values,
+            'limite_inferior': forecast_ci.iloc[:, 0].values,
+            'limite_superior': forecast_ci.iloc[:, 1].values
+        })
+
 class ProphetModel(BaseModel):
     """
     Implementa previsão usando modelo Prophet.
@@ -150,9 +298,10 @@ class RandomForestModel(BaseModel):
             n_estimators = params.get('n_estimators', 100)
             max_depth = params.get('max_depth', 10)
             random_state = params.get('random_state', 42)
+            n_lags = params.get('n_lags', 5)
             
             # Prepara os dados para aprendizado supervisionado
-            X, y = self._create_features(data)
+            X, y = self._create_features(data, n_lags)
             
             # Treina o modelo
             model = RandomForestRegressor(
@@ -161,26 +310,34 @@ class RandomForestModel(BaseModel):
                 random_state=random_state
             )
             model.fit(X, y)
+
+            # Matriz (árvores x nós) com o valor de cada nó de cada árvore, para obter
+            # a saída de todas as árvores com uma única chamada por passo
+            tree_values = self._stack_tree_values(model)
             
             # Faz previsões iterativas
             predictions = []
             confidence_intervals = []
             
             # Usa os últimos valores como ponto de partida
-            last_values = data['valor'].tail(5).values  # Últimos 5 valores como features
+            last_values = data['valor'].tail(n_lags).values  # Últimos n_lags valores como features
             last_date = data['data'].max()
             
             for i in range(horizonte):
+                # Permite interromper horizontes longos sem esperar o fim do laço
+                check_cancelled("previsão RandomForest")
+
                 # Cria features para a previsão
                 current_date = last_date + timedelta(days=i+1)
                 features = self._create_single_prediction_features(last_values, current_date)
                 
-                # Faz a previsão
-                pred = model.predict([features])[0]
+                # Saídas de todas as árvores; a previsão do ensemble é a média delas
+                tree_predictions = self._predict_trees(model, tree_values, features)
+                # Soma acumulada na ordem das árvores, como em RandomForestRegressor.predict
+                pred = np.cumsum(tree_predictions)[-1] / len(tree_predictions)
                 predictions.append(pred)
                 
                 # Calcula intervalo de confiança usando as árvores individuais
-                tree_predictions = [tree.predict([features])[0] for tree in model.estimators_]
                 ci_lower = np.percentile(tree_predictions, 2.5)
                 ci_upper = np.percentile(tree_predictions, 97.5)
                 confidence_intervals.append((ci_lower, ci_upper))
@@ -202,30 +359,53 @@ class RandomForestModel(BaseModel):
             
             logger.info("Previsão RandomForest concluída com sucesso")
             return result
-            
+
+        except RunCancelled:
+            raise
         except Exception as e:
             logger.error(f"Erro na previsão RandomForest: {e}")
             raise
     
-    def _create_features(self, data: pd.DataFrame):
+    def _create_features(self, data: pd.DataFrame, n_lags: int = 5):
         """
         Cria features para o modelo RandomForest.
+
+        Cada linha i (a partir de n_lags) contém os n_lags valores anteriores seguidos
+        das features de data de i; o alvo é o valor em i. As janelas de lags são views
+        deslizantes sobre o array de valores e as features de data são extraídas de
+        forma colunar do DatetimeIndex, sem laço em Python.
         """
-        # Cria lags (valores passados)
-        lag_features = []
-        target = []
-        
-        for i in range(5, len(data)):  # Usa 5 lags
-            # Features: últimos 5 valores + features de data
-            lags = data['valor'].iloc[i-5:i].values
-            date_features = self._extract_date_features(data['data'].iloc[i])
-            features = np.concatenate([lags, date_features])
-            
-            lag_features.append(features)
-            target.append(data['valor'].iloc[i])
-        
-        return np.array(lag_features), np.array(target)
+        values = data['valor'].to_numpy(dtype=float)
+        n_rows = len(values) - n_lags
+        if n_rows <= 0:
+            return np.empty((0, n_lags + 4)), np.empty(0)
+
+        # Janela j = values[j:j+n_lags]; a última janela não tem alvo correspondente
+        lags = sliding_window_view(values, n_lags)[:n_rows]
+        date_features = self._extract_date_features_columnar(pd.DatetimeIndex(data['data'].iloc[n_lags:]))
+
+        return np.hstack([lags, date_features]), values[n_lags:].copy()
     
+    def _stack_tree_values(self, model) -> np.ndarray:
+        """
+        Empilha os valores dos nós de todas as árvores em uma matriz (n_estimators, max_nós).
+        """
+        node_values = [tree.tree_.value[:, 0, 0] for tree in model.estimators_]
+        stacked = np.zeros((len(node_values), max(len(v) for v in node_values)))
+        for i, values in enumerate(node_values):
+            stacked[i, :len(values)] = values
+        return stacked
+
+    def _predict_trees(self, model, tree_values: np.ndarray, features) -> np.ndarray:
+        """
+        Retorna a previsão de cada árvore para um vetor de features.
+
+        model.apply devolve, em uma única chamada, a folha alcançada em cada árvore;
+        o valor da folha é lido da matriz empilhada por _stack_tree_values.
+        """
+        leaves = model.apply(np.asarray(features, dtype=np.float32).reshape(1, -1))[0]
+        return tree_values[np.arange(len(leaves)), leaves]
+
     def _create_single_prediction_features(self, last_values, date):
         """
         Cria features para uma única previsão.
@@ -233,6 +413,17 @@ class RandomForestModel(BaseModel):
         date_features = self._extract_date_features(date)
         return np.concatenate([last_values, date_features])
     
+    def _extract_date_features_columnar(self, dates: pd.DatetimeIndex):
+        """
+        Extrai as mesmas features de _extract_date_features para todas as datas de uma vez.
+        """
+        return np.column_stack([
+            dates.month,
+            dates.day,
+            dates.weekday,
+            dates.year % 100  # Últimos 2 dígitos do ano
+        ]).astype(float)
+
     def _extract_date_features(self, date):
         """
         Extrai features da data.
@@ -244,12 +435,127 @@ class RandomForestModel(BaseModel):
             date.year % 100  # Últimos 2 dígitos do ano
         ])
 
+class GlobalRandomForestModel(RandomForestModel):
+    """
+    Implementa previsão usando um único RandomForest global, treinado uma vez com as
+    observações de várias séries.
+
+    Cada série é padronizada (média e desvio padrão) e identificada por um código numérico
+    na primeira coluna das features; o alvo é o valor padronizado. A previsão recursiva
+    avança um passo de todas as séries por vez, com uma única chamada à floresta por passo.
+    """
+
+    def predict(self, data: pd.DataFrame, horizonte: int, **params) -> pd.DataFrame:
+        """
+        Executa previsão para uma única série (floresta treinada apenas com ela).
+        """
+        return self.predict_many({0: data}, {0: horizonte}, **params)[0]
+
+    def predict_many(self, series: dict, horizontes: dict, **params) -> dict:
+        """
+        Treina uma floresta com todas as séries e prevê o horizonte de cada uma.
+
+        Args:
+            series (dict): {chave: DataFrame com colunas 'data' e 'valor'}.
+            horizontes (dict): {chave: número de períodos a prever}, com as mesmas chaves.
+            **params: n_estimators, max_depth, random_state, n_lags e n_jobs (padrão: -1,
+                      todos os núcleos no ajuste).
+
+        Returns:
+            dict: {chave: DataFrame no formato de predict}.
+
+        Raises:
+            ValueError: Se alguma série tiver menos que n_lags + 1 pontos.
+        """
+        try:
+            from sklearn.ensemble import RandomForestRegressor
+
+            n_estimators = params.get('n_estimators', 100)
+            max_depth = params.get('max_depth', 10)
+            random_state = params.get('random_state', 42)
+            n_lags = params.get('n_lags', 5)
+            n_jobs = params.get('n_jobs', -1)
+
+            keys = list(series)
+            logger.info(f"Executando previsão RandomForestGlobal para {len(keys)} séries")
+
+            # Matriz de features empilhada: [código da série, lags padronizados, features de data]
+            X_parts, y_parts, scales = [], [], []
+            for code, key in enumerate(keys):
+                data = series[key]
+                if len(data) <= n_lags:
+                    raise ValueError(f"Série '{key}' com {len(data)} pontos; o modelo global requer ao menos {n_lags + 1}.")
+                values = data['valor'].to_numpy(dtype=float)
+                mean, std = values.mean(), values.std()
+                std = std if std > 0 else 1.0
+                scales.append((mean, std))
+                X, y = self._create_features(data.assign(valor=(values - mean) / std), n_lags)
+                X_parts.append(np.column_stack([np.full(len(X), code, dtype=float), X]))
+                y_parts.append(y)
+
+            model = RandomForestRegressor(
+                n_estimators=n_estimators,
+                max_depth=max_depth,
+                random_state=random_state,
+                n_jobs=n_jobs
+            )
+            model.fit(np.vstack(X_parts), np.concatenate(y_parts))
+            tree_values = self._stack_tree_values(model)
+
+            # Previsão recursiva em lote: cada passo prevê todas as séries de uma vez
+            max_horizonte = max(horizontes[key] for key in keys)
+            codes = np.arange(len(keys), dtype=float)
+            last_values = np.vstack([
+                (series[key]['valor'].tail(n_lags).to_numpy(dtype=float) - mean) / std
+                for key, (mean, std) in zip(keys, scales)
+            ])
+            last_dates = pd.DatetimeIndex([series[key]['data'].max() for key in keys])
+            predictions = np.empty((len(keys), max_horizonte))
+            lower = np.empty_like(predictions)
+            upper = np.empty_like(predictions)
+            tree_index = np.arange(len(model.estimators_))
+
+            for i in range(max_horizonte):
+                check_cancelled("previsão RandomForestGlobal")
+                dates = last_dates + timedelta(days=i + 1)
+                features = np.column_stack([codes, last_values, self._extract_date_features_columnar(dates)])
+                leaves = model.apply(features.astype(np.float32))
+                tree_predictions = tree_values[tree_index, leaves]  # (séries, árvores)
+                step = tree_predictions.mean(axis=1)
+                predictions[:, i] = step
+                lower[:, i], upper[:, i] = np.percentile(tree_predictions, [2.5, 97.5], axis=1)
+                last_values = np.column_stack([last_values[:, 1:], step])
+
+            results = {}
+            for code, (key, (mean, std)) in enumerate(zip(keys, scales)):
+                horizonte = horizontes[key]
+                results[key] = pd.DataFrame({
+                    'data_previsao': pd.date_range(start=last_dates[code] + timedelta(days=1),
+                                                   periods=horizonte, freq='D'),
+                    'valor_previsto': predictions[code, :horizonte] * std + mean,
+                    'limite_inferior': lower[code, :horizonte] * std + mean,
+                    'limite_superior': upper[code, :horizonte] * std + mean
+                })
+
+            logger.info("Previsão RandomForestGlobal concluída com sucesso")
+            return results
+
+        except RunCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"Erro na previsão RandomForestGlobal: {e}")
+            raise
+
+# Modelos globais: os cenários de um mesmo modelo global e mesmos parâmetros são executados
+# juntos (ver run_global_scenarios), com um único ajuste para todas as séries
+GLOBAL_MODELS = ("RandomForestGlobal",)
+
 def forecast_factory(modelo_nome: str) -> BaseModel:
     """
     Fábrica de modelos de previsão.
     
     Args:
-        modelo_nome (str): Nome do modelo ('ARIMA', 'Prophet', 'RandomForest')
+        modelo_nome (str): Nome do modelo ('ARIMA', 'Prophet', 'RandomForest', 'RandomForestGlobal')
     
     Returns:
         BaseModel: Instância do modelo solicitado
@@ -260,7 +566,8 @@ def forecast_factory(modelo_nome: str) -> BaseModel:
     modelos = {
         "ARIMA": ArimaModel(),
         "Prophet": ProphetModel(),
-        "RandomForest": RandomForestModel()
+        "RandomForest": RandomForestModel(),
+        "RandomForestGlobal": GlobalRandomForestModel()
     }
     
     modelo = modelos.get(modelo_nome)
@@ -56,3 +56,81 @@ def calculate_metrics(actuals: pd.Series, predictions: pd.Series) -> dict:
 
 
 
+
+# Tipos de janela de treino do backtesting (chave "janela" da configuração de backtest)
+JANELA_EXPANSIVA = "expansiva"    # Treino sempre desde o início da série
+JANELA_DESLIZANTE = "deslizante"  # Treino com tamanho fixo, deslizando com a origem
+JANELAS_BACKTEST = (JANELA_EXPANSIVA, JANELA_DESLIZANTE)
+
+def build_backtest_folds(n_obs: int, horizonte: int, dobras: int, passo: int = None,
+                         janela: str = JANELA_EXPANSIVA, tamanho_janela: int = None,
+                         min_treino: int = 1) -> list:
+    """
+    Define as dobras de um backtesting com origem móvel.
+
+    A última dobra testa os 'horizonte' pontos finais da série (como a avaliação de
+    run_single_scenario); cada dobra anterior recua a origem em 'passo' pontos. Dobras
+    sem ao menos 'min_treino' pontos de treino são descartadas.
+
+    Args:
+        n_obs (int): Tamanho da série.
+        horizonte (int): Pontos previstos (e testados) em cada dobra.
+        dobras (int): Quantidade de dobras desejada.
+        passo (int, optional): Distância entre origens consecutivas. Padrão: o horizonte
+                               (períodos de teste sem sobreposição).
+        janela (str): "expansiva" ou "deslizante".
+        tamanho_janela (int, optional): Pontos de treino na janela deslizante (obrigatório nela).
+        min_treino (int): Mínimo de pontos de treino por dobra.
+
+    Returns:
+        list: Tuplas (inicio_treino, fim_treino, fim_teste) em posições da série, da dobra mais
+              antiga para a mais recente; o treino é [inicio_treino, fim_treino) e o teste,
+              [fim_treino, fim_teste).
+
+    Raises:
+        ValueError: Se a configuração for inválida ou nenhuma dobra couber na série.
+    """
+    passo = horizonte if passo is None else passo
+    for name, value in (("horizonte", horizonte), ("dobras", dobras), ("passo", passo), ("min_treino", min_treino)):
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            raise ValueError(f"Valor inválido para '{name}' do backtest: {value!r}. Esperado um inteiro positivo.")
+    if janela not in JANELAS_BACKTEST:
+        raise ValueError(f"Janela de backtest '{janela}' inválida. Use uma de: {list(JANELAS_BACKTEST)}")
+    if janela == JANELA_DESLIZANTE:
+        if isinstance(tamanho_janela, bool) or not isinstance(tamanho_janela, int) or tamanho_janela < min_treino:
+            raise ValueError(f"A janela deslizante requer 'tamanho_janela' inteiro de ao menos {min_treino} pontos.")
+
+    folds = []
+    for k in range(dobras - 1, -1, -1):
+        fim_teste = n_obs - k * passo
+        fim_treino = fim_teste - horizonte
+        inicio_treino = 0 if janela == JANELA_EXPANSIVA else fim_treino - tamanho_janela
+        if inicio_treino < 0 or fim_treino - inicio_treino < min_treino:
+            continue
+        folds.append((inicio_treino, fim_treino, fim_teste))
+
+    if not folds:
+        raise ValueError(f"Dados insuficientes para o backtest: {n_obs} pontos não comportam nenhuma dobra "
+                         f"com horizonte {horizonte} e {min_treino} pontos de treino.")
+    if len(folds) < dobras:
+        logger.warning(f"Apenas {len(folds)} de {dobras} dobras cabem na série de {n_obs} pontos.")
+    return folds
+
+def aggregate_fold_metrics(fold_metrics: list) -> dict:
+    """
+    Resume as métricas das dobras de um backtest.
+
+    Args:
+        fold_metrics (list): Dicionários com 'rmse', 'mae' e 'mape' (ver calculate_metrics).
+
+    Returns:
+        dict: Médias "rmse", "mae" e "mape" (ignorando dobras sem a métrica) e "mape_desvio"
+              (desvio padrão do MAPE entre as dobras, None com menos de duas).
+    """
+    summary = {}
+    for name in ("rmse", "mae", "mape"):
+        values = [m[name] for m in fold_metrics if m.get(name) is not None]
+        summary[name] = float(np.mean(values)) if values else None
+    mapes = [m["mape"] for m in fold_metrics if m.get("mape") is not None]
+    summary["mape_desvio"] = float(np.std(mapes, ddof=1)) if len(mapes) > 1 else None
+    return summary
@@ -0,0 +1,148 @@
+import itertools
+import logging
+import math
+import random
+
+# Configura o logger para este módulo
+logger = logging.getLogger(__name__)
+
+# Métricas aceitas na chave "metrica" da busca; "aic" seleciona apenas pelo critério de informação
+METRICAS_BUSCA = ("rmse", "mae", "mape", "aic")
+
+# Configuração padrão da busca de parâmetros (chave "busca_parametros" do cenário)
+DEFAULT_SEARCH_CONFIG = {
+    "espaco": None,           # {parâmetro: lista de valores}; obrigatório
+    "metrica": "mape",
+    "dobras": 3,              # Dobras de backtest usadas na avaliação dos candidatos
+    "passo": None,            # Distância entre as origens das dobras (padrão: o horizonte)
+    "fator_reducao": 3,       # A cada dobra, mantém 1/fator dos candidatos
+    "max_candidatos": 50,     # Acima disso, sorteia os candidatos da grade
+    "semente": 42,
+    "criterio_informacao": True,  # Pré-seleção por AIC (modelos que o fornecem, ex.: ARIMA)
+    "limiar_aic": 10.0,       # Diferença de AIC acima da qual um candidato é descartado
+}
+
+def search_config(cenario: dict) -> dict:
+    """
+    Valida a chave 'busca_parametros' do cenário e completa-a com os valores padrão.
+
+    Exemplo:
+        busca_parametros:
+          espaco:
+            p: [0, 1, 2]
+            q: [0, 1, 2]
+          metrica: mape
+
+    Args:
+        cenario (dict): Dicionário do cenário.
+
+    Returns:
+        dict: Configuração com as chaves de DEFAULT_SEARCH_CONFIG.
+
+    Raises:
+        ValueError: Se a configuração for inválida.
+    """
+    config = cenario.get("busca_parametros")
+    if not isinstance(config, dict):
+        raise ValueError("A chave 'busca_parametros' deve ser um dicionário com ao menos 'espaco'.")
+    unknown = set(config) - set(DEFAULT_SEARCH_CONFIG)
+    if unknown:
+        raise ValueError(f"Chaves desconhecidas em 'busca_parametros': {sorted(unknown)}. "
+                         f"Disponíveis: {list(DEFAULT_SEARCH_CONFIG)}")
+    config = {**DEFAULT_SEARCH_CONFIG, **config}
+
+    space = config["espaco"]
+    if not isinstance(space, dict) or not space:
+        raise ValueError("'busca_parametros.espaco' deve mapear cada parâmetro a uma lista de valores.")
+    if config["metrica"] not in METRICAS_BUSCA:
+        raise ValueError(f"Métrica de busca '{config['metrica']}' inválida. Use uma de: {list(METRICAS_BUSCA)}")
+    for key in ("dobras", "fator_reducao", "max_candidatos"):
+        value = config[key]
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            raise ValueError(f"Valor inválido para 'busca_parametros.{key}': {value!r}. Esperado um inteiro positivo.")
+    if config["fator_reducao"] < 2:
+        raise ValueError("'busca_parametros.fator_reducao' deve ser ao menos 2.")
+    return config
+
+def build_candidates(space: dict, base: dict = None, max_candidates: int = None, seed: int = None) -> list:
+    """
+    Gera as combinações de parâmetros do espaço de busca (grade completa).
+
+    Valores escalares no espaço são tratados como fixos. Se a grade tiver mais que
+    'max_candidates' combinações, uma amostra aleatória (reprodutível por 'seed') é usada.
+
+    Args:
+        space (dict): {parâmetro: lista de valores}.
+        base (dict, optional): Parâmetros fixos do cenário, sobrepostos pelos do espaço.
+        max_candidates (int, optional): Limite de candidatos.
+        seed (int, optional): Semente da amostragem.
+
+    Returns:
+        list: Dicionários de parâmetros completos, um por candidato.
+    """
+    names = list(space)
+    values = [v if isinstance(v, (list, tuple)) else [v] for v in space.values()]
+    total = math.prod(len(v) for v in values)
+    if total == 0:
+        raise ValueError("O espaço de busca não tem nenhuma combinação (lista de valores vazia).")
+
+    if max_candidates is not None and total > max_candidates:
+        # Sorteia posições da grade sem materializá-la inteira
+        positions = sorted(random.Random(seed).sample(range(total), max_candidates))
+        combos = [_grid_item(values, position) for position in positions]
+        logger.info(f"Espaço de busca com {total} combinações; {max_candidates} sorteadas.")
+    else:
+        combos = list(itertools.product(*values))
+    return [{**(base or {}), **dict(zip(names, combo))} for combo in combos]
+
+def _grid_item(values: list, position: int) -> tuple:
+    """
+    Combinação de posição 'position' da grade (na ordem de itertools.product).
+    """
+    combo = []
+    for options in reversed(values):
+        position, index = divmod(position, len(options))
+        combo.append(options[index])
+    return tuple(reversed(combo))
+
+def prune_by_information_criterion(criteria: list, threshold: float, groups: list = None) -> list:
+    """
+    Seleciona os candidatos cujo critério de informação (ex.: AIC) está a no máximo
+    'threshold' do melhor do seu grupo. Critérios de modelos ajustados sobre dados
+    diferentes (ex.: ordens de diferenciação distintas no ARIMA) não são comparáveis,
+    por isso a comparação é feita dentro de cada grupo.
+
+    Args:
+        criteria (list): Critério de cada candidato (None ou não finito = falha no ajuste).
+        threshold (float): Diferença máxima para o melhor do grupo.
+        groups (list, optional): Grupo de cada candidato. Padrão: todos no mesmo grupo.
+
+    Returns:
+        list: Índices dos candidatos mantidos.
+    """
+    groups = groups or [None] * len(criteria)
+    best = {}
+    for group, value in zip(groups, criteria):
+        if value is not None and math.isfinite(value):
+            best[group] = min(value, best.get(group, math.inf))
+    return [
+        i for i, (group, value) in enumerate(zip(groups, criteria))
+        if value is not None and math.isfinite(value) and value <= best[group] + threshold
+    ]
+
+def select_survivors(scores: dict, reduction_factor: int) -> list:
+    """
+    Mantém a melhor fração (1/reduction_factor, ao menos um) dos candidatos: a poda
+    sucessiva descarta cedo os candidatos claramente piores, sem avaliá-los nas demais dobras.
+
+    Args:
+        scores (dict): {índice do candidato: pontuação (menor é melhor; inf = falhou)}.
+        reduction_factor (int): Fator de redução.
+
+    Returns:
+        list: Índices mantidos, do melhor para o pior. Candidatos que falharam nunca são mantidos,
+              a menos que todos tenham falhado (lista vazia).
+    """
+    valid = sorted((score, i) for i, score in scores.items() if math.isfinite(score))
+    keep = max(1, math.ceil(len(scores) / reduction_factor))
+    return [i for _, i in valid[:keep]]
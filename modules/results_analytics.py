@@ -0,0 +1,323 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from pathlib import Path
+
+from persistence.duckdb_adapter import DuckDbAdapter, duckdb_available
+from persistence.sqlite_adapter import SqliteAdapter
+from modules.series_cache import data_version
+
+# Configura o logger para este módulo
+logger = logging.getLogger(__name__)
+
+# Motores de consulta
+ENGINE_AUTO = "auto"
+ENGINE_DUCKDB = "duckdb"
+ENGINE_SQLITE = "sqlite"
+
+# Resumos mantidos em memória (por banco, versão dos dados, consulta e parâmetro)
+_CACHE_MAX_ENTRIES = 32
+
+def _last_months_cutoff(months: int) -> tuple:
+    """
+    Primeiro mês ('AAAA-MM') dos últimos 'months' meses, incluindo o atual.
+    """
+    today = date.today()
+    index = today.year * 12 + today.month - months
+    return (f"{index // 12:04d}-{index % 12 + 1:02d}",)
+
+# Consultas de resumo disponíveis. O SQL é portável entre SQLite e DuckDB e usa apenas a
+# tabela 'execucoes' (uma linha por execução, com as métricas), nunca os pontos previstos.
+# As consultas marcadas com "somente_sqlite" leem a tabela 'tempos_etapas', que só existe
+# no banco de resultados, e rodam sempre no SQLite.
+AGGREGATE_QUERIES = {
+    "ranking_modelos": {
+        "titulo": "Ranking de modelos por série (MAPE médio)",
+        "parametro": "Últimas execuções por série e modelo",
+        "padrao": 30,
+        "parametros": lambda n: (n,),
+        "colunas": ("serie_id", "posicao", "modelo_utilizado", "execucoes", "mape_medio", "rmse_medio", "mae_medio"),
+        "sql": """
+            WITH recentes AS (
+                SELECT serie_id, modelo_utilizado, rmse, mae, mape,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY serie_id, modelo_utilizado
+                           ORDER BY data_execucao DESC
+                       ) AS ordem
+                FROM execucoes
+            )
+            SELECT serie_id,
+                   RANK() OVER (PARTITION BY serie_id ORDER BY AVG(mape) IS NULL, AVG(mape)) AS posicao,
+                   modelo_utilizado,
+                   COUNT(*) AS execucoes,
+                   AVG(mape) AS mape_medio,
+                   AVG(rmse) AS rmse_medio,
+                   AVG(mae) AS mae_medio
+            FROM recentes
+            WHERE ordem <= ?
+            GROUP BY serie_id, modelo_utilizado
+            ORDER BY serie_id, posicao, modelo_utilizado
+        """
+    },
+    "resumo_cenarios": {
+        "titulo": "Resumo por cenário",
+        "parametro": "Últimas execuções por cenário",
+        "padrao": 30,
+        "parametros": lambda n: (n,),
+        "colunas": ("nome_cenario", "serie_id", "modelo_utilizado", "execucoes", "ultima_execucao",
+                    "mape_ultima", "mape_medio", "melhor_mape"),
+        "sql": """
+            WITH recentes AS (
+                SELECT nome_cenario, serie_id, modelo_utilizado, data_execucao, mape,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY nome_cenario
+                           ORDER BY data_execucao DESC
+                       ) AS ordem
+                FROM execucoes
+            )
+            SELECT nome_cenario,
+                   MAX(CASE WHEN ordem = 1 THEN serie_id END) AS serie_id,
+                   MAX(CASE WHEN ordem = 1 THEN modelo_utilizado END) AS modelo_utilizado,
+                   COUNT(*) AS execucoes,
+                   MAX(CAST(data_execucao AS VARCHAR)) AS ultima_execucao,
+                   MAX(CASE WHEN ordem = 1 THEN mape END) AS mape_ultima,
+                   AVG(mape) AS mape_medio,
+                   MIN(mape) AS melhor_mape
+            FROM recentes
+            WHERE ordem <= ?
+            GROUP BY nome_cenario
+            ORDER BY nome_cenario
+        """
+    },
+    "evolucao_mensal": {
+        "titulo": "MAPE médio por modelo e mês de execução",
+        "parametro": "Últimos meses",
+        "padrao": 12,
+        "parametros": _last_months_cutoff,
+        "colunas": ("mes", "modelo_utilizado", "execucoes", "mape_medio", "rmse_medio", "mae_medio"),
+        "sql": """
+            SELECT substr(CAST(data_execucao AS VARCHAR), 1, 7) AS mes,
+                   modelo_utilizado,
+                   COUNT(*) AS execucoes,
+                   AVG(mape) AS mape_medio,
+                   AVG(rmse) AS rmse_medio,
+                   AVG(mae) AS mae_medio
+            FROM execucoes
+            WHERE substr(CAST(data_execucao AS VARCHAR), 1, 7) >= ?
+            GROUP BY 1, 2
+            ORDER BY 1 DESC, 2
+        """
+    },
+    "cenarios_mais_lentos": {
+        "titulo": "Cenários mais lentos (última execução de cada cenário)",
+        "parametro": "Quantidade de cenários",
+        "padrao": 20,
+        "parametros": lambda n: (n,),
+        "somente_sqlite": True,
+        "colunas": ("nome_cenario", "modelo_utilizado", "status", "data_execucao", "duracao_total",
+                    "cpu_total", "memoria_pico_mb", "etapa_mais_lenta", "duracao_etapa_mais_lenta"),
+        "sql": """
+            WITH ultimas AS (
+                SELECT nome_cenario, MAX(data_execucao) AS data_execucao
+                FROM tempos_etapas
+                GROUP BY nome_cenario
+            ),
+            etapas AS (
+                SELECT t.nome_cenario, t.modelo_utilizado, t.status, t.data_execucao, t.etapa,
+                       t.duracao, t.tempo_cpu, t.memoria_pico,
+                       ROW_NUMBER() OVER (PARTITION BY t.nome_cenario ORDER BY t.duracao DESC) AS posicao
+                FROM tempos_etapas t
+                JOIN ultimas u ON u.nome_cenario = t.nome_cenario AND u.data_execucao = t.data_execucao
+                WHERE t.etapa_pai IS NULL
+            )
+            SELECT nome_cenario,
+                   MAX(modelo_utilizado) AS modelo_utilizado,
+                   MAX(status) AS status,
+                   MAX(data_execucao) AS data_execucao,
+                   SUM(duracao) AS duracao_total,
+                   SUM(tempo_cpu) AS cpu_total,
+                   MAX(memoria_pico) / 1048576.0 AS memoria_pico_mb,
+                   MAX(CASE WHEN posicao = 1 THEN etapa END) AS etapa_mais_lenta,
+                   MAX(CASE WHEN posicao = 1 THEN duracao END) AS duracao_etapa_mais_lenta
+            FROM etapas
+            GROUP BY nome_cenario
+            ORDER BY duracao_total DESC
+            LIMIT ?
+        """
+    },
+    "etapas_mais_lentas": {
+        "titulo": "Tempo por etapa e modelo (subetapas de ajuste incluídas)",
+        "parametro": "Últimas execuções por cenário",
+        "padrao": 10,
+        "parametros": lambda n: (n,),
+        "somente_sqlite": True,
+        "colunas": ("modelo_utilizado", "etapa", "etapa_pai", "medidas", "duracao_total", "duracao_media",
+                    "duracao_max", "cpu_media", "memoria_pico_mb", "percentual"),
+        "sql": """
+            WITH recentes AS (
+                SELECT modelo_utilizado, etapa, etapa_pai, duracao, tempo_cpu, memoria_pico,
+                       DENSE_RANK() OVER (
+                           PARTITION BY nome_cenario
+                           ORDER BY data_execucao DESC
+                       ) AS ordem
+                FROM tempos_etapas
+            )
+            SELECT modelo_utilizado,
+                   etapa,
+                   etapa_pai,
+                   COUNT(*) AS medidas,
+                   SUM(duracao) AS duracao_total,
+                   AVG(duracao) AS duracao_media,
+                   MAX(duracao) AS duracao_max,
+                   AVG(tempo_cpu) AS cpu_media,
+                   MAX(memoria_pico) / 1048576.0 AS memoria_pico_mb,
+                   100.0 * SUM(CASE WHEN etapa_pai IS NULL THEN duracao END)
+                       / SUM(SUM(CASE WHEN etapa_pai IS NULL THEN duracao END)) OVER () AS percentual
+            FROM recentes
+            WHERE ordem <= ?
+            GROUP BY modelo_utilizado, etapa, etapa_pai
+            ORDER BY duracao_total DESC
+        """
+    },
+}
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Fontes abertas no DuckDB, mantidas entre consultas: {caminho: (adaptador, versão dos dados, lock)}
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+def resolve_engine(source_path, engine: str = ENGINE_AUTO) -> str:
+    """
+    Escolhe o motor de consulta: DuckDB quando instalado (obrigatório para fontes Parquet),
+    senão o próprio SQLite.
+
+    Raises:
+        ValueError: Se o motor for desconhecido.
+        ImportError: Se o DuckDB for exigido e não estiver instalado.
+    """
+    if engine not in (ENGINE_AUTO, ENGINE_DUCKDB, ENGINE_SQLITE):
+        raise ValueError(f"Motor de consulta desconhecido: {engine}")
+    is_parquet = Path(source_path).suffix.lower() in (".parquet", ".pq")
+    if engine == ENGINE_AUTO:
+        engine = ENGINE_DUCKDB if duckdb_available() or is_parquet else ENGINE_SQLITE
+    if engine == ENGINE_SQLITE and is_parquet:
+        raise ValueError("Fontes Parquet só podem ser consultadas com o DuckDB.")
+    if engine == ENGINE_DUCKDB and not duckdb_available():
+        raise ImportError("As consultas analíticas com DuckDB requerem o pacote 'duckdb' (pip install duckdb).")
+    return engine
+
+def run_aggregate(source_path, name: str, parameter: int = None, engine: str = ENGINE_AUTO) -> dict:
+    """
+    Executa uma das consultas de resumo de AGGREGATE_QUERIES.
+
+    Os resultados ficam em memória enquanto os dados da fonte não mudam, de modo que
+    reabrir o mesmo resumo não refaz a consulta. No DuckDB, a fonte fica aberta entre
+    consultas e só as execuções novas são copiadas a cada mudança (ver DuckDbAdapter.refresh). Se o DuckDB falhar ao abrir um banco
+    SQLite (no modo automático), a consulta é refeita no próprio SQLite.
+
+    Args:
+        source_path (Path): Banco de resultados (previsoes.db) ou exportação Parquet.
+        name (str): Nome da consulta (chave de AGGREGATE_QUERIES).
+        parameter (int, optional): Parâmetro da consulta (ver 'parametro'). Padrão em 'padrao'.
+        engine (str): "auto", "duckdb" ou "sqlite".
+
+    Returns:
+        dict: {"titulo", "colunas", "linhas" (lista de tuplas), "motor", "duracao"}.
+
+    Raises:
+        ValueError: Se a consulta ou o parâmetro forem inválidos.
+    """
+    if name not in AGGREGATE_QUERIES:
+        raise ValueError(f"Consulta de resumo desconhecida: {name}. Disponíveis: {sorted(AGGREGATE_QUERIES)}")
+    definition = AGGREGATE_QUERIES[name]
+    parameter = definition["padrao"] if parameter is None else parameter
+    if isinstance(parameter, bool) or not isinstance(parameter, int) or parameter < 1:
+        raise ValueError(f"Parâmetro inválido para '{name}': {parameter!r}. Esperado um inteiro positivo.")
+
+    requested_engine = engine
+    if definition.get("somente_sqlite"):
+        if Path(source_path).suffix.lower() in (".parquet", ".pq"):
+            raise ValueError(f"O resumo '{name}' requer o banco de resultados (previsoes.db), não uma exportação Parquet.")
+        engine = ENGINE_SQLITE
+    engine = resolve_engine(source_path, engine)
+    key = (os.path.abspath(str(source_path)), data_version(source_path), name, parameter, engine)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    inicio = time.perf_counter()
+    sql = definition["sql"]
+    params = definition["parametros"](parameter)
+    if engine == ENGINE_DUCKDB:
+        try:
+            rows = _query_snapshot(source_path, key[1], sql, params)
+        except Exception as e:
+            if requested_engine != ENGINE_AUTO or Path(source_path).suffix.lower() in (".parquet", ".pq"):
+                raise
+            logger.warning(f"Falha no DuckDB ({e}); executando o resumo '{name}' no SQLite.")
+            engine = ENGINE_SQLITE
+    if engine == ENGINE_SQLITE:
+        with SqliteAdapter(str(source_path), tune_storage=True) as adapter:
+            adapter.create_schema_if_not_exists()
+            if definition.get("somente_sqlite"):
+                adapter.create_timing_schema_if_not_exists()
+            rows = [tuple(row) for row in adapter.query(sql, params)]
+
+    result = {
+        "titulo": definition["titulo"],
+        "colunas": definition["colunas"],
+        "linhas": rows,
+        "motor": engine,
+        "duracao": round(time.perf_counter() - inicio, 4)
+    }
+    logger.info(f"Resumo '{name}' ({parameter}) calculado com {engine} em {result['duracao']}s: {len(rows)} linhas.")
+
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > _CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return result
+
+def _query_snapshot(source_path, version: tuple, sql: str, params: tuple) -> list:
+    """
+    Executa a consulta na fonte aberta no DuckDB, abrindo-a na primeira vez e
+    sincronizando-a quando a versão dos dados mudou desde a última consulta.
+    """
+    path = os.path.abspath(str(source_path))
+    with _snapshots_lock:
+        if path not in _snapshots:
+            _snapshots[path] = [None, None, threading.Lock()]
+        snapshot = _snapshots[path]
+
+    with snapshot[2]:
+        adapter, snapshot_version, _ = snapshot
+        try:
+            if adapter is None:
+                adapter = DuckDbAdapter(path).__enter__()
+            elif snapshot_version != version:
+                adapter.refresh()
+            snapshot[0], snapshot[1] = adapter, version
+            return adapter.query(sql, params)
+        except Exception:
+            # Descarta a fonte aberta: a próxima consulta a reabre do zero
+            if adapter is not None:
+                adapter.__exit__(None, None, None)
+            snapshot[0], snapshot[1] = None, None
+            raise
+
+def close_snapshots():
+    """
+    Fecha as fontes mantidas abertas no DuckDB (ex.: ao encerrar a aplicação).
+    """
+    with _snapshots_lock:
+        for adapter, _, lock in _snapshots.values():
+            with lock:
+                if adapter is not None:
+                    adapter.__exit__(None, None, None)
+        _snapshots.clear()
@@ -0,0 +1,226 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from persistence.sqlite_adapter import SqliteAdapter
+from modules.series_cache import data_version, get_series_cache
+
+# Configura o logger para este módulo
+logger = logging.getLogger(__name__)
+
+# Gráficos preparados mantidos em memória
+DEFAULT_MAX_ENTRIES = 64
+
+_FORECAST_SQL = """
+    SELECT e.nome_cenario, e.serie_id, p.data_previsao, p.valor_previsto, p.limite_inferior, p.limite_superior
+    FROM execucoes e
+    JOIN pontos_previsao p ON p.execucao_id = e.id
+    WHERE e.id = ?
+    ORDER BY p.data_previsao
+"""
+
+def load_chart_dataset(execucao_id: int, results_db_path, data_db_path) -> dict:
+    """
+    Prepara os dados do gráfico de uma execução: os pontos previstos e a série histórica.
+
+    Args:
+        execucao_id (int): ID da execução (tabela 'execucoes').
+        results_db_path: Caminho para o banco de dados de resultados.
+        data_db_path: Caminho para o banco de dados de séries históricas.
+
+    Returns:
+        dict: {"nome_cenario", "serie_id", "execucao_id", "historico" (DataFrame 'data'/'valor'),
+               "previsao" (DataFrame 'data_previsao', 'valor_previsto', 'limite_inferior',
+               'limite_superior', 'nome_cenario')}.
+
+    Raises:
+        ValueError: Se a execução não existir ou a série não for encontrada.
+    """
+    with SqliteAdapter(str(results_db_path), tune_storage=True) as adapter:
+        rows = adapter.query(_FORECAST_SQL, (execucao_id,))
+    if not rows:
+        raise ValueError(f"Nenhum dado de previsão encontrado para a execução {execucao_id}.")
+
+    nome_cenario, serie_id = rows[0][0], rows[0][1]
+    forecast_df = pd.DataFrame.from_records(
+        [tuple(row)[2:] for row in rows],
+        columns=["data_previsao", "valor_previsto", "limite_inferior", "limite_superior"]
+    )
+    forecast_df["data_previsao"] = pd.to_datetime(forecast_df["data_previsao"])
+    for col in ("valor_previsto", "limite_inferior", "limite_superior"):
+        forecast_df[col] = pd.to_numeric(forecast_df[col])
+    forecast_df["nome_cenario"] = nome_cenario
+
+    return {
+        "nome_cenario": nome_cenario,
+        "serie_id": serie_id,
+        "execucao_id": execucao_id,
+        "historico": get_series_cache().get(serie_id, data_db_path),
+        "previsao": forecast_df
+    }
+
+class DrilldownCache:
+    """
+    Cache LRU dos dados de gráfico da tela de resultados, indexado por (cenário, execução).
+
+    O cache inteiro é descartado quando o banco de resultados ou o de séries muda (novas
+    execuções, retenção, séries atualizadas) e também pode ser invalidado explicitamente.
+    Pedidos simultâneos da mesma chave (ex.: seleção e pré-carregamento) carregam os dados
+    uma única vez. Os dados retornados são compartilhados e não devem ser modificados.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, loader=load_chart_dataset):
+        """
+        Args:
+            max_entries (int): Número máximo de gráficos mantidos em cache.
+            loader (Callable): Função (execucao_id, results_db_path, data_db_path) -> dict usada em caso de falta.
+        """
+        self.max_entries = max_entries
+        self.loader = loader
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, nome_cenario: str, execucao_id: int, results_db_path, data_db_path) -> dict:
+        """
+        Retorna os dados do gráfico da execução, carregando-os apenas se não estiverem em cache.
+
+        Args:
+            nome_cenario (str): Nome do cenário da execução.
+            execucao_id (int): ID da execução.
+            results_db_path: Caminho para o banco de dados de resultados.
+            data_db_path: Caminho para o banco de dados de séries históricas.
+
+        Returns:
+            dict: Dados do gráfico (ver load_chart_dataset).
+        """
+        key = (nome_cenario, execucao_id)
+        version = self._current_version(results_db_path, data_db_path)
+
+        while True:
+            with self._lock:
+                if version != self._version:
+                    self._entries.clear()
+                    self._version = version
+                dataset = self._entries.get(key)
+                if dataset is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dataset
+                pending = self._pending.get(key)
+                if pending is None:
+                    self._pending[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # Outra thread já está carregando esta execução: aguarda e consulta o cache de novo
+            pending.wait()
+
+        try:
+            dataset = self.loader(execucao_id, results_db_path, data_db_path)
+            # A versão é lida de novo após o carregamento: abrir o banco pode criar o WAL,
+            # e os pontos de uma execução não mudam depois de gravados
+            version = self._current_version(results_db_path, data_db_path)
+            with self._lock:
+                if version != self._version:
+                    self._entries.clear()
+                    self._version = version
+                # Execuções da mesma série compartilham o mesmo DataFrame histórico
+                for other in self._entries.values():
+                    if other["serie_id"] == dataset["serie_id"]:
+                        dataset["historico"] = other["historico"]
+                        break
+                self._entries[key] = dataset
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return dataset
+        finally:
+            with self._lock:
+                self._pending.pop(key).set()
+
+    def peek(self, nome_cenario: str, execucao_id: int, results_db_path, data_db_path):
+        """
+        Retorna os dados em cache da execução, sem carregá-los em caso de falta
+        (ex.: para exibir imediatamente, na thread da GUI, o que já foi carregado).
+
+        Returns:
+            dict ou None: Dados do gráfico, se estiverem em cache e os bancos não tiverem mudado.
+        """
+        version = self._current_version(results_db_path, data_db_path)
+        with self._lock:
+            if version != self._version:
+                return None
+            dataset = self._entries.get((nome_cenario, execucao_id))
+            if dataset is not None:
+                self._entries.move_to_end((nome_cenario, execucao_id))
+                self.hits += 1
+            return dataset
+
+    def prefetch(self, keys: list, results_db_path, data_db_path) -> int:
+        """
+        Carrega em cache as execuções informadas que ainda não estão em cache.
+        Falhas são apenas registradas no log.
+
+        Args:
+            keys (list): Lista de tuplas (nome_cenario, execucao_id).
+
+        Returns:
+            int: Quantidade de execuções carregadas.
+        """
+        loaded = 0
+        for nome_cenario, execucao_id in keys:
+            if self.peek(nome_cenario, execucao_id, results_db_path, data_db_path) is not None:
+                continue
+            try:
+                self.get(nome_cenario, execucao_id, results_db_path, data_db_path)
+                loaded += 1
+            except Exception as e:
+                logger.debug(f"Pré-carregamento da execução {execucao_id} ({nome_cenario}) falhou: {e}")
+        return loaded
+
+    def invalidate(self) -> None:
+        """
+        Limpa o cache (ex.: após novas execuções gravadas pela aplicação).
+        """
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def stats(self) -> dict:
+        """
+        Retorna estatísticas de uso do cache.
+        """
+        with self._lock:
+            return {
+                "entradas": len(self._entries),
+                "acertos": self.hits,
+                "faltas": self.misses
+            }
+
+    @staticmethod
+    def _current_version(results_db_path, data_db_path) -> tuple:
+        """
+        Versão conjunta dos dois bancos de que os gráficos dependem.
+        """
+        return (
+            os.path.abspath(str(results_db_path)), data_version(results_db_path),
+            os.path.abspath(str(data_db_path)), data_version(data_db_path)
+        )
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_drilldown_cache() -> DrilldownCache:
+    """
+    Retorna o cache de gráficos da tela de resultados compartilhado pelo processo atual.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = DrilldownCache()
+        return _default_cache
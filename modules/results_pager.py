@@ -0,0 +1,122 @@
+import logging
+
+from persistence.sqlite_adapter import SqliteAdapter
+
+# Configura o logger para este módulo
+logger = logging.getLogger(__name__)
+
+# Colunas exibidas na tabela de resultados, na ordem de exibição
+RESULTS_TABLE_COLUMNS = (
+    "nome_cenario",
+    "serie_id",
+    "data_execucao",
+    "data_previsao",
+    "frequencia_serie",
+    "valor_previsto",
+    "limite_inferior",
+    "limite_superior",
+    "modelo_utilizado",
+    "parametros_modelo",
+    "rmse",
+    "mae",
+    "mape",
+)
+
+# Linhas buscadas por página
+DEFAULT_PAGE_SIZE = 500
+
+_SELECT_COLUMNS = ", ".join(
+    ["e.id AS execucao_id"]
+    + [f"p.{col}" if col in ("data_previsao", "valor_previsto", "limite_inferior", "limite_superior") else f"e.{col}"
+       for col in RESULTS_TABLE_COLUMNS]
+)
+
+# Ordem da tabela: execuções mais recentes primeiro e, dentro de cada execução, as datas previstas
+# em ordem crescente. As duas consultas percorrem o índice de data_execucao e a chave primária de
+# pontos_previsao já nessa ordem, sem ordenação em memória, qualquer que seja a página.
+_CURRENT_EXECUTION_SQL = f"""
+    SELECT {_SELECT_COLUMNS}
+    FROM execucoes e
+    JOIN pontos_previsao p ON p.execucao_id = e.id
+    WHERE e.id = :execucao_id AND p.data_previsao > :data_previsao
+    ORDER BY p.data_previsao
+    LIMIT :limite
+"""
+
+# A comparação por valor de linha permite ao SQLite iniciar a busca no índice a partir da
+# chave (um intervalo), em vez de percorrê-lo desde a execução mais recente
+_NEXT_EXECUTIONS_SQL = f"""
+    SELECT {_SELECT_COLUMNS}
+    FROM execucoes e
+    JOIN pontos_previsao p ON p.execucao_id = e.id
+    WHERE (e.data_execucao, e.id) < (:data_execucao, :execucao_id)
+    ORDER BY e.data_execucao DESC, e.id DESC, p.data_previsao
+    LIMIT :limite
+"""
+
+_FIRST_EXECUTIONS_SQL = f"""
+    SELECT {_SELECT_COLUMNS}
+    FROM execucoes e
+    JOIN pontos_previsao p ON p.execucao_id = e.id
+    ORDER BY e.data_execucao DESC, e.id DESC, p.data_previsao
+    LIMIT :limite
+"""
+
+def count_results(results_db_path) -> int:
+    """
+    Retorna o total de linhas (pontos de previsão) da tabela de resultados.
+
+    Args:
+        results_db_path (Path): Caminho para o banco de dados de resultados.
+
+    Returns:
+        int: Quantidade de pontos de previsão gravados.
+    """
+    with SqliteAdapter(str(results_db_path), tune_storage=True) as adapter:
+        return adapter.query("SELECT COUNT(*) FROM pontos_previsao")[0][0]
+
+def fetch_results_page(results_db_path, after: tuple = None, limit: int = DEFAULT_PAGE_SIZE) -> tuple:
+    """
+    Busca uma página da tabela de resultados por paginação por chave (keyset).
+
+    Em vez de OFFSET, cada página continua a partir da chave da última linha da página
+    anterior, de modo que o custo de uma página não cresce com a posição na tabela.
+
+    Args:
+        results_db_path (Path): Caminho para o banco de dados de resultados.
+        after (tuple, optional): Chave (data_execucao, execucao_id, data_previsao) da última
+                                 linha já exibida. None para a primeira página.
+        limit (int): Quantidade máxima de linhas da página.
+
+    Returns:
+        tuple: (linhas, proxima_chave). 'linhas' é uma lista de sqlite3.Row com a coluna
+               'execucao_id' seguida de RESULTS_TABLE_COLUMNS; 'proxima_chave' é a chave
+               para a página seguinte, ou None se não houver mais linhas.
+    """
+    if limit < 1:
+        raise ValueError("O tamanho da página deve ser um inteiro maior que zero.")
+
+    data_execucao, execucao_id, data_previsao = after or (None, None, None)
+    rows = []
+    with SqliteAdapter(str(results_db_path), tune_storage=True) as adapter:
+        # Restante da execução em que a página anterior parou
+        if after is not None:
+            rows.extend(adapter.query(_CURRENT_EXECUTION_SQL, {
+                "execucao_id": execucao_id,
+                "data_previsao": data_previsao,
+                "limite": limit
+            }))
+        # Execuções seguintes
+        if after is None:
+            rows.extend(adapter.query(_FIRST_EXECUTIONS_SQL, {"limite": limit}))
+        elif len(rows) < limit:
+            rows.extend(adapter.query(_NEXT_EXECUTIONS_SQL, {
+                "data_execucao": data_execucao,
+                "execucao_id": execucao_id,
+                "limite": limit - len(rows)
+            }))
+
+    if len(rows) < limit:
+        return rows, None
+    last = rows[-1]
+    return rows, (last["data_execucao"], last["execucao_id"], last["data_previsao"])
@@ -1,11 +1,29 @@
 import json
 import logging
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
 # Configura o logger para este módulo
 logger = logging.getLogger(__name__)
 
+# Colunas da view resultados_previsao, na ordem das tuplas geradas por iter_result_rows
+RESULT_COLUMNS = (
+    "nome_cenario",
+    "serie_id",
+    "data_execucao",
+    "data_previsao",
+    "frequencia_serie",
+    "valor_previsto",
+    "limite_inferior",
+    "limite_superior",
+    "modelo_utilizado",
+    "parametros_modelo",
+    "rmse",
+    "mae",
+    "mape"
+)
+
 def process_results(cenario: dict, forecast_df: pd.DataFrame, metrics: dict = None, frequency: str = None) -> list:
     """
     Processa os resultados de uma previsão, adicionando metadados do cenário,
@@ -24,35 +42,156 @@ def process_results(cenario: dict, forecast_df: pd.DataFrame, metrics: dict = No
     """
     logger.info(f"Processando resultados para o cenário: {cenario["nome_cenario"]}")
     
-    # Obtém a data/hora atual da execução
-    data_execucao = datetime.now()
-    
-    # Converte os parâmetros do modelo para JSON string
-    parametros_json = json.dumps(cenario["parametros"])
-    
-    # Lista para armazenar os registros processados
-    processed_records = []
-    
-    # Processa cada linha do DataFrame de previsão
-    for _, row in forecast_df.iterrows():
-        record = {
-            "nome_cenario": cenario["nome_cenario"],
-            "serie_id": cenario.get("serie_id", "Série Desconhecida"), # Usa se não houver série específica
-            "data_execucao": data_execucao.isoformat(),
-            "data_previsao": row["data_previsao"].strftime("%Y-%m-%d"),
-            "frequencia_serie": frequency, # Adiciona a frequência da série
-            "valor_previsto": float(row["valor_previsto"]),
-            "limite_inferior": float(row["limite_inferior"]) if pd.notna(row["limite_inferior"]) else None,
-            "limite_superior": float(row["limite_superior"]) if pd.notna(row["limite_superior"]) else None,
-            "modelo_utilizado": cenario["modelo"],
-            "parametros_modelo": parametros_json,
-            "rmse": metrics.get("rmse") if metrics else None,
-            "mae": metrics.get("mae") if metrics else None,
-            "mape": metrics.get("mape") if metrics else None
-        }
-        processed_records.append(record)
+    processed_records = [
+        dict(zip(RESULT_COLUMNS, row))
+        for row in iter_result_rows(cenario, forecast_df, metrics, frequency)
+    ]
     
     logger.info(f"Processados {len(processed_records)} registros de previsão")
     return processed_records
 
+def build_execution_record(cenario: dict, metrics: dict = None, frequency: str = None,
+                           data_execucao: datetime = None) -> dict:
+    """
+    Monta o registro de uma execução (tabela 'execucoes'): metadados do cenário e métricas,
+    gravados uma única vez por execução.
+
+    Args:
+        cenario (dict): Dicionário contendo as informações do cenário
+        metrics (dict, optional): Dicionário com métricas de avaliação (RMSE, MAE, MAPE).
+        frequency (str, optional): Frequência inferida da série temporal.
+        data_execucao (datetime, optional): Data/hora da execução. Padrão para agora.
+
+    Returns:
+        dict: Registro com as colunas da tabela 'execucoes'.
+    """
+    metrics = metrics or {}
+    return {
+        "nome_cenario": cenario["nome_cenario"],
+        "serie_id": cenario.get("serie_id", "Série Desconhecida"), # Usa se não houver série específica
+        "data_execucao": (data_execucao or datetime.now()).isoformat(),
+        "frequencia_serie": frequency,
+        "modelo_utilizado": cenario["modelo"],
+        "parametros_modelo": json.dumps(cenario["parametros"]), # Parâmetros do modelo em JSON
+        "rmse": _to_float(metrics.get("rmse")),
+        "mae": _to_float(metrics.get("mae")),
+        "mape": _to_float(metrics.get("mape"))
+    }
+
+def iter_point_rows(forecast_df: pd.DataFrame):
+    """
+    Gera os pontos de uma previsão como tuplas (data_previsao, valor_previsto,
+    limite_inferior, limite_superior).
+
+    As colunas são convertidas de uma vez a partir dos arrays do DataFrame (datas
+    formatadas em uma única chamada vetorizada, NaN convertido em None).
+
+    Args:
+        forecast_df (pd.DataFrame): DataFrame com os resultados da previsão
+
+    Returns:
+        Iterator[tuple]: Iterador de tuplas prontas para executemany.
+    """
+    return zip(
+        pd.DatetimeIndex(forecast_df["data_previsao"]).strftime("%Y-%m-%d").tolist(),
+        forecast_df["valor_previsto"].to_numpy(dtype=float).tolist(),
+        _nullable_floats(forecast_df["limite_inferior"]),
+        _nullable_floats(forecast_df["limite_superior"])
+    )
+
+def build_forecast_batch(entries, data_execucao: datetime = None) -> list:
+    """
+    Prepara as previsões de vários cenários para SqliteAdapter.insert_forecasts.
+
+    Args:
+        entries (Iterable[tuple]): Tuplas (cenario, forecast_df, metrics, frequency).
+        data_execucao (datetime, optional): Data/hora comum da execução. Padrão para agora.
+
+    Returns:
+        list: Pares (registro da execução, iterador de pontos).
+    """
+    data_execucao = data_execucao or datetime.now()
+    return [
+        (build_execution_record(cenario, metrics, frequency, data_execucao), iter_point_rows(forecast_df))
+        for cenario, forecast_df, metrics, frequency in entries
+    ]
+
+def build_timing_rows(cenario: dict, resumo: dict) -> list:
+    """
+    Monta as linhas da tabela 'tempos_etapas' de uma execução de cenário.
+
+    Args:
+        cenario (dict): Dicionário contendo as informações do cenário.
+        resumo (dict): Resumo da execução (ver run_single_scenario), com "tempos_etapas".
 
+    Returns:
+        list: Tuplas na ordem de SqliteAdapter.TIMING_COLUMNS (vazia se não houver medidas).
+    """
+    records = resumo.get("tempos_etapas") or []
+    data_execucao = resumo.get("data_execucao") or datetime.now().isoformat()
+    return [
+        (
+            resumo.get("execucao_id"),
+            resumo.get("nome_cenario", cenario.get("nome_cenario")),
+            cenario.get("serie_id"),
+            cenario.get("modelo"),
+            data_execucao,
+            resumo["status"],
+            ordem,
+            record["etapa"],
+            record.get("etapa_pai"),
+            record["duracao"],
+            _to_float(record.get("tempo_cpu")),
+            record.get("memoria_pico")
+        )
+        for ordem, record in enumerate(records, start=1)
+    ]
+
+def iter_result_rows(cenario: dict, forecast_df: pd.DataFrame, metrics: dict = None, frequency: str = None,
+                     data_execucao: datetime = None):
+    """
+    Gera as linhas de resultado de uma previsão no layout da view 'resultados_previsao'
+    (uma linha por ponto), como tuplas na ordem de RESULT_COLUMNS.
+
+    Args:
+        cenario (dict): Dicionário contendo as informações do cenário
+        forecast_df (pd.DataFrame): DataFrame com os resultados da previsão
+        metrics (dict, optional): Dicionário com métricas de avaliação (RMSE, MAE, MAPE).
+        frequency (str, optional): Frequência inferida da série temporal.
+        data_execucao (datetime, optional): Data/hora da execução. Padrão para agora.
+
+    Returns:
+        Iterator[tuple]: Iterador de tuplas na ordem de RESULT_COLUMNS.
+    """
+    execution = build_execution_record(cenario, metrics, frequency, data_execucao)
+    for data_previsao, valor_previsto, limite_inferior, limite_superior in iter_point_rows(forecast_df):
+        yield (
+            execution["nome_cenario"],
+            execution["serie_id"],
+            execution["data_execucao"],
+            data_previsao,
+            execution["frequencia_serie"],
+            valor_previsto,
+            limite_inferior,
+            limite_superior,
+            execution["modelo_utilizado"],
+            execution["parametros_modelo"],
+            execution["rmse"],
+            execution["mae"],
+            execution["mape"]
+        )
+
+def _nullable_floats(column: pd.Series) -> list:
+    """
+    Converte uma coluna numérica em lista de floats, trocando NaN por None.
+    """
+    values = column.to_numpy(dtype=float)
+    result = values.astype(object)
+    result[np.isnan(values)] = None
+    return result.tolist()
+
+def _to_float(value):
+    """
+    Converte uma métrica para float do Python, preservando None.
+    """
+    return None if value is None else float(value)
@@ -0,0 +1,272 @@
+import logging
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from persistence.sqlite_adapter import SqliteAdapter
+
+# Configura o logger para este módulo
+logger = logging.getLogger(__name__)
+
+# Quantidade de execuções removidas por transação: mantém cada lock de escrita curto,
+# para que a GUI e novas execuções não fiquem bloqueadas durante a limpeza
+DEFAULT_BATCH_SIZE = 500
+
+# Páginas devolvidas ao sistema de arquivos por passo do vacuum incremental
+VACUUM_STEP_PAGES = 2048
+
+def retention_policy_from_config(config: dict) -> dict:
+    """
+    Valida e normaliza a política de retenção definida na chave 'retencao' do YAML.
+
+    Exemplo:
+        retencao:
+          manter_ultimas: 20   # Execuções mais recentes mantidas por cenário
+          max_dias: 180        # Remove execuções com mais de 180 dias
+
+    Args:
+        config (dict): Conteúdo da chave 'retencao' (ou None).
+
+    Returns:
+        dict: {"manter_ultimas": int ou None, "max_dias": int ou None}.
+
+    Raises:
+        ValueError: Se algum valor não for um inteiro positivo.
+    """
+    config = config or {}
+    if not isinstance(config, dict):
+        raise ValueError("A chave 'retencao' deve ser um dicionário com 'manter_ultimas' e/ou 'max_dias'.")
+
+    policy = {}
+    for key in ("manter_ultimas", "max_dias"):
+        value = config.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 1):
+            raise ValueError(f"Valor inválido para 'retencao.{key}': {value!r}. Esperado um inteiro positivo.")
+        policy[key] = value
+    return policy
+
+def find_expired_executions(adapter: SqliteAdapter, keep_last: int = None, max_age_days: int = None,
+                            now: datetime = None) -> list:
+    """
+    Seleciona as execuções que estão fora da política de retenção.
+
+    Uma execução expira se não estiver entre as 'keep_last' mais recentes do seu cenário
+    ou se for mais antiga que 'max_age_days'. A execução mais recente de cada cenário
+    nunca expira, para que todo cenário continue com resultados para consulta.
+
+    Args:
+        adapter (SqliteAdapter): Adaptador já conectado ao banco de resultados.
+        keep_last (int, optional): Execuções mantidas por cenário.
+        max_age_days (int, optional): Idade máxima (em dias) de uma execução.
+        now (datetime, optional): Referência para o cálculo da idade. Padrão para agora.
+
+    Returns:
+        list: IDs das execuções expiradas, em ordem crescente.
+    """
+    if keep_last is None and max_age_days is None:
+        return []
+
+    cutoff = None
+    if max_age_days is not None:
+        cutoff = ((now or datetime.now()) - timedelta(days=max_age_days)).isoformat()
+
+    # julianday aceita tanto o formato ISO (com 'T') quanto o antigo (com espaço)
+    rows = adapter.query("""
+        SELECT id FROM (
+            SELECT id, data_execucao,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY nome_cenario
+                       ORDER BY data_execucao DESC, id DESC
+                   ) AS ordem
+            FROM execucoes
+        )
+        WHERE ordem > 1
+          AND ((:manter IS NOT NULL AND ordem > :manter)
+               OR (:limite IS NOT NULL AND julianday(data_execucao) < julianday(:limite)))
+        ORDER BY id
+    """, {"manter": keep_last, "limite": cutoff})
+    return [row[0] for row in rows]
+
+def find_orphan_timings(adapter: SqliteAdapter, keep_last: int = None, max_age_days: int = None,
+                        now: datetime = None) -> list:
+    """
+    Seleciona as medidas de 'tempos_etapas' sem execução associada (cenários que falharam ou
+    foram cancelados antes da gravação) que estão fora da política de retenção. As demais
+    medidas são removidas junto com a sua execução (ON DELETE CASCADE).
+
+    Cada execução sem resultado é identificada por (nome_cenario, data_execucao) e expira se
+    não estiver entre as 'keep_last' mais recentes do seu cenário ou se for mais antiga que
+    'max_age_days'.
+
+    Args:
+        adapter (SqliteAdapter): Adaptador já conectado ao banco de resultados.
+        keep_last (int, optional): Execuções sem resultado mantidas por cenário.
+        max_age_days (int, optional): Idade máxima (em dias) de uma medida.
+        now (datetime, optional): Referência para o cálculo da idade. Padrão para agora.
+
+    Returns:
+        list: IDs das medidas expiradas, em ordem crescente.
+    """
+    if keep_last is None and max_age_days is None:
+        return []
+
+    cutoff = None
+    if max_age_days is not None:
+        cutoff = ((now or datetime.now()) - timedelta(days=max_age_days)).isoformat()
+
+    rows = adapter.query("""
+        WITH execucoes_orfas AS (
+            SELECT nome_cenario, data_execucao,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY nome_cenario
+                       ORDER BY data_execucao DESC
+                   ) AS ordem
+            FROM (
+                SELECT DISTINCT nome_cenario, data_execucao
+                FROM tempos_etapas
+                WHERE execucao_id IS NULL
+            )
+        )
+        SELECT t.id
+        FROM tempos_etapas t
+        JOIN execucoes_orfas o ON o.nome_cenario = t.nome_cenario AND o.data_execucao = t.data_execucao
+        WHERE t.execucao_id IS NULL
+          AND ((:manter IS NOT NULL AND o.ordem > :manter)
+               OR (:limite IS NOT NULL AND julianday(t.data_execucao) < julianday(:limite)))
+        ORDER BY t.id
+    """, {"manter": keep_last, "limite": cutoff})
+    return [row[0] for row in rows]
+
+def prune_results(results_db_path, keep_last: int = None, max_age_days: int = None,
+                  batch_size: int = DEFAULT_BATCH_SIZE, vacuum: bool = True,
+                  dry_run: bool = False, now: datetime = None) -> dict:
+    """
+    Remove do banco de resultados as execuções fora da política de retenção e
+    devolve o espaço liberado ao sistema de arquivos.
+
+    A remoção ocorre em lotes de 'batch_size' execuções, cada um em sua própria transação.
+    As medidas de 'tempos_etapas' sem execução associada também são removidas pela mesma
+    política (ver find_orphan_timings); as demais saem junto com a sua execução.
+    Em seguida, o espaço livre é compactado com vacuum incremental (o banco é convertido
+    para auto_vacuum=INCREMENTAL na primeira vez, o que exige um VACUUM completo).
+
+    Args:
+        results_db_path (Path): Caminho para o banco de dados de resultados.
+        keep_last (int, optional): Execuções mantidas por cenário.
+        max_age_days (int, optional): Idade máxima (em dias) de uma execução.
+        batch_size (int): Execuções removidas por transação.
+        vacuum (bool): Compacta o arquivo após a remoção.
+        dry_run (bool): Apenas conta o que seria removido, sem alterar o banco.
+        now (datetime, optional): Referência para o cálculo da idade. Padrão para agora.
+
+    Returns:
+        dict: Resumo com "execucoes_removidas", "pontos_removidos", "tempos_orfaos_removidos"
+              (medidas sem execução), "bytes_antes" e "bytes_depois".
+    """
+    if batch_size < 1:
+        raise ValueError("O tamanho do lote deve ser um inteiro maior que zero.")
+
+    results_db_path = Path(results_db_path)
+    summary = {
+        "execucoes_removidas": 0,
+        "pontos_removidos": 0,
+        "tempos_orfaos_removidos": 0,
+        "bytes_antes": _database_size(results_db_path),
+        "bytes_depois": None
+    }
+
+    with SqliteAdapter(str(results_db_path), tune_storage=True) as adapter:
+        adapter.create_schema_if_not_exists()
+        adapter.create_timing_schema_if_not_exists()
+        expired = find_expired_executions(adapter, keep_last, max_age_days, now)
+        orphan_timings = find_orphan_timings(adapter, keep_last, max_age_days, now)
+        logger.info(f"{len(expired)} execuções e {len(orphan_timings)} medidas de tempo sem execução fora da "
+                    f"política de retenção (manter_ultimas={keep_last}, max_dias={max_age_days}).")
+
+        if dry_run:
+            summary["execucoes_removidas"] = len(expired)
+            summary["pontos_removidos"] = _count_points(adapter, expired, batch_size)
+            summary["tempos_orfaos_removidos"] = len(orphan_timings)
+            summary["bytes_depois"] = summary["bytes_antes"]
+            return summary
+
+        for start in range(0, len(expired), batch_size):
+            batch = expired[start:start + batch_size]
+            placeholders = ", ".join("?" for _ in batch)
+            with adapter.transaction() as cursor:
+                cursor.execute(f"DELETE FROM pontos_previsao WHERE execucao_id IN ({placeholders})", batch)
+                summary["pontos_removidos"] += cursor.rowcount
+                cursor.execute(f"DELETE FROM execucoes WHERE id IN ({placeholders})", batch)
+                summary["execucoes_removidas"] += cursor.rowcount
+            logger.info(f"Retenção: {start + len(batch)}/{len(expired)} execuções removidas.")
+
+        for start in range(0, len(orphan_timings), batch_size):
+            batch = orphan_timings[start:start + batch_size]
+            placeholders = ", ".join("?" for _ in batch)
+            with adapter.transaction() as cursor:
+                cursor.execute(f"DELETE FROM tempos_etapas WHERE id IN ({placeholders})", batch)
+                summary["tempos_orfaos_removidos"] += cursor.rowcount
+
+        if vacuum:
+            compact_database(adapter)
+
+    summary["bytes_depois"] = _database_size(results_db_path)
+    logger.info(f"Retenção concluída: {summary}")
+    return summary
+
+def compact_database(adapter: SqliteAdapter) -> int:
+    """
+    Devolve ao sistema de arquivos as páginas livres do banco, em passos curtos.
+
+    Bancos criados sem auto_vacuum=INCREMENTAL são convertidos com um VACUUM completo
+    (apenas uma vez); depois disso a compactação é sempre incremental.
+
+    Args:
+        adapter (SqliteAdapter): Adaptador já conectado (fora de transação).
+
+    Returns:
+        int: Quantidade de páginas liberadas.
+    """
+    connection = adapter.connection
+    if connection.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        logger.info("Convertendo o banco para auto_vacuum=INCREMENTAL (VACUUM completo, executado uma única vez)...")
+        free_pages = connection.execute("PRAGMA freelist_count").fetchone()[0]
+        connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        connection.execute("VACUUM")
+    else:
+        free_pages = connection.execute("PRAGMA freelist_count").fetchone()[0]
+        remaining = free_pages
+        while remaining > 0:
+            connection.execute(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES})").fetchall()
+            left = connection.execute("PRAGMA freelist_count").fetchone()[0]
+            if left >= remaining:
+                break
+            remaining = left
+
+    # Transfere as páginas do WAL para o arquivo principal e trunca o WAL
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    logger.info(f"Compactação concluída: {free_pages} páginas liberadas.")
+    return free_pages
+
+def _count_points(adapter: SqliteAdapter, execution_ids: list, batch_size: int) -> int:
+    """
+    Conta os pontos de previsão das execuções informadas, em lotes.
+    """
+    total = 0
+    for start in range(0, len(execution_ids), batch_size):
+        batch = execution_ids[start:start + batch_size]
+        placeholders = ", ".join("?" for _ in batch)
+        total += adapter.query(
+            f"SELECT COUNT(*) FROM pontos_previsao WHERE execucao_id IN ({placeholders})", batch
+        )[0][0]
+    return total
+
+def _database_size(db_path: Path) -> int:
+    """
+    Tamanho em bytes do banco, somando o arquivo principal e o WAL.
+    """
+    return sum(
+        os.path.getsize(path)
+        for path in (db_path, Path(f"{db_path}-wal"))
+        if path.exists()
+    )
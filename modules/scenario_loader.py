@@ -37,3 +37,47 @@ def load_scenarios(config_path) -> list:
     logger.info(f"Cenários carregados com sucesso de {config_path}.")
     return config['cenarios']
 
+
+def load_retention_config(config_path) -> dict:
+    """
+    Lê a política de retenção de resultados (chave opcional 'retencao') do arquivo YAML.
+
+    Args:
+        config_path (Path): Caminho para o arquivo de configuração YAML.
+
+    Returns:
+        dict: Conteúdo da chave 'retencao', ou um dicionário vazio se ela não existir.
+    """
+    config = _read_config(config_path)
+    return config.get('retencao') or {}
+
+def save_scenarios(config_path, scenarios: list) -> None:
+    """
+    Grava a lista de cenários no arquivo YAML, preservando as demais chaves (ex.: 'retencao').
+
+    Args:
+        config_path (Path): Caminho para o arquivo de configuração YAML.
+        scenarios (list): Lista de dicionários de cenário.
+    """
+    try:
+        config = _read_config(config_path)
+    except (FileNotFoundError, ValueError):
+        config = {}
+    config['cenarios'] = scenarios
+
+    with open(config_path, 'w', encoding='utf-8') as file:
+        yaml.dump(config, file, allow_unicode=True, sort_keys=False)
+    logger.info(f"{len(scenarios)} cenários salvos em {config_path}.")
+
+def _read_config(config_path) -> dict:
+    """
+    Lê o arquivo YAML inteiro como dicionário.
+    """
+    if not config_path or not Path(config_path).exists():
+        raise FileNotFoundError(f"Arquivo de configuração não encontrado: {config_path}")
+    try:
+        with open(config_path, 'r', encoding='utf-8') as file:
+            config = yaml.safe_load(file)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Arquivo YAML malformado: {e}")
+    return config if isinstance(config, dict) else {}
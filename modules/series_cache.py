@@ -0,0 +1,168 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+from modules.data_loader import load_historical_data
+from persistence.parquet_series_adapter import MANIFEST_FILE
+
+# Configura o logger para este módulo
+logger = logging.getLogger(__name__)
+
+# Limites padrão do cache compartilhado pelo processo
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def data_version(db_path) -> tuple:
+    """
+    Retorna um carimbo de versão dos dados do banco: muda sempre que o arquivo
+    (ou seu WAL, se existir) é modificado. Para o armazenamento colunar de séries,
+    usa o inventário, regravado a cada série gravada.
+
+    Args:
+        db_path: Caminho para o banco de dados de séries (ou para o armazenamento colunar).
+
+    Returns:
+        tuple: Tupla (mtime_ns, tamanho) do arquivo e do WAL (ou do inventário).
+    """
+    stamp = []
+    base = Path(db_path)
+    paths = (base / MANIFEST_FILE,) if base.is_dir() else (base, Path(f"{db_path}-wal"))
+    for path in paths:
+        try:
+            stat = path.stat()
+            stamp.extend((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            stamp.extend((None, None))
+    return tuple(stamp)
+
+class SeriesCache:
+    """
+    Cache LRU de séries históricas já carregadas e convertidas em DataFrame.
+
+    As entradas são indexadas por (caminho do banco, serie_id, versão dos dados), de modo
+    que uma alteração no banco invalida naturalmente as séries antigas. A evicção remove as
+    séries usadas há mais tempo quando o número de entradas ou a memória ocupada excede o limite.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES, loader=load_historical_data):
+        """
+        Args:
+            max_entries (int): Número máximo de séries mantidas em cache.
+            max_bytes (int): Memória máxima (em bytes) ocupada pelas séries em cache.
+            loader (Callable): Função (serie_id, db_path) -> DataFrame usada em caso de falta.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, serie_id: str, db_path) -> pd.DataFrame:
+        """
+        Retorna a série histórica, carregando-a do banco apenas se não estiver em cache.
+
+        Args:
+            serie_id (str): Identificador da série temporal.
+            db_path: Caminho para o banco de dados de séries.
+
+        Returns:
+            pd.DataFrame: Cópia do DataFrame com colunas "data" e "valor"
+                          (o chamador pode modificá-la livremente).
+
+        Raises:
+            ValueError: Se nenhum dado for encontrado para a série (propagado do loader).
+        """
+        key = (os.path.abspath(str(db_path)), serie_id, data_version(db_path))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0].copy()
+            self.misses += 1
+
+        # O carregamento ocorre fora do lock para não serializar leituras de séries diferentes
+        df = self.loader(serie_id, db_path)
+        size = int(df.memory_usage(deep=True).sum())
+        # A versão é lida de novo após o carregamento: abrir o banco pode criar ou tocar o WAL,
+        # e a entrada gravada com a versão anterior nunca seria encontrada
+        key = key[:2] + (data_version(db_path),)
+
+        with self._lock:
+            self._discard_stale(key)
+            if size <= self.max_bytes and key not in self._entries:
+                self._entries[key] = (df, size)
+                self._total_bytes += size
+                self._evict()
+        return df.copy()
+
+    def invalidate(self, db_path=None, serie_id: str = None) -> None:
+        """
+        Remove entradas do cache. Sem argumentos, limpa o cache inteiro.
+
+        Args:
+            db_path (optional): Remove apenas as séries deste banco.
+            serie_id (str, optional): Remove apenas esta série.
+        """
+        db_key = os.path.abspath(str(db_path)) if db_path is not None else None
+        with self._lock:
+            for key in list(self._entries):
+                if (db_key is None or key[0] == db_key) and (serie_id is None or key[1] == serie_id):
+                    self._total_bytes -= self._entries.pop(key)[1]
+
+    def clear(self) -> None:
+        """
+        Limpa o cache e zera as estatísticas.
+        """
+        self.invalidate()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Retorna estatísticas de uso do cache.
+        """
+        with self._lock:
+            return {
+                "entradas": len(self._entries),
+                "bytes": self._total_bytes,
+                "acertos": self.hits,
+                "faltas": self.misses
+            }
+
+    def _discard_stale(self, key: tuple) -> None:
+        """
+        Remove versões anteriores da mesma série (mesmo banco e serie_id).
+        """
+        for other in [k for k in self._entries if k[:2] == key[:2] and k != key]:
+            self._total_bytes -= self._entries.pop(other)[1]
+
+    def _evict(self) -> None:
+        """
+        Remove as séries menos recentemente usadas até respeitar os limites.
+        """
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._total_bytes -= size
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_series_cache() -> SeriesCache:
+    """
+    Retorna o cache de séries compartilhado pelo processo atual.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SeriesCache()
+        return _default_cache
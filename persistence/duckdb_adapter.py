@@ -0,0 +1,224 @@
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from .base_adapter import BaseReadAdapter
+from .sqlite_adapter import SqliteAdapter
+
+# Colunas de 'execucoes' disponibilizadas para as consultas analíticas
+EXECUTION_COLUMNS = (
+    "id",
+    "nome_cenario",
+    "serie_id",
+    "data_execucao",
+    "frequencia_serie",
+    "modelo_utilizado",
+    "parametros_modelo",
+    "rmse",
+    "mae",
+    "mape",
+)
+
+# Tipos das colunas de 'execucoes' na cópia feita para o DuckDB
+_COPY_TYPES = {
+    "id": "BIGINT",
+    "rmse": "DOUBLE",
+    "mae": "DOUBLE",
+    "mape": "DOUBLE",
+}
+_COPY_TYPES.update({col: "VARCHAR" for col in EXECUTION_COLUMNS if col not in _COPY_TYPES})
+
+def _require_duckdb():
+    """
+    Importa o duckdb sob demanda (dependência opcional).
+    """
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("As consultas analíticas com DuckDB requerem o pacote 'duckdb' (pip install duckdb).") from e
+    return duckdb
+
+def duckdb_available() -> bool:
+    """
+    Indica se o pacote opcional duckdb está instalado.
+    """
+    try:
+        _require_duckdb()
+        return True
+    except ImportError:
+        return False
+
+class DuckDbAdapter(BaseReadAdapter):
+    """
+    Adaptador analítico, somente leitura, baseado em DuckDB (banco colunar em memória).
+
+    A fonte pode ser o banco de resultados SQLite (previsoes.db) ou um arquivo Parquet
+    exportado pela aplicação. Em ambos os casos, as consultas enxergam uma tabela
+    'execucoes' com as colunas de EXECUTION_COLUMNS (sem 'id' na fonte Parquet).
+
+    Para o SQLite, o banco é anexado pela extensão 'sqlite' do DuckDB, se ela já estiver
+    instalada (a instalação automática é desabilitada para não depender de rede); sem a
+    extensão, a tabela 'execucoes' (uma linha por execução, pequena) é copiada para o DuckDB
+    e mantida em dia por refresh(), que copia apenas as execuções novas.
+    """
+
+    mode = None  # "anexado", "copia" ou "parquet"
+
+    def __enter__(self):
+        """
+        Abre um DuckDB em memória e expõe a tabela 'execucoes' da fonte.
+        """
+        duckdb = _require_duckdb()
+        try:
+            self.connection = duckdb.connect(database=":memory:")
+            self.connection.execute("SET autoinstall_known_extensions = false")
+            source = Path(self.db_path)
+            if source.suffix.lower() in (".parquet", ".pq"):
+                self._attach_parquet(source)
+                self.mode = "parquet"
+            else:
+                self._attach_sqlite(source)
+            return self
+        except Exception as e:
+            logging.error(f"Erro ao abrir {self.db_path} no DuckDB: {e}")
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+            raise
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Fecha o DuckDB em memória.
+        """
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def query(self, sql, params=None):
+        """
+        Executa uma consulta e retorna os resultados.
+
+        Args:
+            sql (str): Comando SQL (parâmetros posicionais com '?')
+            params (tuple, optional): Parâmetros para a consulta
+
+        Returns:
+            list: Lista de tuplas com os resultados da consulta
+        """
+        try:
+            return self.connection.execute(sql, list(params or ())).fetchall()
+        except Exception as e:
+            logging.error(f"Erro ao executar consulta no DuckDB: {e}")
+            raise
+
+    def refresh(self):
+        """
+        Sincroniza a cópia de 'execucoes' com o banco SQLite de origem.
+
+        Só se aplica quando a tabela foi copiada (sem a extensão 'sqlite'): execuções novas
+        (id maior que o último copiado) são acrescentadas; se alguma execução tiver sido
+        removida (ex.: política de retenção), a cópia é refeita. Nos demais modos as
+        consultas já leem a fonte diretamente.
+
+        Returns:
+            int: Quantidade de execuções copiadas.
+        """
+        if self.mode != "copia":
+            return 0
+
+        copied_max, copied_count = self.connection.execute("SELECT MAX(id), COUNT(*) FROM execucoes").fetchone()
+        with SqliteAdapter(str(self.db_path), tune_storage=True) as adapter:
+            source_count, source_max = adapter.query("SELECT COUNT(*), MAX(id) FROM execucoes")[0]
+            if (source_max, source_count) == (copied_max, copied_count):
+                return 0
+            new_rows = adapter.query(
+                f"SELECT {', '.join(EXECUTION_COLUMNS)} FROM execucoes WHERE id > ? ORDER BY id", (copied_max or 0,)
+            )
+
+        if copied_count + len(new_rows) != source_count:
+            logging.info("Execuções removidas na origem; recopiando 'execucoes' para o DuckDB.")
+            self.connection.execute("DELETE FROM execucoes")
+            with SqliteAdapter(str(self.db_path), tune_storage=True) as adapter:
+                new_rows = adapter.query(f"SELECT {', '.join(EXECUTION_COLUMNS)} FROM execucoes")
+        self._append_executions(new_rows)
+        return len(new_rows)
+
+    def _attach_sqlite(self, source):
+        """
+        Expõe 'execucoes' do banco SQLite: anexando-o pela extensão 'sqlite' ou, sem ela,
+        copiando a tabela para o DuckDB.
+        """
+        if not source.exists():
+            raise FileNotFoundError(f"Banco de resultados não encontrado: {source}")
+        with SqliteAdapter(str(source), tune_storage=True) as adapter:
+            found = adapter.query("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'execucoes'")
+        if not found:
+            raise ValueError(f"O banco {source} não contém resultados (tabela 'execucoes' inexistente).")
+
+        try:
+            self.connection.execute("LOAD sqlite")
+            self.connection.execute(f"ATTACH '{_quote(source)}' AS resultados (TYPE SQLITE, READ_ONLY)")
+            self.connection.execute(
+                f"CREATE VIEW execucoes AS SELECT {', '.join(EXECUTION_COLUMNS)} FROM resultados.execucoes"
+            )
+            self.mode = "anexado"
+            return
+        except Exception as e:
+            logging.info(f"Extensão 'sqlite' do DuckDB indisponível ({e}); copiando 'execucoes' para o DuckDB.")
+
+        self.connection.execute("""
+            CREATE TABLE execucoes (
+                id BIGINT,
+                nome_cenario VARCHAR,
+                serie_id VARCHAR,
+                data_execucao VARCHAR,
+                frequencia_serie VARCHAR,
+                modelo_utilizado VARCHAR,
+                parametros_modelo VARCHAR,
+                rmse DOUBLE,
+                mae DOUBLE,
+                mape DOUBLE
+            )
+        """)
+        self.mode = "copia"
+        self.refresh()
+
+    def _append_executions(self, rows):
+        """
+        Acrescenta linhas de 'execucoes' à cópia, em lote a partir de um DataFrame
+        (inserções linha a linha são lentas no DuckDB).
+        """
+        if not rows:
+            return
+        self.connection.register("execucoes_sqlite", pd.DataFrame.from_records(rows, columns=EXECUTION_COLUMNS))
+        try:
+            self.connection.execute(f"""
+                INSERT INTO execucoes
+                SELECT {', '.join(f'CAST({col} AS {_COPY_TYPES[col]})' for col in EXECUTION_COLUMNS)}
+                FROM execucoes_sqlite
+            """)
+        finally:
+            self.connection.unregister("execucoes_sqlite")
+
+    def _attach_parquet(self, source):
+        """
+        Expõe 'execucoes' a partir de uma exportação Parquet (uma linha por ponto previsto):
+        cada execução é identificada por (nome_cenario, data_execucao).
+        """
+        if not source.exists():
+            raise FileNotFoundError(f"Arquivo Parquet não encontrado: {source}")
+
+        columns = [col for col in EXECUTION_COLUMNS if col not in ("id", "nome_cenario", "data_execucao")]
+        self.connection.execute(f"""
+            CREATE VIEW execucoes AS
+            SELECT nome_cenario, data_execucao, {', '.join(f'any_value({col}) AS {col}' for col in columns)}
+            FROM read_parquet('{_quote(source)}')
+            GROUP BY nome_cenario, data_execucao
+        """)
+
+def _quote(path):
+    """
+    Escapa um caminho para uso em um literal SQL.
+    """
+    return str(path).replace("'", "''")
@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+# Arquivo com o inventário das séries do armazenamento (também serve de carimbo de versão)
+MANIFEST_FILE = "_manifest.json"
+
+# Nome do arquivo de dados dentro da partição de cada série
+PARTITION_FILE = "data.parquet"
+
+# Colunas de uma série, na ordem gravada
+SERIES_COLUMNS = ("data", "valor")
+
+def _require_pyarrow():
+    """
+    Importa o pyarrow sob demanda (dependência opcional).
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            "O armazenamento colunar de séries requer o pacote 'pyarrow' (pip install pyarrow)."
+        ) from e
+    return pa, pq
+
+def is_series_store(path) -> bool:
+    """
+    Indica se o caminho é um armazenamento colunar de séries (diretório com o inventário).
+    """
+    return Path(path).is_dir() and (Path(path) / MANIFEST_FILE).exists()
+
+class ParquetSeriesAdapter:
+    """
+    Armazenamento colunar de séries históricas: um arquivo Parquet por série, particionado
+    no estilo Hive ('<raiz>/serie_id=<id>/data.parquet'), com a coluna 'data' gravada como
+    timestamp e 'valor' como float64.
+
+    A leitura usa memória mapeada e lê apenas as colunas pedidas, sem conversão de texto.
+    Cada série é regravada por inteiro a cada escrita (arquivo temporário + troca atômica),
+    o que combina com séries que mudam pouco e são lidas muitas vezes.
+
+    O caminho do "banco" é o diretório raiz do armazenamento. Requer o pacote opcional 'pyarrow'.
+    Não é um BaseAdapter, pois não executa SQL: as séries são lidas com read_series /
+    read_series_frame.
+    """
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path (str): Diretório raiz do armazenamento.
+        """
+        self.db_path = db_path
+
+    def __enter__(self):
+        """
+        Valida a disponibilidade do pyarrow; não há conexão a abrir.
+        """
+        _require_pyarrow()
+        self.root = Path(self.db_path)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Nada a liberar: cada leitura/escrita abre e fecha seus próprios arquivos.
+        """
+        pass
+
+    def create_schema_if_not_exists(self):
+        """
+        Cria o diretório raiz e o inventário vazio, se não existirem.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        if not (self.root / MANIFEST_FILE).exists():
+            self._write_manifest({})
+            logging.info(f"Armazenamento colunar de séries criado em {self.root}.")
+
+    def insert_many(self, table_name, data):
+        """
+        Insere (ou atualiza) registros de uma série. Aqui a "tabela" é a própria série.
+
+        Args:
+            table_name (str): serie_id da série.
+            data (list): Lista de dicionários com as chaves 'data' e 'valor'. Datas já
+                         existentes têm o valor substituído.
+        """
+        if not data:
+            logging.warning("Nenhum dado fornecido para inserção.")
+            return
+
+        new_rows = pd.DataFrame.from_records(data, columns=SERIES_COLUMNS)
+        if self.has_series(table_name):
+            new_rows = pd.concat([self.read_series_frame(table_name), new_rows], ignore_index=True)
+        self.write_series(table_name, new_rows)
+
+    def write_series(self, serie_id, df):
+        """
+        Grava a série inteira, substituindo a versão anterior de forma atômica.
+
+        Args:
+            serie_id (str): Identificador da série.
+            df (pd.DataFrame): DataFrame com as colunas 'data' e 'valor'. Linhas sem data são
+                               descartadas; datas duplicadas mantêm o último valor.
+
+        Returns:
+            int: Quantidade de registros gravados.
+        """
+        pa, pq = _require_pyarrow()
+
+        df = pd.DataFrame({
+            "data": pd.to_datetime(df["data"]).astype("datetime64[ns]"),
+            "valor": pd.to_numeric(df["valor"], errors="coerce").astype(float)
+        })
+        df = (df.dropna(subset=["data"])
+                .drop_duplicates(subset="data", keep="last")
+                .sort_values("data", kind="stable"))
+
+        schema = pa.schema([("data", pa.timestamp("ns")), ("valor", pa.float64())])
+        table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+        partition = self._partition_path(serie_id)
+        partition.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = partition.with_name(f".{PARTITION_FILE}.tmp")
+        pq.write_table(table, temp_path)
+        os.replace(temp_path, partition)
+
+        manifest = self._read_manifest()
+        manifest[serie_id] = {
+            "registros": len(df),
+            "data_min": df["data"].min().isoformat() if len(df) else None,
+            "data_max": df["data"].max().isoformat() if len(df) else None
+        }
+        self._write_manifest(manifest)
+        return len(df)
+
+    def read_series(self, serie_id, columns=SERIES_COLUMNS):
+        """
+        Lê uma série como tabela Arrow, com memória mapeada e apenas as colunas pedidas.
+
+        Args:
+            serie_id (str): Identificador da série.
+            columns (Sequence[str]): Colunas a ler ('data' e/ou 'valor').
+
+        Returns:
+            pyarrow.Table: Tabela com as colunas pedidas, ordenada por data.
+
+        Raises:
+            ValueError: Se a série não existir no armazenamento.
+        """
+        _, pq = _require_pyarrow()
+        partition = self._partition_path(serie_id)
+        if not partition.exists():
+            raise ValueError(f"Nenhum dado encontrado para a série {serie_id}")
+        return pq.read_table(partition, columns=list(columns), memory_map=True)
+
+    def read_series_frame(self, serie_id, columns=SERIES_COLUMNS):
+        """
+        Lê uma série como DataFrame ('data' em datetime64[ns], 'valor' em float64).
+        """
+        return self.read_series(serie_id, columns).to_pandas()
+
+    def has_series(self, serie_id):
+        """
+        Indica se a série existe no armazenamento.
+        """
+        return self._partition_path(serie_id).exists()
+
+    def list_series(self):
+        """
+        Retorna os IDs das séries do armazenamento, em ordem alfabética.
+        """
+        return sorted(self._read_manifest())
+
+    def delete_series(self, serie_id):
+        """
+        Remove a partição de uma série, se existir.
+        """
+        partition_dir = self._partition_path(serie_id).parent
+        if partition_dir.exists():
+            shutil.rmtree(partition_dir)
+        manifest = self._read_manifest()
+        if manifest.pop(serie_id, None) is not None:
+            self._write_manifest(manifest)
+
+    def _partition_path(self, serie_id):
+        """
+        Caminho do arquivo da série; o serie_id é codificado para ser um nome de diretório válido.
+        """
+        return self.root / f"serie_id={quote(str(serie_id), safe='')}" / PARTITION_FILE
+
+    def _read_manifest(self):
+        """
+        Lê o inventário; se ele não existir, reconstrói a lista de séries a partir das partições.
+        """
+        manifest_path = self.root / MANIFEST_FILE
+        if manifest_path.exists():
+            with open(manifest_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        return {
+            unquote(path.parent.name.split("=", 1)[1]): {}
+            for path in self.root.glob(f"serie_id=*/{PARTITION_FILE}")
+        }
+
+    def _write_manifest(self, manifest):
+        """
+        Grava o inventário de forma atômica.
+        """
+        manifest_path = self.root / MANIFEST_FILE
+        temp_path = manifest_path.with_name(f".{MANIFEST_FILE}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(manifest, file, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(temp_path, manifest_path)
@@ -1,22 +1,138 @@
+import os
 import sqlite3
 import logging
+import threading
+from contextlib import contextmanager
 from .base_adapter import BaseAdapter
 
+# Pragmas aplicados a cada nova conexão (valem apenas para a conexão; não alteram o arquivo)
+CONNECTION_PRAGMAS = (
+    ("cache_size", -65536),         # 64 MiB de cache de páginas
+    ("mmap_size", 268435456),       # Até 256 MiB lidos via memória mapeada
+    ("temp_store", "MEMORY"),       # Tabelas/índices temporários em memória
+    ("foreign_keys", "ON"),
+)
+
+# Pragmas de escrita, aplicados só com tune_storage=True (banco de resultados). O modo WAL e o
+# auto_vacuum ficam gravados no arquivo, por isso não são aplicados aos bancos de dados de
+# entrada do usuário (ex.: dados_bcb.db), que apenas os lê
+STORAGE_PRAGMAS = (
+    ("auto_vacuum", "INCREMENTAL"), # Bancos novos liberam espaço com incremental_vacuum (precisa vir antes do WAL)
+    ("journal_mode", "WAL"),        # Leitores não bloqueiam o escritor (e vice-versa)
+    ("synchronous", "NORMAL"),      # Seguro com WAL e bem mais rápido que FULL
+)
+
+# Espera máxima (segundos) por um lock de outra conexão antes de falhar
+BUSY_TIMEOUT = 30.0
+
+# Quantidade de comandos preparados mantidos em cache por conexão
+STATEMENT_CACHE_SIZE = 256
+
+# Conexões reutilizáveis, uma por (processo, banco) em cada thread
+_thread_local = threading.local()
+
+def _connect(db_path, tune_storage=False):
+    """
+    Abre uma conexão nova e aplica os pragmas de desempenho (e os de escrita, se tune_storage).
+    """
+    connection = sqlite3.connect(
+        db_path,
+        timeout=BUSY_TIMEOUT,
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
+    connection.row_factory = sqlite3.Row  # Permite acesso por nome de coluna
+    pragmas = STORAGE_PRAGMAS + CONNECTION_PRAGMAS if tune_storage else CONNECTION_PRAGMAS
+    for pragma, value in pragmas:
+        try:
+            connection.execute(f"PRAGMA {pragma} = {value}")
+        except sqlite3.DatabaseError as e:
+            # Ex.: WAL indisponível em mídia somente leitura; segue com o padrão do SQLite
+            logging.warning(f"Não foi possível aplicar PRAGMA {pragma} em {db_path}: {e}")
+    return connection
+
+def _file_identity(db_path):
+    """
+    Identifica o arquivo do banco (dispositivo, inode) para detectar se ele foi substituído.
+    """
+    try:
+        stat = os.stat(db_path)
+        return stat.st_dev, stat.st_ino
+    except OSError:
+        return None
+
+def get_connection(db_path, tune_storage=False):
+    """
+    Retorna a conexão reutilizável da thread atual para o banco informado, abrindo-a se necessário.
+
+    A conexão é reaberta se o arquivo do banco tiver sido removido ou substituído.
+
+    Args:
+        db_path (str): Caminho para o arquivo do banco de dados
+        tune_storage (bool): Aplica também os pragmas de STORAGE_PRAGMAS
+
+    Returns:
+        sqlite3.Connection: Conexão configurada com os pragmas de CONNECTION_PRAGMAS
+    """
+    connections = getattr(_thread_local, "connections", None)
+    if connections is None:
+        connections = _thread_local.connections = {}
+
+    key = (os.getpid(), os.path.abspath(db_path), tune_storage)
+    identity = _file_identity(db_path)
+    cached = connections.get(key)
+    if cached is not None:
+        connection, cached_identity = cached
+        if identity is not None and identity == cached_identity:
+            return connection
+        connection.close()
+
+    connection = _connect(db_path, tune_storage)
+    connections[key] = (connection, _file_identity(db_path))
+    return connection
+
+def close_thread_connections():
+    """
+    Fecha as conexões reutilizáveis abertas pela thread atual.
+    """
+    connections = getattr(_thread_local, "connections", None) or {}
+    for key, (connection, _) in list(connections.items()):
+        if key[0] == os.getpid():
+            connection.close()
+    connections.clear()
+
 class SqliteAdapter(BaseAdapter):
     """
     Implementação concreta do adaptador para bancos de dados SQLite.
+
+    Por padrão, a conexão é reaproveitada entre blocos 'with' da mesma thread (ver
+    get_connection), mantendo o cache de páginas e de comandos preparados entre usos.
     """
+
+    def __init__(self, db_path, persistent=True, tune_storage=False):
+        """
+        Inicializa o adaptador com o caminho do banco de dados.
+
+        Args:
+            db_path (str): Caminho para o arquivo do banco de dados
+            persistent (bool): Reutiliza a conexão da thread atual em vez de abrir e fechar uma nova
+            tune_storage (bool): Converte o banco para WAL e auto_vacuum incremental (ver
+                                 STORAGE_PRAGMAS). Usado apenas no banco de resultados.
+        """
+        super().__init__(db_path)
+        self.persistent = persistent
+        self.tune_storage = tune_storage
     
     def __enter__(self):
         """
-        Estabelece a conexão com o banco de dados SQLite.
+        Estabelece (ou reaproveita) a conexão com o banco de dados SQLite.
         """
         try:
-            self.connection = sqlite3.connect(self.db_path)
-            self.connection.row_factory = sqlite3.Row  # Permite acesso por nome de coluna
+            if self.persistent:
+                self.connection = get_connection(self.db_path, self.tune_storage)
+            else:
+                self.connection = _connect(self.db_path, self.tune_storage)
             if not self.connection:
                 raise Exception(f"Não foi possível conectar ao banco de dados {self.db_path}.")
-                # Criar banco de dados se não existir
                 
             return self
         except Exception as e:
@@ -25,49 +141,413 @@ class SqliteAdapter(BaseAdapter):
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """
-        Fecha a conexão com o banco de dados.
+        Libera a conexão: desfaz uma transação deixada aberta e, se a conexão não for
+        reutilizável, fecha-a.
         """
         if self.connection:
-            self.connection.close()
+            if self.connection.in_transaction:
+                self.connection.rollback()
+            if not self.persistent:
+                self.connection.close()
+            self.connection = None
     
+    # Objetos do esquema normalizado de resultados: metadados de cada execução em
+    # 'execucoes' e os pontos previstos em 'pontos_previsao'. 'resultados_previsao'
+    # é uma view com o layout antigo (uma linha por ponto) para leitura e inserção.
+    RESULTS_SCHEMA_OBJECTS = {
+        ("table", "execucoes"),
+        ("table", "pontos_previsao"),
+        ("view", "resultados_previsao"),
+        ("trigger", "trg_resultados_previsao_insert"),
+    }
+
+    # Ordem dos valores de cada ponto de previsão recebido por insert_forecasts
+    POINT_COLUMNS = ("data_previsao", "valor_previsto", "limite_inferior", "limite_superior")
+
     def create_schema_if_not_exists(self):
         """
-        Cria a tabela de resultados de previsão se ela não existir.
-        Adiciona colunas para métricas de avaliação e frequência da série se não existirem.
+        Cria o esquema de resultados de previsão se ele não existir.
+
+        Os metadados de cada execução (cenário, série, modelo, parâmetros e métricas) ficam
+        uma única vez em 'execucoes'; 'pontos_previsao' guarda apenas os valores previstos
+        e referencia a execução. A view 'resultados_previsao' reproduz o layout antigo e
+        aceita INSERT (via trigger) para compatibilidade. Bancos com a tabela antiga
+        'resultados_previsao' são migrados automaticamente.
         """
-        create_table_sql = """
-        CREATE TABLE IF NOT EXISTS resultados_previsao (
+        try:
+            cursor = self.connection.cursor()
+            if self._results_schema_is_current(cursor):
+                return
+
+            cursor.execute("BEGIN IMMEDIATE")
+            # Outra conexão pode ter criado/migrado o esquema enquanto esperávamos o lock
+            if not self._results_schema_is_current(cursor):
+                self._create_results_schema(cursor)
+            self.connection.commit()
+            logging.info("Esquema do banco de dados verificado/criado com sucesso.")
+        except Exception as e:
+            if self.connection.in_transaction:
+                self.connection.rollback()
+            logging.error(f"Erro ao criar esquema do banco de dados: {e}")
+            raise
+
+    def _results_schema_is_current(self, cursor):
+        """
+        Verifica se todos os objetos do esquema normalizado de resultados já existem.
+        """
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'view', 'trigger')")
+        existing = {(row[0], row[1]) for row in cursor.fetchall()}
+        return self.RESULTS_SCHEMA_OBJECTS <= existing
+
+    def _create_results_schema(self, cursor):
+        """
+        Cria as tabelas normalizadas, migra a tabela antiga (se houver) e cria a view de compatibilidade.
+        Deve ser chamado dentro de uma transação.
+        """
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS execucoes (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             nome_cenario TEXT NOT NULL,
             serie_id TEXT NOT NULL,
             data_execucao TIMESTAMP NOT NULL,
-            data_previsao DATE NOT NULL,
             frequencia_serie TEXT,
-            valor_previsto REAL NOT NULL,
-            limite_inferior REAL,
-            limite_superior REAL,
             modelo_utilizado TEXT NOT NULL,
             parametros_modelo TEXT,
             rmse REAL,
             mae REAL,
             mape REAL
         )
+        """)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pontos_previsao (
+            execucao_id INTEGER NOT NULL REFERENCES execucoes (id) ON DELETE CASCADE,
+            data_previsao DATE NOT NULL,
+            valor_previsto REAL NOT NULL,
+            limite_inferior REAL,
+            limite_superior REAL,
+            PRIMARY KEY (execucao_id, data_previsao)
+        ) WITHOUT ROWID
+        """)
+
+        # Índices para a busca das execuções de um cenário e para a ordenação por execução
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_execucoes_cenario_execucao
+            ON execucoes (nome_cenario, data_execucao)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_execucoes_data_execucao
+            ON execucoes (data_execucao)
+        """)
+
+        cursor.execute("SELECT type FROM sqlite_master WHERE name = 'resultados_previsao'")
+        row = cursor.fetchone()
+        if row is not None and row[0] == "table":
+            self._migrate_legacy_results(cursor)
+
+        cursor.execute("""
+        CREATE VIEW IF NOT EXISTS resultados_previsao AS
+        SELECT
+            e.id AS execucao_id,
+            e.nome_cenario,
+            e.serie_id,
+            e.data_execucao,
+            p.data_previsao,
+            e.frequencia_serie,
+            p.valor_previsto,
+            p.limite_inferior,
+            p.limite_superior,
+            e.modelo_utilizado,
+            e.parametros_modelo,
+            e.rmse,
+            e.mae,
+            e.mape
+        FROM execucoes e
+        JOIN pontos_previsao p ON p.execucao_id = e.id
+        """)
+
+        # Inserções no layout antigo: a execução é criada na primeira linha de cada
+        # (nome_cenario, data_execucao) e reaproveitada pelas seguintes
+        cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_resultados_previsao_insert
+        INSTEAD OF INSERT ON resultados_previsao
+        BEGIN
+            INSERT INTO execucoes (nome_cenario, serie_id, data_execucao, frequencia_serie,
+                                   modelo_utilizado, parametros_modelo, rmse, mae, mape)
+            SELECT NEW.nome_cenario, NEW.serie_id, NEW.data_execucao, NEW.frequencia_serie,
+                   NEW.modelo_utilizado, NEW.parametros_modelo, NEW.rmse, NEW.mae, NEW.mape
+            WHERE NOT EXISTS (
+                SELECT 1 FROM execucoes
+                WHERE nome_cenario = NEW.nome_cenario AND data_execucao = NEW.data_execucao
+            );
+            INSERT INTO pontos_previsao (execucao_id, data_previsao, valor_previsto, limite_inferior, limite_superior)
+            SELECT id, NEW.data_previsao, NEW.valor_previsto, NEW.limite_inferior, NEW.limite_superior
+            FROM execucoes
+            WHERE nome_cenario = NEW.nome_cenario AND data_execucao = NEW.data_execucao
+            ORDER BY id DESC
+            LIMIT 1;
+        END
+        """)
+
+    def _migrate_legacy_results(self, cursor):
+        """
+        Move os dados da tabela antiga 'resultados_previsao' (uma linha por ponto, com os
+        metadados repetidos) para 'execucoes' + 'pontos_previsao' e remove a tabela antiga.
+        """
+        logging.info("Migrando 'resultados_previsao' para o esquema normalizado (execucoes + pontos_previsao)...")
+
+        # Bancos muito antigos podem não ter as colunas de métricas e frequência
+        self._add_column_if_not_exists(cursor, "resultados_previsao", "rmse", "REAL")
+        self._add_column_if_not_exists(cursor, "resultados_previsao", "mae", "REAL")
+        self._add_column_if_not_exists(cursor, "resultados_previsao", "mape", "REAL")
+        self._add_column_if_not_exists(cursor, "resultados_previsao", "frequencia_serie", "TEXT")
+
+        # Cada execução de cenário é identificada por (nome_cenario, data_execucao)
+        cursor.execute("""
+            INSERT INTO execucoes (nome_cenario, serie_id, data_execucao, frequencia_serie,
+                                   modelo_utilizado, parametros_modelo, rmse, mae, mape)
+            SELECT nome_cenario, serie_id, data_execucao, frequencia_serie,
+                   modelo_utilizado, parametros_modelo, rmse, mae, mape
+            FROM resultados_previsao
+            GROUP BY nome_cenario, data_execucao
+            ORDER BY MIN(id)
+        """)
+        cursor.execute("""
+            INSERT OR REPLACE INTO pontos_previsao (execucao_id, data_previsao, valor_previsto, limite_inferior, limite_superior)
+            SELECT e.id, r.data_previsao, r.valor_previsto, r.limite_inferior, r.limite_superior
+            FROM resultados_previsao r
+            JOIN execucoes e ON e.nome_cenario = r.nome_cenario AND e.data_execucao = r.data_execucao
+            ORDER BY r.id
+        """)
+        migrated = cursor.rowcount
+        cursor.execute("DROP TABLE resultados_previsao")
+        logging.info(f"Migração concluída: {migrated} pontos de previsão migrados.")
+
+    def insert_forecasts(self, forecasts):
+        """
+        Grava execuções de previsão no esquema normalizado, em uma única transação.
+
+        Args:
+            forecasts (Iterable[tuple]): Pares (execucao, pontos), em que 'execucao' é um dicionário
+                com as colunas da tabela 'execucoes' (sem 'id') e 'pontos' é um iterável de tuplas
+                na ordem de POINT_COLUMNS, consumido sob demanda.
+
+        Returns:
+            list: IDs das execuções inseridas, na ordem recebida.
+        """
+        point_sql = (
+            f"INSERT INTO pontos_previsao (execucao_id, {', '.join(self.POINT_COLUMNS)}) "
+            f"VALUES (?, {', '.join('?' for _ in self.POINT_COLUMNS)})"
+        )
+
+        execution_ids = []
+        total_points = 0
+        with self.transaction() as cursor:
+            for execution, points in forecasts:
+                columns = list(execution.keys())
+                cursor.execute(
+                    f"INSERT INTO execucoes ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                    tuple(execution[col] for col in columns)
+                )
+                execution_id = cursor.lastrowid
+                cursor.executemany(point_sql, ((execution_id, *point) for point in points))
+                total_points += cursor.rowcount
+                execution_ids.append(execution_id)
+        logging.info(f"Inseridas {len(execution_ids)} execuções com {total_points} pontos de previsão.")
+        return execution_ids
+
+    # Colunas de cada dobra recebida por insert_backtest
+    BACKTEST_FOLD_COLUMNS = ("dobra", "inicio_treino", "fim_treino", "fim_teste", "pontos_treino", "rmse", "mae", "mape")
+
+    def create_backtest_schema_if_not_exists(self):
+        """
+        Cria as tabelas do backtesting se elas não existirem: 'backtests' (um registro por
+        cenário avaliado, com as métricas agregadas) e 'backtest_dobras' (métricas de cada dobra).
         """
-        
         try:
             cursor = self.connection.cursor()
-            cursor.execute(create_table_sql)
-            
-            # Adicionar colunas se não existirem (para compatibilidade com DBs existentes)
-            self._add_column_if_not_exists(cursor, "resultados_previsao", "rmse", "REAL")
-            self._add_column_if_not_exists(cursor, "resultados_previsao", "mae", "REAL")
-            self._add_column_if_not_exists(cursor, "resultados_previsao", "mape", "REAL")
-            self._add_column_if_not_exists(cursor, "resultados_previsao", "frequencia_serie", "TEXT")
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS backtests (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome_cenario TEXT NOT NULL,
+                serie_id TEXT NOT NULL,
+                data_execucao TIMESTAMP NOT NULL,
+                modelo_utilizado TEXT NOT NULL,
+                parametros_modelo TEXT,
+                horizonte INTEGER NOT NULL,
+                janela TEXT NOT NULL,
+                passo INTEGER NOT NULL,
+                dobras INTEGER NOT NULL,
+                rmse REAL,
+                mae REAL,
+                mape REAL,
+                mape_desvio REAL,
+                duracao REAL
+            )
+            """)
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS backtest_dobras (
+                backtest_id INTEGER NOT NULL REFERENCES backtests (id) ON DELETE CASCADE,
+                dobra INTEGER NOT NULL,
+                inicio_treino DATE NOT NULL,
+                fim_treino DATE NOT NULL,
+                fim_teste DATE NOT NULL,
+                pontos_treino INTEGER NOT NULL,
+                rmse REAL,
+                mae REAL,
+                mape REAL,
+                PRIMARY KEY (backtest_id, dobra)
+            ) WITHOUT ROWID
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_backtests_cenario_execucao
+                ON backtests (nome_cenario, data_execucao)
+            """)
+            self.connection.commit()
+        except Exception as e:
+            if self.connection.in_transaction:
+                self.connection.rollback()
+            logging.error(f"Erro ao criar esquema de backtesting: {e}")
+            raise
+
+    def insert_backtest(self, backtest, folds):
+        """
+        Grava um backtest e as métricas de suas dobras em uma única transação.
+
+        Args:
+            backtest (dict): Colunas da tabela 'backtests' (sem 'id').
+            folds (Iterable[dict]): Dobras, com as chaves de BACKTEST_FOLD_COLUMNS.
 
+        Returns:
+            int: ID do backtest inserido.
+        """
+        columns = list(backtest.keys())
+        fold_sql = (
+            f"INSERT INTO backtest_dobras (backtest_id, {', '.join(self.BACKTEST_FOLD_COLUMNS)}) "
+            f"VALUES (?, {', '.join('?' for _ in self.BACKTEST_FOLD_COLUMNS)})"
+        )
+        with self.transaction() as cursor:
+            cursor.execute(
+                f"INSERT INTO backtests ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                tuple(backtest[col] for col in columns)
+            )
+            backtest_id = cursor.lastrowid
+            cursor.executemany(
+                fold_sql,
+                ((backtest_id, *(fold[col] for col in self.BACKTEST_FOLD_COLUMNS)) for fold in folds)
+            )
+        return backtest_id
+
+    # Colunas de cada medida recebida por insert_stage_timings
+    TIMING_COLUMNS = ("execucao_id", "nome_cenario", "serie_id", "modelo_utilizado", "data_execucao", "status",
+                      "ordem", "etapa", "etapa_pai", "duracao", "tempo_cpu", "memoria_pico")
+
+    def create_timing_schema_if_not_exists(self):
+        """
+        Cria a tabela 'tempos_etapas' se ela não existir: uma linha por etapa de cada execução
+        de cenário, com tempo de relógio, tempo de CPU e pico de memória. Execuções que não
+        gravaram resultados (erro, cancelamento) ficam com 'execucao_id' nulo; as demais são
+        removidas junto com a execução. Requer o esquema de resultados (ver create_schema_if_not_exists).
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS tempos_etapas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                execucao_id INTEGER REFERENCES execucoes (id) ON DELETE CASCADE,
+                nome_cenario TEXT NOT NULL,
+                serie_id TEXT,
+                modelo_utilizado TEXT,
+                data_execucao TIMESTAMP NOT NULL,
+                status TEXT NOT NULL,
+                ordem INTEGER NOT NULL,
+                etapa TEXT NOT NULL,
+                etapa_pai TEXT,
+                duracao REAL NOT NULL,
+                tempo_cpu REAL,
+                memoria_pico INTEGER
+            )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_tempos_etapas_cenario_execucao
+                ON tempos_etapas (nome_cenario, data_execucao)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_tempos_etapas_execucao
+                ON tempos_etapas (execucao_id)
+            """)
             self.connection.commit()
-            logging.info("Esquema do banco de dados verificado/criado com sucesso.")
         except Exception as e:
-            logging.error(f"Erro ao criar esquema do banco de dados: {e}")
+            if self.connection.in_transaction:
+                self.connection.rollback()
+            logging.error(f"Erro ao criar esquema de tempos das etapas: {e}")
+            raise
+
+    def insert_stage_timings(self, rows):
+        """
+        Grava as medidas das etapas em uma única transação.
+
+        Args:
+            rows (Iterable[tuple]): Tuplas na ordem de TIMING_COLUMNS.
+
+        Returns:
+            int: Quantidade de medidas inseridas.
+        """
+        sql = (
+            f"INSERT INTO tempos_etapas ({', '.join(self.TIMING_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in self.TIMING_COLUMNS)})"
+        )
+        with self.transaction() as cursor:
+            cursor.executemany(sql, rows)
+            return cursor.rowcount
+
+    def create_series_schema_if_not_exists(self):
+        """
+        Cria a tabela 'series_consolidada' agrupada fisicamente por (serie_id, data).
+
+        A tabela é WITHOUT ROWID com chave primária (serie_id, data), de modo que a leitura de
+        uma série é uma busca na chave já ordenada por data, sem varredura nem ordenação.
+        Tabelas criadas por versões anteriores (sem chave) são migradas; datas duplicadas
+        em uma mesma série mantêm o último valor inserido.
+        """
+        create_table_sql = """
+        CREATE TABLE IF NOT EXISTS {name} (
+            serie_id TEXT NOT NULL,
+            data TEXT NOT NULL,
+            valor REAL,
+            PRIMARY KEY (serie_id, data)
+        ) WITHOUT ROWID
+        """
+
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'series_consolidada'")
+            row = cursor.fetchone()
+
+            if row is None:
+                cursor.execute(create_table_sql.format(name="series_consolidada"))
+            elif "WITHOUT ROWID" not in row[0].upper():
+                logging.info("Migrando 'series_consolidada' para tabela agrupada por (serie_id, data)...")
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("DROP TABLE IF EXISTS series_consolidada_migracao")
+                cursor.execute(create_table_sql.format(name="series_consolidada_migracao"))
+                cursor.execute("""
+                    INSERT OR REPLACE INTO series_consolidada_migracao (serie_id, data, valor)
+                    SELECT serie_id, data, valor
+                    FROM series_consolidada
+                    WHERE serie_id IS NOT NULL AND data IS NOT NULL
+                    ORDER BY rowid
+                """)
+                cursor.execute("DROP TABLE series_consolidada")
+                cursor.execute("ALTER TABLE series_consolidada_migracao RENAME TO series_consolidada")
+                self.connection.commit()
+                cursor.execute("PRAGMA optimize")
+                logging.info("Migração de 'series_consolidada' concluída.")
+
+            self.connection.commit()
+        except Exception as e:
+            if self.connection.in_transaction:
+                self.connection.rollback()
+            logging.error(f"Erro ao criar esquema de séries: {e}")
             raise
 
     def _add_column_if_not_exists(self, cursor, table_name, column_name, column_type):
@@ -98,6 +578,22 @@ class SqliteAdapter(BaseAdapter):
         
         # Obtém as colunas do primeiro registro
         columns = list(data[0].keys())
+        # Converte os dicionários em tuplas na ordem correta das colunas, sob demanda
+        values = (tuple(record[col] for col in columns) for record in data)
+        self.insert_rows(table_name, columns, values)
+    
+    def insert_rows(self, table_name, columns, rows):
+        """
+        Insere registros já em forma de tuplas, consumindo o iterável sob demanda.
+
+        Args:
+            table_name (str): Nome da tabela
+            columns (Sequence[str]): Nomes das colunas, na ordem dos valores das tuplas
+            rows (Iterable[tuple]): Tuplas (ou gerador de tuplas) com os valores
+
+        Returns:
+            int: Quantidade de registros inseridos
+        """
         placeholders = ", ".join(["?" for _ in columns])
         columns_str = ", ".join(columns)
         
@@ -105,12 +601,12 @@ class SqliteAdapter(BaseAdapter):
         
         try:
             cursor = self.connection.cursor()
-            # Converte os dicionários em tuplas na ordem correta das colunas
-            values = [tuple(record[col] for col in columns) for record in data]
-            cursor.executemany(sql, values)
+            cursor.executemany(sql, rows)
             self.connection.commit()
-            logging.info(f"Inseridos {len(data)} registros na tabela {table_name}.")
+            logging.info(f"Inseridos {cursor.rowcount} registros na tabela {table_name}.")
+            return cursor.rowcount
         except Exception as e:
+            self.connection.rollback()
             logging.error(f"Erro ao inserir dados na tabela {table_name}: {e}")
             raise
     
@@ -152,3 +648,26 @@ class SqliteAdapter(BaseAdapter):
             logging.error(f"Erro ao executar comando de escrita: {e}")
             raise
 
+    @contextmanager
+    def transaction(self):
+        """
+        Agrupa vários comandos em uma única transação.
+        Faz commit ao final do bloco 'with' ou rollback se ocorrer uma exceção.
+
+        Uso:
+            with adapter.transaction() as cursor:
+                cursor.execute(...)
+
+        Yields:
+            sqlite3.Cursor: Cursor para executar os comandos da transação.
+        """
+        cursor = self.connection.cursor()
+        # IMMEDIATE reserva a escrita já no início, evitando conflitos ao promover a transação
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            yield cursor
+            self.connection.commit()
+        except Exception as e:
+            self.connection.rollback()
+            logging.error(f"Erro na transação, alterações desfeitas: {e}")
+            raise
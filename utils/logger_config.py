@@ -1,5 +1,6 @@
 import logging
 import sys
+from collections import deque
 from datetime import datetime
 
 def setup_logger(name="processador_cenarios", level=logging.INFO):
@@ -38,26 +39,122 @@ def setup_logger(name="processador_cenarios", level=logging.INFO):
     
     return logger
 
+# Padrões do handler da GUI
+GUI_LOG_MAX_LINES = 2000         # Linhas mantidas na caixa de texto (as mais antigas são descartadas)
+GUI_LOG_POLL_INTERVAL_MS = 100   # Intervalo entre as descargas da fila na caixa de texto
+
 class GuiLogHandler(logging.Handler):
     """
     Handler customizado para enviar logs para um widget de texto da GUI.
+
+    emit() pode ser chamado de qualquer thread e apenas enfileira a mensagem formatada; o
+    widget só é alterado na thread do Tk, por um temporizador (after) que descarrega a fila
+    em lote, com uma única inserção e um único scroll por descarga. A caixa de texto guarda
+    no máximo 'max_lines' linhas e a fila também é limitada a 'max_lines' mensagens, de modo
+    que rajadas de log não acumulam memória nem travam a janela.
+
+    O nível mínimo exibido é o nível do próprio handler (setLevel).
     """
-    def __init__(self, text_widget=None):
-        super().__init__()
+    def __init__(self, text_widget=None, max_lines=GUI_LOG_MAX_LINES, level=logging.NOTSET,
+                 poll_interval_ms=GUI_LOG_POLL_INTERVAL_MS):
+        """
+        Args:
+            text_widget: Caixa de texto (CTkTextbox ou tk.Text) que exibe os logs.
+            max_lines (int): Quantidade máxima de linhas mantidas na caixa de texto.
+            level: Nível mínimo das mensagens exibidas.
+            poll_interval_ms (int): Intervalo (ms) entre as descargas da fila.
+        """
+        super().__init__(level)
+        if max_lines < 1:
+            raise ValueError("max_lines deve ser um inteiro maior que zero.")
         self.text_widget = text_widget
-    
+        self.max_lines = max_lines
+        self.poll_interval_ms = poll_interval_ms
+        self.dropped = 0
+        # deque com append/popleft atômicos: dispensa lock entre as threads de log e a do Tk
+        self._queue = deque(maxlen=max_lines)
+        self._after_id = None
+        if text_widget is not None:
+            self.start()
+
     def emit(self, record):
         """
-        Emite uma mensagem de log para o widget de texto.
+        Enfileira a mensagem formatada (chamado de qualquer thread; não acessa o widget).
+        """
+        try:
+            if len(self._queue) == self.max_lines:
+                self.dropped += 1 # A mensagem mais antiga da fila será descartada
+            self._queue.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+    def start(self, text_widget=None):
+        """
+        Inicia (ou reinicia) o temporizador que descarrega a fila no widget.
+        Deve ser chamado na thread do Tk.
+        """
+        if text_widget is not None:
+            self.text_widget = text_widget
+        self.stop()
+        self._after_id = self.text_widget.after(self.poll_interval_ms, self._drain)
+
+    def stop(self):
         """
-        if self.text_widget:
+        Interrompe o temporizador de descarga. Deve ser chamado na thread do Tk.
+        """
+        if self._after_id is not None:
             try:
-                msg = self.format(record)
-                # Adiciona a mensagem ao widget de texto
-                self.text_widget.insert("end", msg + "\n")
-                # Faz scroll automático para a última linha
-                self.text_widget.see("end")
+                self.text_widget.after_cancel(self._after_id)
             except Exception:
-                # Se houver erro, não faz nada para evitar quebrar a aplicação
-                pass
+                pass # Widget já destruído
+            self._after_id = None
+
+    def close(self):
+        """
+        Interrompe o temporizador e fecha o handler.
+        """
+        self.stop()
+        super().close()
 
+    def flush_to_widget(self):
+        """
+        Descarrega imediatamente as mensagens pendentes no widget (na thread do Tk).
+        """
+        lines = []
+        while True:
+            try:
+                lines.append(self._queue.popleft())
+            except IndexError:
+                break
+        if not lines or self.text_widget is None:
+            return
+
+        try:
+            if self.dropped:
+                # Aviso no topo do lote, sem ultrapassar o limite de linhas
+                kept = lines[-(self.max_lines - 1):] if self.max_lines > 1 else []
+                dropped = self.dropped + len(lines) - len(kept)
+                lines = [f"... {dropped} mensagens de log descartadas ..."] + kept
+                self.dropped = 0
+            # Adiciona as mensagens ao widget de texto de uma só vez
+            self.text_widget.insert("end", "\n".join(lines) + "\n")
+            # Mantém apenas as últimas 'max_lines' linhas ("end" fica após a quebra de linha final)
+            excess = int(self.text_widget.index("end").split(".")[0]) - 2 - self.max_lines
+            if excess > 0:
+                self.text_widget.delete("1.0", f"{excess + 1}.0")
+            # Faz scroll automático para a última linha
+            self.text_widget.see("end")
+        except Exception:
+            # Se houver erro, não faz nada para evitar quebrar a aplicação
+            pass
+
+    def _drain(self):
+        """
+        Descarrega a fila e agenda a próxima descarga.
+        """
+        self._after_id = None
+        self.flush_to_widget()
+        try:
+            self._after_id = self.text_widget.after(self.poll_interval_ms, self._drain)
+        except Exception:
+            pass # Widget destruído: encerra o temporizador
@@ -0,0 +1,191 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+# Configura o logger para este módulo
+logger = logging.getLogger(__name__)
+
+# Etapas de um cenário, na ordem em que ocorrem (chave "etapa" dos eventos de progresso)
+ETAPA_BUSCA = "busca"  # Busca de parâmetros, antes da execução (só nos cenários com 'busca_parametros')
+ETAPA_INICIO = "inicio"
+ETAPA_CARREGAMENTO = "carregamento"
+ETAPA_AJUSTE = "ajuste"
+ETAPA_METRICAS = "metricas"
+ETAPA_GRAVACAO = "gravacao"
+ETAPA_CONCLUIDO = "concluido"
+ETAPAS = (ETAPA_BUSCA, ETAPA_INICIO, ETAPA_CARREGAMENTO, ETAPA_AJUSTE, ETAPA_METRICAS, ETAPA_GRAVACAO, ETAPA_CONCLUIDO)
+
+class RunCancelled(Exception):
+    """
+    Lançada nos pontos de verificação quando a execução foi cancelada.
+    """
+
+class CancelToken:
+    """
+    Sinal de cancelamento cooperativo: quem executa verifica o token entre as etapas e nos
+    laços longos e interrompe o trabalho ao encontrá-lo acionado.
+
+    Por padrão usa um threading.Event; para atravessar processos, recebe um Event de
+    multiprocessing (ver run_scenarios).
+    """
+
+    def __init__(self, event=None):
+        """
+        Args:
+            event (optional): Objeto com set() e is_set(). Padrão: threading.Event().
+        """
+        self.event = event if event is not None else threading.Event()
+
+    def cancel(self) -> None:
+        """
+        Solicita o cancelamento.
+        """
+        self.event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        Indica se o cancelamento foi solicitado.
+        """
+        return self.event.is_set()
+
+    def raise_if_cancelled(self, etapa: str = None) -> None:
+        """
+        Lança RunCancelled se o cancelamento foi solicitado.
+
+        Args:
+            etapa (str, optional): Ponto de verificação, incluído na mensagem.
+        """
+        if self.event.is_set():
+            raise RunCancelled(f"Execução cancelada{f' (etapa: {etapa})' if etapa else ''}.")
+
+# Token e destino de eventos da execução em andamento neste processo. Ficam em variáveis de
+# módulo (e não por thread) porque os modelos podem rodar em threads auxiliares.
+_active_token = None
+_active_reporter = None
+
+@contextmanager
+def activate(cancel_token: CancelToken = None, reporter: Callable[[str, str], None] = None):
+    """
+    Torna o token e o destino de eventos visíveis para check_cancelled e report_stage
+    durante o bloco, restaurando os anteriores ao final.
+
+    Args:
+        cancel_token (CancelToken, optional): Token verificado por check_cancelled.
+        reporter (Callable, optional): Função (etapa, cenario) chamada por report_stage.
+    """
+    global _active_token, _active_reporter
+    previous = (_active_token, _active_reporter)
+    _active_token, _active_reporter = cancel_token, reporter
+    try:
+        yield
+    finally:
+        _active_token, _active_reporter = previous
+
+def check_cancelled(etapa: str = None) -> None:
+    """
+    Ponto de verificação de cancelamento. Sem execução ativa, não faz nada.
+
+    Raises:
+        RunCancelled: Se a execução ativa foi cancelada.
+    """
+    token = _active_token
+    if token is not None:
+        token.raise_if_cancelled(etapa)
+
+def report_stage(etapa: str, cenario: str) -> None:
+    """
+    Informa o início de uma etapa de um cenário. Falhas no destino são apenas registradas.
+    """
+    reporter = _active_reporter
+    if reporter is None:
+        return
+    try:
+        reporter(etapa, cenario)
+    except Exception as e:
+        logger.debug(f"Falha ao enviar evento de progresso ({etapa}, {cenario}): {e}")
+
+class ProgressTracker:
+    """
+    Acompanha um lote de cenários e monta os eventos de progresso entregues ao chamador:
+
+        {"etapa", "cenario", "concluidos", "total", "decorrido", "eta", "status"}
+
+    "decorrido" e "eta" (estimativa do tempo restante) estão em segundos; "eta" é None até o
+    primeiro cenário terminar. "status" só é preenchido no evento de cenário concluído.
+    Pode ser usado por várias threads.
+    """
+
+    def __init__(self, total: int, on_event: Callable[[dict], None] = None):
+        """
+        Args:
+            total (int): Quantidade de cenários do lote.
+            on_event (Callable, optional): Recebe cada evento de progresso.
+        """
+        self.total = total
+        self.on_event = on_event
+        self.done = 0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def stage(self, etapa: str, cenario: str) -> None:
+        """
+        Registra o início de uma etapa de um cenário.
+        """
+        with self._lock:
+            event = self._event(etapa, cenario, None)
+        self._emit(event)
+
+    def finish(self, cenario: str, status: str) -> dict:
+        """
+        Registra a conclusão de um cenário (com qualquer status) e retorna o evento.
+        """
+        with self._lock:
+            self.done += 1
+            event = self._event(ETAPA_CONCLUIDO, cenario, status)
+        self._emit(event)
+        return event
+
+    def _event(self, etapa: str, cenario: str, status: str) -> dict:
+        """
+        Monta um evento com o tempo decorrido e a estimativa do tempo restante.
+        """
+        decorrido = time.perf_counter() - self.started
+        eta = decorrido / self.done * (self.total - self.done) if self.done else None
+        return {
+            "etapa": etapa,
+            "cenario": cenario,
+            "concluidos": self.done,
+            "total": self.total,
+            "decorrido": round(decorrido, 3),
+            "eta": round(eta, 3) if eta is not None else None,
+            "status": status
+        }
+
+    def _emit(self, event: dict) -> None:
+        """
+        Entrega o evento ao chamador, sem deixar que uma falha dele interrompa o lote.
+        """
+        if self.on_event is None:
+            return
+        try:
+            self.on_event(event)
+        except Exception as e:
+            logger.warning(f"Falha ao tratar evento de progresso: {e}")
+
+def format_duration(seconds: float) -> str:
+    """
+    Formata uma duração em segundos como "1h02m03s", "02m03s" ou "3s" (para exibição).
+    """
+    if seconds is None:
+        return "?"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m{secs:02d}s"
+    if minutes:
+        return f"{minutes:02d}m{secs:02d}s"
+    return f"{secs}s"
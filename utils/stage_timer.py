@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+from utils.run_control import ETAPA_AJUSTE, ETAPA_CARREGAMENTO, ETAPA_GRAVACAO, ETAPA_METRICAS
+
+# Configura o logger para este módulo
+logger = logging.getLogger(__name__)
+
+# Etapas medidas na execução de um cenário, na ordem em que ocorrem. As que também geram
+# eventos de progresso usam os mesmos nomes de utils.run_control
+ETAPA_TEMPO_CARREGAMENTO = ETAPA_CARREGAMENTO
+ETAPA_TEMPO_FREQUENCIA = "frequencia"      # infer_frequency
+ETAPA_TEMPO_AJUSTE = ETAPA_AJUSTE          # Contém as subetapas abaixo
+ETAPA_TEMPO_AJUSTE_TESTE = "ajuste_teste"  # Ajuste e previsão sobre o período de teste
+ETAPA_TEMPO_AJUSTE_FINAL = "ajuste_final"  # Ajuste (ou extensão) e previsão final
+ETAPA_TEMPO_METRICAS = ETAPA_METRICAS
+ETAPA_TEMPO_PROCESSAMENTO = "processamento"  # Montagem dos registros de resultado
+ETAPA_TEMPO_GRAVACAO = ETAPA_GRAVACAO
+
+class StageTimer:
+    """
+    Mede as etapas da execução de um cenário: tempo de relógio, tempo de CPU do processo
+    e, opcionalmente, pico de memória alocada pelo Python (tracemalloc) em cada etapa.
+    O tracemalloc deixa o código medido de 2 a 5 vezes mais lento (ajustes de modelos),
+    por isso a medição de memória fica desligada por padrão.
+
+    As etapas abertas com stage() são sequenciais. Dentro de uma delas, o código chamado
+    (ex.: o modelo, possivelmente em várias threads) pode registrar subetapas com
+    timed_stage(); como podem rodar em paralelo, elas guardam apenas o tempo de relógio.
+
+    Cada medida é um dicionário {"etapa", "etapa_pai", "duracao", "tempo_cpu", "memoria_pico"}
+    (segundos e bytes; "etapa_pai" é None nas etapas principais; "memoria_pico" é None sem
+    trace_memory).
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        """
+        Args:
+            trace_memory (bool): Mede o pico de memória de cada etapa. O tracemalloc é ligado
+                                 durante a execução e desligado em close() se foi ligado aqui.
+        """
+        self.trace_memory = trace_memory
+        self.records = []
+        self.current = None
+        self._started_tracing = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, etapa: str):
+        """
+        Mede uma etapa principal (não devem ser aninhadas).
+        """
+        tracing = self.trace_memory
+        if tracing:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        self.current = etapa
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            record = {
+                "etapa": etapa,
+                "etapa_pai": None,
+                "duracao": time.perf_counter() - inicio,
+                "tempo_cpu": time.process_time() - inicio_cpu,
+                "memoria_pico": tracemalloc.get_traced_memory()[1] - base if tracing else None
+            }
+            self.current = None
+            with self._lock:
+                self.records.append(record)
+
+    @contextmanager
+    def substage(self, etapa: str):
+        """
+        Mede uma subetapa da etapa principal em andamento (apenas o tempo de relógio).
+        """
+        parent = self.current
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {
+                "etapa": etapa,
+                "etapa_pai": parent,
+                "duracao": time.perf_counter() - inicio,
+                "tempo_cpu": None,
+                "memoria_pico": None
+            }
+            with self._lock:
+                self.records.append(record)
+
+    def close(self) -> list:
+        """
+        Encerra as medições e retorna as medidas, na ordem em que terminaram.
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return self.records
+
+# Medidor da execução em andamento neste processo (ver activate_timer). Fica em variável de
+# módulo, e não por thread, porque os modelos podem rodar em threads auxiliares.
+_active_timer = None
+
+@contextmanager
+def activate_timer(timer: StageTimer):
+    """
+    Torna o medidor visível para timed_stage durante o bloco, restaurando o anterior ao final.
+    """
+    global _active_timer
+    previous = _active_timer
+    _active_timer = timer
+    try:
+        yield timer
+    finally:
+        _active_timer = previous
+
+def timed_stage(etapa: str):
+    """
+    Registra uma subetapa no medidor ativo. Sem medidor ativo, não faz nada.
+
+    Uso:
+        with timed_stage(ETAPA_TEMPO_AJUSTE_TESTE):
+            ...
+    """
+    timer = _active_timer
+    if timer is None:
+        return nullcontext()
+    return timer.substage(etapa)
+
+def split_records(records: list, parts: int) -> list:
+    """
+    Divide os tempos das medidas igualmente entre 'parts' execuções (ex.: as etapas de um
+    ajuste compartilhado por vários cenários). O pico de memória não é dividido.
+    """
+    return [
+        {
+            **record,
+            "duracao": record["duracao"] / parts,
+            "tempo_cpu": record["tempo_cpu"] / parts if record["tempo_cpu"] is not None else None
+        }
+        for record in records
+    ]